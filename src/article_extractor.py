@@ -0,0 +1,129 @@
+import os  # 导入os模块用于创建缓存目录
+import re  # 导入re模块用于压缩空白
+import sqlite3  # 导入sqlite3用于持久化缓存
+import threading  # 导入threading模块保证多线程访问安全
+import time  # 导入time模块判断缓存是否过期
+from concurrent.futures import ThreadPoolExecutor  # 导入线程池用于并发下载文章
+from bs4 import BeautifulSoup  # 导入BeautifulSoup用于提取正文
+from http_transport import get_transport  # 导入共享的HTTP传输层
+from logger import LOG  # 导入日志模块
+
+NOISE_TAGS = ['script', 'style', 'noscript', 'nav', 'header', 'footer', 'aside', 'form', 'svg']  # 不属于正文的标签
+MIN_PARAGRAPH_CHARS = 40  # 短于该长度的段落多为导航、按钮或版权信息
+TRANSIENT_STATUS = (408, 425, 429)  # 属于暂时性错误的 4xx，与 5xx 一样不缓存
+
+
+class ArticleCache:
+    """
+    按 URL 保存文章正文的持久化缓存，条目在 ttl_hours 小时后过期。
+    非 HTML 或返回 4xx 的链接同样缓存为空正文，过期前不再重复请求；超时、连接错误和 5xx 不缓存。
+    """
+    def __init__(self, path='cache/hn_articles.db', ttl_hours=24, clock=time.time):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)  # 确保缓存目录存在
+        self.ttl = ttl_hours * 3600  # 条目有效期（秒）
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS articles (url TEXT PRIMARY KEY, text TEXT, fetched_at REAL)"
+            )
+
+    def get(self, url):
+        # 返回未过期的正文（可能为空字符串），未命中或已过期返回 None
+        with self._lock:
+            row = self._conn.execute("SELECT text, fetched_at FROM articles WHERE url = ?", (url,)).fetchone()
+        if row is None or self._clock() - row[1] > self.ttl:
+            return None
+        return row[0]
+
+    def put(self, url, text):
+        with self._lock:
+            with self._conn:
+                self._conn.execute("INSERT OR REPLACE INTO articles (url, text, fetched_at) VALUES (?, ?, ?)",
+                                   (url, text, self._clock()))
+                # 顺带清理过期条目，避免缓存无限增长
+                self._conn.execute("DELETE FROM articles WHERE fetched_at < ?", (self._clock() - self.ttl,))
+
+
+def extract_main_text(html_content, max_chars=1500):
+    """
+    提取页面正文：去掉脚本、导航等噪声后，优先取 <article> / <main> 中的段落，截断到 max_chars 个字符。
+    """
+    soup = BeautifulSoup(html_content, 'html.parser')
+    for tag in soup(NOISE_TAGS):
+        tag.decompose()
+    root = soup.find('article') or soup.find('main') or soup.body or soup
+    paragraphs = [re.sub(r'\s+', ' ', p.get_text(' ')).strip() for p in root.find_all('p')]
+    text = ' '.join(p for p in paragraphs if len(p) >= MIN_PARAGRAPH_CHARS)
+    if not text:
+        text = re.sub(r'\s+', ' ', root.get_text(' ')).strip()  # 没有成段文字时退回全部可见文本
+    return text[:max_chars]
+
+
+class ArticleExtractor:
+    """
+    并发下载新闻链接指向的文章并提取正文：有界线程池、单篇字节上限和超时，结果按 URL 缓存。
+    同一篇新闻在首页停留期间只下载一次。
+    """
+    def __init__(self, cache=None, transport=None, max_workers=8, max_bytes=1024 * 1024, timeout=10, max_chars=1500):
+        self.cache = cache  # 可选的 ArticleCache 实例
+        self.http = transport or get_transport()  # 共享连接池与重试策略的HTTP传输层
+        self.max_workers = max_workers  # 同时下载的最大文章数
+        self.max_bytes = max_bytes  # 单篇文章最多读取的字节数，超出部分丢弃
+        self.timeout = timeout  # 单篇文章的读取超时（秒）
+        self.max_chars = max_chars  # 提取的正文最多保留的字符数
+
+    def enrich(self, stories):
+        """
+        为每条新闻补充 'content' 字段（可能为空字符串），返回新的新闻列表，顺序不变。
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            contents = list(executor.map(self.extract, [story['link'] for story in stories]))
+        return [dict(story, content=content) for story, content in zip(stories, contents)]
+
+    def extract(self, url):
+        # 站内链接（如 Ask HN）没有外部文章
+        if not url.startswith(('http://', 'https://')):
+            return ''
+        if self.cache is not None:
+            cached = self.cache.get(url)
+            if cached is not None:
+                return cached
+        text, cacheable = self._download(url)
+        if self.cache is not None and cacheable:
+            self.cache.put(url, text)
+        return text
+
+    def _download(self, url):
+        """
+        下载并提取正文，返回 (正文, 是否可以缓存)。
+        非 HTML 内容和 4xx 是确定的结果，可以缓存为空正文；超时、连接错误和 5xx 可能只是暂时的，
+        不缓存，下一次快照重新下载。
+        """
+        try:
+            response = self.http.get(url, stream=True, timeout=(self.http.connect_timeout, self.timeout))
+            try:
+                if 400 <= response.status_code < 500 and response.status_code not in TRANSIENT_STATUS:
+                    LOG.warning(f"下载文章 {url} 失败：HTTP {response.status_code}")
+                    return '', True
+                response.raise_for_status()
+                content_type = response.headers.get('Content-Type', '')
+                if 'html' not in content_type:
+                    return '', True  # PDF、图片等非 HTML 内容不做提取
+                body = bytearray()
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    body += chunk
+                    if len(body) >= self.max_bytes:
+                        break  # 超过字节上限时只使用已读取的部分
+                # 未声明字符集时 requests 默认按 ISO-8859-1 解码，网页正文更常见的是 UTF-8
+                encoding = response.encoding if 'charset' in content_type else 'utf-8'
+            finally:
+                response.close()
+            text = extract_main_text(bytes(body[:self.max_bytes]).decode(encoding, errors='replace'), self.max_chars)
+            return text, True
+        except Exception as e:
+            LOG.warning(f"下载文章 {url} 失败：{str(e)}")
+            return '', False
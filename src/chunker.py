@@ -0,0 +1,62 @@
+import re  # 导入re模块用于统计非ASCII字符
+
+HEADING_PREFIX = '#'  # Markdown 标题行的前缀
+_NON_ASCII = re.compile(r'[^\x00-\x7f]')
+
+
+def estimate_tokens(text):
+    """
+    粗略估算文本的 token 数：英文约 4 个字符一个 token，中文等非 ASCII 字符约一个字符一个 token。
+    只用于切分输入，不要求与模型的分词器完全一致，估算略偏大更安全。
+    """
+    non_ascii = len(_NON_ASCII.findall(text))
+    return non_ascii + (len(text) - non_ascii + 3) // 4
+
+
+def split_markdown(text, max_tokens):
+    """
+    按行把 Markdown 切分为估算 token 数不超过 max_tokens 的若干块。
+    每块开头重复文档标题（第一行 # 标题）和当前所在的小节标题，使每块单独摘要时仍知道仓库名、日期和分类。
+    单行超过上限时按字符硬切。
+    """
+    lines = text.splitlines()
+    title = lines[0] if lines and lines[0].startswith('# ') else None
+    body = lines[1:] if title is not None else lines
+
+    chunks = []
+    section = None  # 当前所在的小节标题
+    current = [title] if title is not None else []
+    context_size = len(current)  # current 开头重复的标题行数
+    used = estimate_tokens('\n'.join(current))
+    for line in body:
+        is_heading = line.startswith(HEADING_PREFIX)
+        for piece in _split_long_line(line, max(max_tokens // 2, 1)):  # 留出一半给重复的标题行
+            cost = estimate_tokens(piece) + 1  # 加上换行符
+            if used + cost > max_tokens and len(current) > context_size:
+                _append_chunk(chunks, current, context_size)
+                # 新块从标题行开始时不再重复上一个小节标题
+                current = [item for item in (title, None if is_heading else section) if item is not None]
+                context_size = len(current)
+                used = estimate_tokens('\n'.join(current))
+            current.append(piece)
+            used += cost
+        if is_heading:
+            section = line
+    _append_chunk(chunks, current, context_size)
+    return chunks
+
+
+def _append_chunk(chunks, lines, context_size):
+    # 只有标题或空行的块没有可摘要的内容，直接丢弃
+    if any(line.strip() for line in lines[context_size:]):
+        chunks.append('\n'.join(lines))
+
+
+def _split_long_line(line, max_tokens):
+    # 超过上限的单行按估算比例切成多段
+    max_tokens = max(max_tokens, 1)
+    tokens = estimate_tokens(line)
+    if tokens <= max_tokens:
+        return [line]
+    step = max(1, len(line) * max_tokens // tokens)
+    return [line[i:i + step] for i in range(0, len(line), step)]
@@ -1,6 +1,7 @@
 # src/command_handler.py
 
 import argparse  # 导入argparse库，用于处理命令行参数解析
+import time  # 导入time模块，用于计算统计的起始时间
 
 class CommandHandler:
     def __init__(self, github_client, subscription_manager, report_generator):
@@ -43,11 +44,38 @@ class CommandHandler:
         parser_export_range.add_argument('days', type=int, help='The number of days to export progress for')
         parser_export_range.set_defaults(func=self.export_progress_by_date_range)
 
+        # 从本地存储离线渲染特定日期范围进展命令
+        parser_render_range = subparsers.add_parser('render-range', help='Render progress over a range of dates from the local store (no network)')
+        parser_render_range.add_argument('repo', type=str, help='The repository to render progress for (e.g., owner/repo)')
+        parser_render_range.add_argument('days', type=int, help='The number of days to render progress for')
+        parser_render_range.set_defaults(func=self.render_progress_by_date_range)
+
         # 生成日报命令
         parser_generate = subparsers.add_parser('generate', help='Generate daily report from markdown file')
         parser_generate.add_argument('file', type=str, help='The markdown file to generate report from')
+        parser_generate.add_argument('--no-cache', action='store_true', help='Bypass the LLM response cache')
         parser_generate.set_defaults(func=self.generate_daily_report)
 
+        # 预览输入压缩效果命令
+        parser_compact = subparsers.add_parser('compact', help='Show how a markdown file is compacted before the LLM call')
+        parser_compact.add_argument('file', type=str, help='The markdown file to compact')
+        parser_compact.set_defaults(func=self.compact_markdown)
+
+        # 查看 GitHub 令牌配额命令
+        parser_rate_limit = subparsers.add_parser('rate-limit', help='Show remaining GitHub API quota per token')
+        parser_rate_limit.set_defaults(func=self.show_rate_limit)
+
+        # 查看 LLM 响应缓存命中统计命令
+        parser_llm_cache = subparsers.add_parser('llm-cache', help='Show LLM response cache hits and misses')
+        parser_llm_cache.set_defaults(func=self.show_llm_cache)
+
+        # 查看 LLM 调用指标汇总命令
+        parser_llm_stats = subparsers.add_parser('llm-stats', help='Summarize LLM token usage and latency')
+        parser_llm_stats.add_argument('--by', choices=['report_type', 'subject', 'provider', 'model', 'cold_start'],
+                                      default='report_type', help='Group calls by this field (default: report_type)')
+        parser_llm_stats.add_argument('--days', type=int, default=7, help='Only include calls from the last N days')
+        parser_llm_stats.set_defaults(func=self.show_llm_stats)
+
         # 帮助命令
         parser_help = subparsers.add_parser('help', help='Show help message')
         parser_help.set_defaults(func=self.print_help)
@@ -77,9 +105,57 @@ class CommandHandler:
         self.github_client.export_progress_by_date_range(args.repo, days=args.days)
         print(f"Exported progress for the last {args.days} days for repository: {args.repo}")
 
+    def render_progress_by_date_range(self, args):
+        file_path = self.github_client.render_progress_by_date_range(args.repo, days=args.days)
+        print(f"Rendered progress for the last {args.days} days for repository: {args.repo} -> {file_path}")
+
     def generate_daily_report(self, args):
-        self.report_generator.generate_github_report(args.file)
+        self.report_generator.generate_github_report(args.file, use_cache=not args.no_cache)
         print(f"Generated daily report from file: {args.file}")
 
+    def compact_markdown(self, args):
+        with open(args.file, 'r') as file:
+            compacted, stats = self.report_generator.compact(file.read())
+        print(compacted)
+        print(f"Tokens: {stats['tokens_before']} -> {stats['tokens_after']} "
+              f"({stats['duplicates']} duplicates removed, {stats['grouped']} items grouped, {stats['omitted']} omitted)")
+
+    def show_rate_limit(self, args):
+        metrics = self.github_client.rate_limit_metrics()
+        print("GitHub API quota per token:")
+        for token, quota in metrics.items():
+            print(f"  - {token}: {quota['remaining']}/{quota['limit']} (resets at {quota['reset_at']})")
+
+    def show_llm_cache(self, args):
+        metrics = self.report_generator.llm.cache_metrics()
+        if not metrics:
+            print("LLM response cache is disabled.")
+            return
+        print(f"LLM response cache: {metrics['hits']} hits, {metrics['misses']} misses "
+              f"(hit rate {metrics['hit_rate']:.1%}), {metrics['entries']} entries, {metrics['size_bytes']} bytes")
+
+    def show_llm_stats(self, args):
+        metrics = self.report_generator.llm.metrics
+        if metrics is None:
+            print("LLM call metrics are disabled.")
+            return
+        rows = metrics.summary(group_by=args.by, since=time.time() - args.days * 86400)
+        print(f"LLM calls in the last {args.days} days by {args.by}:")
+        for row in rows:
+            print(f"  - {row[args.by]}: {row['calls']} calls ({row['cached']} cached), "
+                  f"{row['prompt_tokens'] or 0} prompt / {row['completion_tokens'] or 0} completion tokens, "
+                  f"latency avg {_seconds(row['avg_latency'])} max {_seconds(row['max_latency'])}, "
+                  f"TTFT avg {_seconds(row['avg_ttft'])}, {_rate(row['avg_tokens_per_second'])}, "
+                  f"model load avg {_seconds(row['avg_load_seconds'])}")
+
     def print_help(self, args=None):
         self.parser.print_help()  # 输出帮助信息
+
+
+def _seconds(value):
+    # 格式化秒数，没有数据时显示 -
+    return f"{value:.2f}s" if value is not None else "-"
+
+
+def _rate(value):
+    return f"{value:.1f} tokens/s" if value is not None else "- tokens/s"
@@ -1,18 +1,20 @@
 import shlex  # 导入shlex库，用于正确解析命令行输入
 
 from config import Config  # 从config模块导入Config类，用于配置管理
-from github_client import GitHubClient  # 从github_client模块导入GitHubClient类，用于GitHub API操作
+from http_transport import init_transport  # 从http_transport模块导入共享传输层的初始化函数
+from github_client import create_github_client  # 从github_client模块导入GitHubClient工厂函数，用于GitHub API操作
 from report_generator import ReportGenerator  # 从report_generator模块导入ReportGenerator类，用于报告生成
-from llm import LLM  # 从llm模块导入LLM类，可能用于语言模型相关操作
+from llm import create_llm  # 从llm模块导入语言模型工厂，按配置创建单个模型服务或多服务路由
 from subscription_manager import SubscriptionManager  # 从subscription_manager模块导入SubscriptionManager类，管理订阅
 from command_handler import CommandHandler  # 从command_handler模块导入CommandHandler类，处理命令行命令
 from logger import LOG  # 从logger模块导入LOG对象，用于日志记录
 
 def main():
     config = Config()  # 创建配置实例
-    github_client = GitHubClient(config.github_token)  # 创建GitHub客户端实例
-    llm = LLM(config)  # 创建语言模型实例
-    report_generator = ReportGenerator(llm, config.report_types)  # 创建报告生成器实例
+    init_transport(config.http)  # 初始化所有网络客户端共享的连接池
+    github_client = create_github_client(config)  # 创建GitHub客户端实例
+    llm = create_llm(config)  # 创建语言模型实例（启用路由时在多个模型服务间对冲与故障切换）
+    report_generator = ReportGenerator(llm, config.report_types, compaction=config.report_compaction)  # 创建报告生成器实例
     subscription_manager = SubscriptionManager(config.subscriptions_file)  # 创建订阅管理器实例
     command_handler = CommandHandler(github_client, subscription_manager, report_generator)  # 创建命令处理器实例
     
@@ -15,9 +15,23 @@ class Config:
             # 加载 GitHub 相关配置
             github_config = config.get('github', {})
             self.github_token = os.getenv('GITHUB_TOKEN', github_config.get('token'))
+            # 令牌池：优先读取以逗号分隔的环境变量 GITHUB_TOKENS，未配置时只使用单个令牌
+            tokens = os.getenv('GITHUB_TOKENS')
+            self.github_tokens = tokens.split(',') if tokens else github_config.get('tokens') or [self.github_token]
             self.subscriptions_file = github_config.get('subscriptions_file')
             self.freq_days = github_config.get('progress_frequency_days', 1)
             self.exec_time = github_config.get('progress_execution_time', "08:00")
+            self.github_max_concurrent_requests = github_config.get('max_concurrent_requests', 8)  # 并发获取时同时在途的最大请求数
+            self.github_cache = github_config.get('cache', {})  # ETag 条件请求缓存配置
+            self.github_rate_limit = github_config.get('rate_limit', {})  # 请求限速与限流重试配置
+            self.github_backend = github_config.get('backend', 'rest')  # 数据获取后端：rest 或 graphql
+            self.github_graphql = github_config.get('graphql', {})  # GraphQL 批量查询配置
+            self.github_store = github_config.get('store', {})  # 本地事件存储（增量同步）配置
+            self.github_webhook = github_config.get('webhook', {})  # Webhook 接收服务配置
+            self.github_webhook_secret = os.getenv('GITHUB_WEBHOOK_SECRET', self.github_webhook.get('secret'))
+
+            # 加载 Hacker News 相关配置（数据获取后端与 HTML 解析器）
+            self.hacker_news = config.get('hacker_news', {})
 
             # 加载 LLM 相关配置
             llm_config = config.get('llm', {})
@@ -26,8 +40,23 @@ class Config:
             self.ollama_model_name = llm_config.get('ollama_model_name', 'llama3')
             self.ollama_api_url = llm_config.get('ollama_api_url', 'http://localhost:11434/api/chat')
 
+            self.llm_request_timeout = llm_config.get('request_timeout', 600)  # 单次生成请求的读取超时（秒）
+            self.llm_cache = llm_config.get('cache', {})  # LLM 响应缓存配置
+            self.llm_metrics = llm_config.get('metrics', {})  # LLM 调用指标库配置
+            self.llm_batch = llm_config.get('batch', {})  # OpenAI 批处理模式配置
+            self.llm_ollama = llm_config.get('ollama', {})  # Ollama 模型驻留（keep_alive）、预热与生成参数配置
+            self.llm_max_concurrent_requests = llm_config.get('max_concurrent_requests', {})  # 每个模型服务的最大并发请求数
+            self.llm_max_workers = llm_config.get('max_workers', 8)  # 并发生成报告的线程池大小
+            self.llm_context_window = llm_config.get('context_window', {})  # 每个模型服务的上下文窗口（token 数）
+            self.llm_router = llm_config.get('router', {})  # 多模型服务路由（对冲请求与故障切换）配置
+
+            # 加载 HTTP 传输层配置（连接池、重试退避与超时）
+            self.http = config.get('http', {})
+
             # 加载报告类型配置
             self.report_types = config.get('report_types', ["github", "hacker_news"])  # 默认报告类型
+            self.report_compaction = config.get('report_compaction', {})  # 调用 LLM 前的输入压缩配置
+            self.report_topic_reuse = config.get('report_topic_reuse', {})  # 首页变化很小时复用上一份主题报告的配置
 
             # 加载 Slack 配置
             slack_config = config.get('slack', {})
@@ -6,11 +6,14 @@ import sys  # 导入sys库，用于执行系统相关的操作
 from datetime import datetime  # 导入 datetime 模块用于获取当前日期
 
 from config import Config  # 导入配置管理类
-from github_client import GitHubClient  # 导入GitHub客户端类，处理GitHub API请求
-from hacker_news_client import HackerNewsClient
+from http_transport import init_transport  # 导入共享HTTP传输层的初始化函数
+from github_client import create_github_client  # 导入GitHub客户端工厂函数，处理GitHub API请求
+from hacker_news_client import create_hacker_news_client  # 导入Hacker News客户端工厂函数
+from webhook_server import create_webhook_server  # 导入Webhook接收服务工厂函数
 from notifier import Notifier  # 导入通知器类，用于发送通知
 from report_generator import ReportGenerator  # 导入报告生成器类
-from llm import LLM  # 导入语言模型类，可能用于生成报告内容
+from llm import create_llm  # 导入语言模型工厂，按配置创建单个模型服务或多服务路由
+from llm_executor import LLMExecutor  # 导入报告生成线程池，并发调用语言模型
 from subscription_manager import SubscriptionManager  # 导入订阅管理器类，管理GitHub仓库订阅
 from logger import LOG  # 导入日志记录器
 
@@ -20,36 +23,90 @@ def graceful_shutdown(signum, frame):
     LOG.info("[优雅退出]守护进程接收到终止信号")
     sys.exit(0)  # 安全退出程序
 
-def github_job(subscription_manager, github_client, report_generator, notifier, days):
+def github_job(subscription_manager, github_client, report_generator, notifier, days, llm_executor):
     LOG.info("[开始执行定时任务]GitHub Repo 项目进展报告")
+    llm_executor.submit(report_generator.llm.warm_up)  # 获取数据的同时预热本地模型
     subscriptions = subscription_manager.list_subscriptions()  # 获取当前所有订阅
     LOG.info(f"订阅列表：{subscriptions}")
-    for repo in subscriptions:
-        # 遍历每个订阅的仓库，执行以下操作
-        markdown_file_path = github_client.export_progress_by_date_range(repo, days)
-        # 从Markdown文件自动生成进展简报
-        report, _ = report_generator.generate_github_report(markdown_file_path)
-        notifier.notify_github_report(repo, report)
+    exports = github_client.export_progress_for_repos(subscriptions, days)
+    if report_generator.llm.batch is not None:
+        # 批处理模式：导出全部仓库后一次提交所有生成请求；等待批次完成可能需要数小时，
+        # 因此提交到报告生成线程池，不阻塞调度循环中的其他任务
+        exports = list(exports)
+        future = llm_executor.submit(github_batch_reports, exports, report_generator, notifier)
+        future.add_done_callback(lambda f: log_job_result(f, "GitHub Repo 项目进展报告（批处理）"))
+    else:
+        # 并发导出所有订阅仓库的进展，每个仓库的数据一就绪就提交生成简报，按完成顺序依次发送通知
+        generate = lambda repo, markdown_file_path: report_generator.generate_github_report(markdown_file_path)
+        for (repo, _), future in llm_executor.map_unordered(generate, exports):
+            try:
+                report, _ = future.result()
+            except Exception as e:
+                LOG.error(f"[{repo}]项目简报生成失败：{str(e)}")
+                continue
+            notifier.notify_github_report(repo, report)
+    LOG.info(f"GitHub 令牌剩余配额：{github_client.rate_limit_metrics()}")
+    LOG.info(f"LLM 响应缓存统计：{report_generator.llm.cache_metrics()}")
     LOG.info(f"[定时任务执行完毕]")
 
 
-def hn_topic_job(hacker_news_client, report_generator):
+def github_batch_reports(exports, report_generator, notifier):
+    """
+    以批处理方式生成各仓库的简报并按仓库发送通知。
+    整个批次失败（提交失败、超时或批次状态异常）时，改为逐个仓库直接生成，单个仓库失败只记录日志。
+    """
+    paths = [path for _, path in exports]
+    try:
+        results = report_generator.generate_github_reports_batch(paths)
+    except Exception as e:
+        LOG.error(f"批处理生成失败，改为逐个仓库生成：{str(e)}")
+        results = {}
+        for path in paths:
+            try:
+                results[path] = report_generator.generate_github_report(path)
+            except Exception as error:
+                results[path] = error
+    for repo, markdown_file_path in exports:
+        result = results[markdown_file_path]
+        if isinstance(result, Exception):
+            LOG.error(f"[{repo}]项目简报生成失败：{str(result)}")
+            continue
+        notifier.notify_github_report(repo, result[0])
+
+
+def hn_topic_job(hacker_news_client, report_generator, llm_executor):
     LOG.info("[开始执行定时任务]Hacker News 热点话题跟踪")
+    llm_executor.submit(report_generator.llm.warm_up)  # 获取数据的同时预热本地模型
     markdown_file_path = hacker_news_client.export_top_stories()
-    _, _ = report_generator.generate_hn_topic_report(markdown_file_path)
-    LOG.info(f"[定时任务执行完毕]")
+    # 提交到报告生成线程池后立即返回，不阻塞调度循环中的其他任务
+    future = llm_executor.submit(report_generator.generate_hn_topic_report, markdown_file_path)
+    future.add_done_callback(lambda f: log_job_result(f, "Hacker News 热点话题跟踪"))
+    future.add_done_callback(lambda f: LOG.info(f"主题报告复用统计：{report_generator.topic_reuse_metrics()}"))
 
 
-def hn_daily_job(hacker_news_client, report_generator, notifier):
+def hn_daily_job(hacker_news_client, report_generator, notifier, llm_executor):
     LOG.info("[开始执行定时任务]Hacker News 今日前沿技术趋势")
+    llm_executor.submit(report_generator.llm.warm_up)  # 获取数据的同时预热本地模型
     # 获取当前日期，并格式化为 'YYYY-MM-DD' 格式
     date = datetime.now().strftime('%Y-%m-%d')
     # 生成每日汇总报告的目录路径
     directory_path = os.path.join('hacker_news', date)
-    # 生成每日汇总报告并保存
-    report, _ = report_generator.generate_hn_daily_report(directory_path)
-    notifier.notify_hn_report(date, report)
-    LOG.info(f"[定时任务执行完毕]")
+
+    # 生成每日汇总报告并保存，完成后发送通知
+    def generate_and_notify():
+        report, _ = report_generator.generate_hn_daily_report(directory_path)
+        notifier.notify_hn_report(date, report)
+
+    future = llm_executor.submit(generate_and_notify)
+    future.add_done_callback(lambda f: log_job_result(f, "Hacker News 今日前沿技术趋势"))
+
+
+def log_job_result(future, job_name):
+    # 线程池中任务完成时记录结果，异常不会传播到调度循环
+    if future.exception() is not None:
+        LOG.error(f"[{job_name}]任务执行失败：{str(future.exception())}")
+    else:
+        LOG.info(f"[{job_name}][定时任务执行完毕]")
 
 
 def main():
@@ -57,27 +114,37 @@ def main():
     signal.signal(signal.SIGTERM, graceful_shutdown)
 
     config = Config()  # 创建配置实例
-    github_client = GitHubClient(config.github_token)  # 创建GitHub客户端实例
-    hacker_news_client = HackerNewsClient() # 创建 Hacker News 客户端实例
+    init_transport(config.http)  # 初始化所有网络客户端共享的连接池
+    github_client = create_github_client(config)  # 创建GitHub客户端实例
+    # 启用 Webhook 时在后台接收推送，事件流健康的仓库在定时任务中跳过 REST 轮询
+    webhook_server = create_webhook_server(config, github_client.store)
+    if webhook_server is not None:
+        webhook_server.start()
+    hacker_news_client = create_hacker_news_client(config) # 创建 Hacker News 客户端实例
     notifier = Notifier(config.email)  # 创建通知器实例
-    llm = LLM(config)  # 创建语言模型实例
-    report_generator = ReportGenerator(llm, config.report_types)  # 创建报告生成器实例
+    llm = create_llm(config)  # 创建语言模型实例（启用路由时在多个模型服务间对冲与故障切换）
+    # 默认每日汇总聚合各小时的主题报告；配置 index.daily_report 时改用索引中当天出现过的去重新闻列表
+    story_index = hacker_news_client.index if config.hacker_news.get('index', {}).get('daily_report', False) else None
+    report_generator = ReportGenerator(llm, config.report_types, story_index,
+                                       compaction=config.report_compaction,
+                                       topic_reuse=config.report_topic_reuse)  # 创建报告生成器实例
     subscription_manager = SubscriptionManager(config.subscriptions_file)  # 创建订阅管理器实例
+    llm_executor = LLMExecutor(config.llm_max_workers)  # 创建报告生成线程池，各模型服务的并发数由配置限制
 
     # 启动时立即执行（如不需要可注释）
-    # github_job(subscription_manager, github_client, report_generator, notifier, config.freq_days)
-    hn_daily_job(hacker_news_client, report_generator, notifier)
+    # github_job(subscription_manager, github_client, report_generator, notifier, config.freq_days, llm_executor)
+    hn_daily_job(hacker_news_client, report_generator, notifier, llm_executor)
 
     # 安排 GitHub 的定时任务
     schedule.every(config.freq_days).days.at(
         config.exec_time
-    ).do(github_job, subscription_manager, github_client, report_generator, notifier, config.freq_days)
+    ).do(github_job, subscription_manager, github_client, report_generator, notifier, config.freq_days, llm_executor)
     
     # 安排 hn_topic_job 每4小时执行一次，从0点开始
-    schedule.every(4).hours.at(":00").do(hn_topic_job, hacker_news_client, report_generator)
+    schedule.every(4).hours.at(":00").do(hn_topic_job, hacker_news_client, report_generator, llm_executor)
 
     # 安排 hn_daily_job 每天早上10点执行一次
-    schedule.every().day.at("10:00").do(hn_daily_job, hacker_news_client, report_generator, notifier)
+    schedule.every().day.at("10:00").do(hn_daily_job, hacker_news_client, report_generator, notifier, llm_executor)
 
     try:
         # 在守护进程中持续运行
@@ -0,0 +1,226 @@
+import json  # 导入json模块用于序列化记录
+import os  # 导入os模块用于创建存储目录
+import sqlite3  # 导入sqlite3用于本地持久化
+import threading  # 导入threading模块保证多线程访问安全
+from datetime import datetime, timedelta, timezone  # 导入日期处理模块，用于判断 Webhook 事件流是否健康
+from github_records import RECORD_TYPES  # 导入精简记录类型
+from logger import LOG  # 导入日志模块
+
+RESOURCES = ('commits', 'issues', 'pull_requests')  # 同步的三类 GitHub 数据
+INSERT_BATCH_SIZE = 500  # 单次 executemany 写入的最大记录数
+# 提交按作者/提交时间排序，变基或合并进来的提交可能早于游标；增量同步提交时回退这么多天重新获取，按 SHA 去重
+COMMIT_OVERLAP_DAYS = 7
+
+
+def item_key(resource, item):
+    # 记录的唯一标识：提交使用 SHA，Issue / Pull Request 使用编号
+    return item['sha'] if resource == 'commits' else str(item['number'])
+
+
+def item_timestamp(resource, item):
+    # 记录的时间戳：提交使用提交时间，Issue / Pull Request 使用最后更新时间
+    return item.get('date') if resource == 'commits' else item.get('updated_at')
+
+
+def is_closed(item):
+    # Issue / Pull Request 是否已关闭：GraphQL 中已合并的 Pull Request 状态为 merged；
+    # 没有状态字段的记录来自只获取关闭状态的请求，视为已关闭
+    return item.get('state', 'closed') in ('closed', 'merged')
+
+
+def item_data(item):
+    # 精简记录序列化为字典后存储
+    return item.to_dict() if hasattr(item, 'to_dict') else dict(item)
+
+
+def utc_timestamp(moment=None):
+    # 与 GitHub API 一致的 UTC 时间戳格式，便于按字符串比较
+    return (moment or datetime.now(timezone.utc)).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def shift_timestamp(timestamp, days):
+    # 把 UTC 时间戳（或 YYYY-MM-DD 日期）平移若干天，返回 utc_timestamp 格式
+    if len(timestamp) == 10:
+        moment = datetime.strptime(timestamp, '%Y-%m-%d')
+    else:
+        moment = datetime.strptime(timestamp[:19], '%Y-%m-%dT%H:%M:%S')
+    return utc_timestamp(moment + timedelta(days=days))
+
+
+class EventStore:
+    """
+    本地 GitHub 数据存储（SQLite，WAL 模式）：按仓库和时间戳索引保存三类数据的完整记录，
+    以及每类数据的同步游标（高水位）。游标记录已见过的最新时间戳和已覆盖的最早时间（synced_from），
+    后续同步只需获取游标之后的增量（提交额外回退 COMMIT_OVERLAP_DAYS 天）；
+    任意时间窗口的 Markdown 都可以直接从存储查询渲染，无需访问网络。
+    Webhook 推送的事件直接追加到 items，并在 webhook_health 中记录每个仓库最近一次收到推送的时间。
+    """
+    def __init__(self, path='data/github_events.db'):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)  # 确保存储目录存在
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        # WAL 模式下读写互不阻塞，查询可以使用独立连接与同步写入并行
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS items ("
+                " repo TEXT, resource TEXT, item_key TEXT, ts TEXT, data TEXT,"
+                " PRIMARY KEY (repo, resource, item_key))"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sync_cursors ("
+                " repo TEXT, resource TEXT, cursor TEXT, synced_from TEXT,"
+                " PRIMARY KEY (repo, resource))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_items_repo_ts ON items(repo, resource, ts)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS webhook_health ("
+                " repo TEXT PRIMARY KEY, last_event TEXT, last_delivery_at TEXT)"
+            )
+
+    def delta_since(self, repo, resource, since):
+        """
+        计算本次同步应从哪个时间点开始获取。
+        已有游标且历史已覆盖 since 时只获取游标之后的增量，否则从 since 开始完整获取。
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT cursor, synced_from FROM sync_cursors WHERE repo = ? AND resource = ?", (repo, resource)
+            ).fetchone()
+        if row is None or row[1] is None or (since is not None and since < row[1]):
+            return since
+        cursor, synced_from = row
+        if cursor and resource == 'commits':
+            # 回退重叠窗口，但不早于已覆盖的最早时间（更早的部分本来就不需要）
+            cursor = max(shift_timestamp(cursor, -COMMIT_OVERLAP_DAYS), synced_from)
+        return cursor or synced_from
+
+    def merge(self, repo, resource, items, fetched_since):
+        """
+        合并一次成功同步的结果：写入记录，并推进游标。
+        Issue / Pull Request 只保存已关闭（含已合并）的记录，同步到的未关闭记录（如被重新打开）从存储中删除。
+        :param fetched_since: 本次同步请求使用的起始时间，用于维护已覆盖的最早时间。
+        """
+        reopened = []
+        if resource != 'commits':
+            reopened = [item for item in items if not is_closed(item)]
+            items = [item for item in items if is_closed(item)]
+        rows = self._rows(repo, resource, items)
+        latest = max(filter(None, [row[3] for row in rows] +
+                            [item_timestamp(resource, item) for item in reopened]), default=None)
+        with self._lock:
+            with self._conn:
+                self._write_rows(rows)  # 同一次合并在一个事务内完成
+                self._conn.executemany("DELETE FROM items WHERE repo = ? AND resource = ? AND item_key = ?",
+                                       [(repo, resource, item_key(resource, item)) for item in reopened])
+                row = self._conn.execute(
+                    "SELECT cursor, synced_from FROM sync_cursors WHERE repo = ? AND resource = ?", (repo, resource)
+                ).fetchone()
+                cursor, synced_from = row if row else (None, None)
+                cursor = max(filter(None, [cursor, latest, fetched_since]), default=None)
+                if synced_from is None or (fetched_since is not None and fetched_since < synced_from):
+                    synced_from = fetched_since
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO sync_cursors (repo, resource, cursor, synced_from) VALUES (?, ?, ?, ?)",
+                    (repo, resource, cursor, synced_from)
+                )
+        LOG.debug(f"[{repo}] {resource} 合并 {len(rows)} 条记录，删除 {len(reopened)} 条未关闭记录，游标推进到 {cursor}")
+
+    def append(self, repo, resource, items):
+        """
+        追加 Webhook 推送的记录，不推进同步游标：
+        推送流中断后恢复轮询时，仍从上次轮询的游标开始补齐期间遗漏的事件。
+        """
+        rows = self._rows(repo, resource, items)
+        with self._lock:
+            with self._conn:
+                self._write_rows(rows)
+        LOG.debug(f"[{repo}] {resource} 追加 {len(rows)} 条 Webhook 记录")
+
+    def remove(self, repo, resource, items):
+        """
+        删除记录（如 Webhook 推送的重新打开的 Issue），同样不推进同步游标。
+        """
+        keys = [(repo, resource, item_key(resource, item)) for item in items]
+        with self._lock:
+            with self._conn:
+                self._conn.executemany("DELETE FROM items WHERE repo = ? AND resource = ? AND item_key = ?", keys)
+        LOG.debug(f"[{repo}] {resource} 删除 {len(keys)} 条 Webhook 记录")
+
+    @staticmethod
+    def _rows(repo, resource, items):
+        return [(repo, resource, item_key(resource, item), item_timestamp(resource, item), json.dumps(item_data(item)))
+                for item in items]
+
+    def _write_rows(self, rows):
+        # 分批写入，调用方负责加锁并开启事务
+        for start in range(0, len(rows), INSERT_BATCH_SIZE):
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO items (repo, resource, item_key, ts, data) VALUES (?, ?, ?, ?, ?)",
+                rows[start:start + INSERT_BATCH_SIZE]
+            )
+
+    def record_webhook_delivery(self, repo, event, received_at=None):
+        """
+        记录某个仓库收到一次通过签名校验的 Webhook 推送。
+        """
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO webhook_health (repo, last_event, last_delivery_at) VALUES (?, ?, ?)",
+                    (repo, event, received_at or utc_timestamp())
+                )
+
+    def webhook_healthy(self, repo, max_silence_hours, now=None):
+        """
+        判断仓库的 Webhook 事件流是否健康：最近 max_silence_hours 小时内收到过推送。
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT last_delivery_at FROM webhook_health WHERE repo = ?", (repo,)
+            ).fetchone()
+        if row is None:
+            return False
+        now = now or datetime.now(timezone.utc)
+        return row[0] >= utc_timestamp(now - timedelta(hours=max_silence_hours))
+
+    def covers(self, repo, since):
+        """
+        判断三类数据的历史是否都已覆盖到 since（曾至少从 since 开始完整同步过一次）。
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT synced_from FROM sync_cursors WHERE repo = ?", (repo,)
+            ).fetchall()
+        synced = [row[0] for row in rows if row[0] is not None]
+        return len(synced) == len(RESOURCES) and max(synced) <= since
+
+    def query(self, repo, resource, since=None, until=None):
+        """
+        查询某个仓库某类数据在时间窗口内的记录，按时间倒序返回精简记录列表。
+        """
+        return list(self.iter_query(repo, resource, since, until))
+
+    def iter_query(self, repo, resource, since=None, until=None):
+        """
+        逐条产出时间窗口内的精简记录（按时间倒序），使用独立的只读连接，不阻塞同步写入。
+        """
+        sql = "SELECT data FROM items WHERE repo = ? AND resource = ?"
+        params = [repo, resource]
+        if since:
+            sql += " AND ts >= ?"
+            params.append(since)
+        if until:
+            sql += " AND ts < ?"
+            params.append(until)
+        sql += " ORDER BY ts DESC"
+        conn = sqlite3.connect(self.path)
+        try:
+            for row in conn.execute(sql, params):
+                yield RECORD_TYPES[resource].from_dict(json.loads(row[0]))
+        finally:
+            conn.close()
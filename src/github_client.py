@@ -1,25 +1,113 @@
 # src/github_client.py
 
-import requests  # 导入requests库用于HTTP请求
+import json  # 导入json模块用于解析缓存的响应体
 from datetime import datetime, date, timedelta  # 导入日期处理模块
 import os  # 导入os模块用于文件和目录操作
+import threading  # 导入threading模块用于限制并发请求数
+from concurrent.futures import ThreadPoolExecutor, as_completed  # 导入线程池用于并发获取数据
+from http_cache import HTTPCache  # 导入HTTP条件请求缓存
+from http_transport import get_transport  # 导入共享的HTTP传输层
+from event_store import EventStore, RESOURCES  # 导入本地事件存储，用于增量同步
+from github_records import CommitRecord, IssueRecord, PullRequestRecord, is_pull_request  # 导入精简记录类型
+from rate_limiter import RateLimitScheduler  # 导入限流感知的请求调度器
 from logger import LOG  # 导入日志模块
 
+PER_PAGE = 100  # GitHub REST API 单页允许的最大条目数
+
 class GitHubClient:
-    def __init__(self, token):
+    def __init__(self, token, max_concurrent_requests=8, cache=None, scheduler=None, store=None, transport=None,
+                 webhook_max_silence_hours=None):
         self.token = token  # GitHub API令牌
         self.headers = {'Authorization': f'token {self.token}'}  # 设置HTTP头部认证信息
+        self.max_concurrent_requests = max_concurrent_requests  # 同时在途的最大请求数
+        self.cache = cache  # 可选的 HTTPCache 实例，用于条件请求
+        self.scheduler = scheduler  # 可选的 RateLimitScheduler 实例，在令牌池中分配请求并处理限流
+        self.store = store  # 可选的 EventStore 实例，启用后按游标增量同步
+        self.http = transport or get_transport()  # 共享连接池与重试策略的HTTP传输层
+        self.webhook_max_silence_hours = webhook_max_silence_hours  # 启用 Webhook 时判断事件流是否健康的静默上限
+        self._request_slots = threading.BoundedSemaphore(max_concurrent_requests)  # 所有线程共享的请求配额
 
     def fetch_updates(self, repo, since=None, until=None):
-        # 获取指定仓库的更新，可以指定开始和结束日期
+        # 获取指定仓库的更新，可以指定开始和结束日期；三类数据并发获取
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            commits = executor.submit(self.fetch_commits, repo, since, until)  # 获取提交记录
+            issues = executor.submit(self.fetch_issues, repo, since, until)  # 获取问题
+            pull_requests = executor.submit(self.fetch_pull_requests, repo, since, until)  # 获取拉取请求
         updates = {
-            'commits': self.fetch_commits(repo, since, until),  # 获取提交记录
-            'issues': self.fetch_issues(repo, since, until),  # 获取问题
-            'pull_requests': self.fetch_pull_requests(repo, since, until)  # 获取拉取请求
+            'commits': commits.result(),
+            'issues': issues.result(),
+            'pull_requests': pull_requests.result()
         }
         return updates
 
-    def fetch_commits(self, repo, since=None, until=None):
+    def _get(self, url, params, headers=None):
+        # 发送GET请求
+        return self._send(lambda h: self.http.get(url, headers=h, params=params), headers)
+
+    def _send(self, request, headers=None):
+        """
+        发送一次请求：在途请求数受 max_concurrent_requests 限制；
+        启用调度器时由其选择令牌，被限流时等待配额恢复后重试，而不是把错误交给调用方。
+        :param request: 接收请求头字典并返回响应的可调用对象。
+        """
+        headers = headers or self.headers
+        if self.scheduler is None:
+            with self._request_slots:
+                return request(headers)
+
+        for _ in range(self.scheduler.max_retries + 1):
+            token = self.scheduler.acquire()
+            with self._request_slots:
+                response = request({**headers, 'Authorization': f'token {token}'})
+            if not self.scheduler.update(token, response):
+                break
+        return response
+
+    def rate_limit_metrics(self):
+        # 返回令牌池中每个令牌的剩余配额指标，未启用调度器时返回空字典
+        return self.scheduler.metrics() if self.scheduler else {}
+
+    def _fetch_page(self, url, params):
+        """
+        获取一页数据，返回 (记录列表, 下一页URL)。
+        启用缓存时携带 If-None-Match / If-Modified-Since，收到 304 则直接使用本地缓存的响应体。
+        """
+        cached = self.cache.get(url, params) if self.cache else None
+        headers = {**self.headers, **self.cache.validators(cached)} if cached else self.headers
+        response = self._get(url, params, headers)
+        if cached and response.status_code == 304:
+            LOG.debug(f"缓存命中（304）：{url}")
+            return json.loads(cached['body']), cached['link_next']
+
+        response.raise_for_status()  # 检查请求是否成功
+        page = response.json()
+        next_url = response.links.get('next', {}).get('url')
+        if self.cache:
+            self.cache.put(url, params, response.headers.get('ETag'), response.headers.get('Last-Modified'),
+                           response.text, next_url)
+        return page, next_url
+
+    def _paginate(self, repo, resource, url, params, strict=False):
+        """
+        按 Link: rel="next" 逐页请求 GitHub API（每页 PER_PAGE 条），边获取边产出记录。
+        请求失败时记录日志并结束迭代，已产出的记录保持有效；strict 为真时继续抛出异常。
+        """
+        params = {**params, 'per_page': PER_PAGE}
+        try:
+            while url:
+                page, next_url = self._fetch_page(url, params)
+                yield from page
+                if len(page) < PER_PAGE:
+                    break  # 不足一页说明已是最后一页，省去一次多余的请求
+                url, params = next_url, None  # next 链接中已包含全部查询参数
+        except Exception as e:
+            response = getattr(e, 'response', None)
+            LOG.error(f"从 {repo} 获取 {resource} 失败：{str(e)}")
+            LOG.error(f"响应详情：{response.text if response is not None else '无响应数据可用'}")
+            if strict:
+                raise
+
+    def iter_commits(self, repo, since=None, until=None, strict=False):
         LOG.debug(f"准备获取 {repo} 的 Commits")
         url = f'https://api.github.com/repos/{repo}/commits'  # 构建获取提交的API URL
         params = {}
@@ -27,46 +115,88 @@ class GitHubClient:
             params['since'] = since  # 如果指定了开始日期，添加到参数中
         if until:
             params['until'] = until  # 如果指定了结束日期，添加到参数中
+        return map(CommitRecord.from_api, self._paginate(repo, 'Commits', url, params, strict))
 
-        try:
-            response = requests.get(url, headers=self.headers, params=params, timeout=10)
-            response.raise_for_status()  # 检查请求是否成功
-            return response.json()  # 返回JSON格式的数据
-        except Exception as e:
-            LOG.error(f"从 {repo} 获取 Commits 失败：{str(e)}")
-            LOG.error(f"响应详情：{response.text if 'response' in locals() else '无响应数据可用'}")
-            return []  # Handle failure case
-
-    def fetch_issues(self, repo, since=None, until=None):
+    def iter_issues(self, repo, since=None, until=None, strict=False, state='closed'):
         LOG.debug(f"准备获取 {repo} 的 Issues。")
         url = f'https://api.github.com/repos/{repo}/issues'  # 构建获取问题的API URL
-        params = {'state': 'closed', 'since': since, 'until': until}
-        try:
-            response = requests.get(url, headers=self.headers, params=params, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except Exception as e:
-            LOG.error(f"从 {repo} 获取 Issues 失败：{str(e)}")
-            LOG.error(f"响应详情：{response.text if 'response' in locals() else '无响应数据可用'}")
-            return []
+        params = {'state': state, 'since': since, 'until': until}
+        # /issues 接口同时返回 Pull Request，这里丢弃它们，Pull Request 只从 /pulls 接口获取
+        return (IssueRecord.from_api(item) for item in self._paginate(repo, 'Issues', url, params, strict)
+                if not is_pull_request(item))
 
-    def fetch_pull_requests(self, repo, since=None, until=None):
+    def iter_pull_requests(self, repo, since=None, until=None, strict=False, state='closed'):
         LOG.debug(f"准备获取 {repo} 的 Pull Requests。")
         url = f'https://api.github.com/repos/{repo}/pulls'  # 构建获取拉取请求的API URL
-        params = {'state': 'closed', 'since': since, 'until': until}
-        try:
-            response = requests.get(url, headers=self.headers, params=params, timeout=10)
-            response.raise_for_status()  # 确保成功响应
-            return response.json()
-        except Exception as e:
-            LOG.error(f"从 {repo} 获取 Pull Requests 失败：{str(e)}")
-            LOG.error(f"响应详情：{response.text if 'response' in locals() else '无响应数据可用'}")
-            return []
+        # pulls 接口不支持 since 参数：按更新时间倒序获取，遇到早于 since 的记录即停止翻页
+        params = {'state': state, 'sort': 'updated', 'direction': 'desc'}
+        for pull_request in self._paginate(repo, 'Pull Requests', url, params, strict):
+            if since and pull_request.get('updated_at', '') < since:
+                break
+            yield PullRequestRecord.from_api(pull_request)
+
+    def fetch_commits(self, repo, since=None, until=None):
+        return list(self.iter_commits(repo, since, until))  # 获取全部分页的提交记录
+
+    def fetch_issues(self, repo, since=None, until=None):
+        return list(self.iter_issues(repo, since, until))  # 获取全部分页的问题
+
+    def fetch_pull_requests(self, repo, since=None, until=None):
+        return list(self.iter_pull_requests(repo, since, until))  # 获取全部分页的拉取请求
+
+    def sync_repo(self, repo, since):
+        """
+        增量同步仓库的三类数据到本地存储：每类数据只获取其游标之后的增量，三类数据并发获取。
+        Issue / Pull Request 获取全部状态，由存储删除此后被重新打开的记录。
+        某类数据同步失败时不推进其游标，下次同步会重新获取。
+        """
+        iterators = {'commits': self.iter_commits,
+                     'issues': lambda repo, **kwargs: self.iter_issues(repo, state='all', **kwargs),
+                     'pull_requests': lambda repo, **kwargs: self.iter_pull_requests(repo, state='all', **kwargs)}
+
+        def sync_resource(resource):
+            fetch_since = self.store.delta_since(repo, resource, since)
+            try:
+                items = list(iterators[resource](repo, since=fetch_since, strict=True))
+            except Exception:
+                return  # 错误已在 _paginate 中记录
+            self.store.merge(repo, resource, items, fetch_since)
+
+        with ThreadPoolExecutor(max_workers=len(RESOURCES)) as executor:
+            list(executor.map(sync_resource, RESOURCES))
+
+    def needs_polling(self, repo, since):
+        """
+        判断仓库是否需要 REST 轮询：Webhook 事件流健康且本地存储已覆盖 since 时，直接使用推送写入的数据。
+        """
+        if self.store is None or self.webhook_max_silence_hours is None:
+            return True
+        if self.store.webhook_healthy(repo, self.webhook_max_silence_hours) and self.store.covers(repo, since):
+            LOG.debug(f"[{repo}] Webhook 事件流健康，跳过 REST 轮询")
+            return False
+        return True
+
+    def _iter_window_issues(self, repo, since, until=None):
+        # 获取时间窗口内关闭的问题：启用本地存储时先增量同步再从存储查询，否则直接流式获取
+        if self.store is None:
+            return self.iter_issues(repo, since=since, until=until)
+        if self.needs_polling(repo, since):
+            self.sync_repo(repo, since)
+        return self.store.iter_query(repo, 'issues', since)
+
+    def render_progress_by_date_range(self, repo, days):
+        """
+        仅根据本地存储渲染最近 days 天的进展文件，不发起任何网络请求。
+        """
+        if self.store is None:
+            raise ValueError("未启用本地事件存储，无法离线渲染进展文件")
+        today = date.today()  # 获取当前日期
+        since = today - timedelta(days=days)  # 计算开始日期
+        return self._write_progress_file(repo, since, today, days, self.store.iter_query(repo, 'issues', since.isoformat()))
 
     def export_daily_progress(self, repo):
         LOG.debug(f"[准备导出项目进度]：{repo}")
         today = datetime.now().date().isoformat()  # 获取今天的日期
-        updates = self.fetch_updates(repo, since=today)  # 获取今天的更新数据
         
         repo_dir = os.path.join('daily_progress', repo.replace("/", "_"))  # 构建存储路径
         os.makedirs(repo_dir, exist_ok=True)  # 确保目录存在
@@ -75,8 +205,8 @@ class GitHubClient:
         with open(file_path, 'w') as file:
             file.write(f"# Daily Progress for {repo} ({today})\n\n")
             file.write("\n## Issues Closed Today\n")
-            for issue in updates['issues']:  # 写入今天关闭的问题
-                file.write(f"- {issue['title']} #{issue['number']}\n")
+            for issue in self._iter_window_issues(repo, today):  # 边获取边写入今天关闭的问题
+                file.write(self._issue_line(issue))
         
         LOG.info(f"[{repo}]项目每日进展文件生成： {file_path}")  # 记录日志
         return file_path
@@ -84,9 +214,17 @@ class GitHubClient:
     def export_progress_by_date_range(self, repo, days):
         today = date.today()  # 获取当前日期
         since = today - timedelta(days=days)  # 计算开始日期
-        
-        updates = self.fetch_updates(repo, since=since.isoformat(), until=today.isoformat())  # 获取指定日期范围内的更新
-        
+        # 边获取边写入在指定日期内关闭的问题，不在内存中累积所有分页
+        issues = self._iter_window_issues(repo, since.isoformat(), today.isoformat())
+        return self._write_progress_file(repo, since, today, days, issues)
+
+    @staticmethod
+    def _issue_line(issue):
+        # 问题条目：标题、编号和标签（标签供生成报告前按类别合并条目）
+        labels = issue.get('labels')
+        return f"- {issue['title']} #{issue['number']}" + (f" [{', '.join(labels)}]" if labels else "") + "\n"
+
+    def _write_progress_file(self, repo, since, today, days, issues):
         repo_dir = os.path.join('daily_progress', repo.replace("/", "_"))  # 构建目录路径
         os.makedirs(repo_dir, exist_ok=True)  # 确保目录存在
         
@@ -97,8 +235,57 @@ class GitHubClient:
         with open(file_path, 'w') as file:
             file.write(f"# Progress for {repo} ({since} to {today})\n\n")
             file.write(f"\n## Issues Closed in the Last {days} Days\n")
-            for issue in updates['issues']:  # 写入在指定日期内关闭的问题
-                file.write(f"- {issue['title']} #{issue['number']}\n")
+            for issue in issues:  # 写入在指定日期内关闭的问题
+                file.write(self._issue_line(issue))
         
         LOG.info(f"[{repo}]项目最新进展文件生成： {file_path}")  # 记录日志
         return file_path
+
+    def export_progress_for_repos(self, repos, days):
+        """
+        并发导出多个仓库的最新进展，按完成顺序逐个产出 (repo, file_path)。
+        单个仓库导出失败只记录日志，不影响其他仓库。
+        """
+        with ThreadPoolExecutor(max_workers=self.max_concurrent_requests) as executor:
+            futures = {executor.submit(self.export_progress_by_date_range, repo, days): repo for repo in repos}
+            for future in as_completed(futures):
+                repo = futures[future]
+                try:
+                    yield repo, future.result()
+                except Exception as e:
+                    LOG.error(f"[{repo}]项目进展导出失败：{str(e)}")
+
+
+def create_github_client(config):
+    """
+    根据配置创建 GitHubClient 实例，供守护进程、命令行工具和 Gradio 服务共用。
+    """
+    cache = None
+    if config.github_cache.get('enabled', False):
+        cache = HTTPCache(config.github_cache.get('path', 'cache/github_http_cache.db'),
+                          config.github_cache.get('max_size_mb', 64))
+    rate_limit = config.github_rate_limit
+    scheduler = None
+    if any(config.github_tokens):
+        scheduler = RateLimitScheduler(config.github_tokens,
+                                       rate_limit.get('requests_per_second', 10),
+                                       rate_limit.get('burst'),
+                                       rate_limit.get('max_retries', 3))
+    else:
+        LOG.warning("未配置 GitHub 令牌，以匿名方式请求 GitHub API，不启用令牌池调度。")
+    store = None
+    if config.github_store.get('enabled', False):
+        store = EventStore(config.github_store.get('path', 'data/github_events.db'))
+    webhook_max_silence_hours = None
+    if config.github_webhook.get('enabled', False):
+        webhook_max_silence_hours = config.github_webhook.get('max_silence_hours', 24)
+    if config.github_backend == 'graphql':
+        from github_graphql_client import GitHubGraphQLClient  # 延迟导入，避免与子类模块循环导入
+        return GitHubGraphQLClient(config.github_token, config.github_max_concurrent_requests,
+                                   cache=cache, scheduler=scheduler, store=store,
+                                   webhook_max_silence_hours=webhook_max_silence_hours,
+                                   batch_size=config.github_graphql.get('batch_size', 20),
+                                   page_size=config.github_graphql.get('page_size', 100))
+    return GitHubClient(config.github_token, config.github_max_concurrent_requests,
+                        cache=cache, scheduler=scheduler, store=store,
+                        webhook_max_silence_hours=webhook_max_silence_hours)
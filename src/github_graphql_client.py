@@ -0,0 +1,319 @@
+# src/github_graphql_client.py
+
+import json  # 导入json模块用于在查询中安全地嵌入字符串
+from datetime import date, timedelta  # 导入日期处理模块
+from concurrent.futures import ThreadPoolExecutor, as_completed  # 导入线程池用于并发发送批量查询
+from github_client import GitHubClient  # 导入REST客户端作为基类
+from event_store import RESOURCES  # 导入同步的数据类型列表
+from github_records import CommitRecord, IssueRecord, PullRequestRecord  # 导入精简记录类型
+from logger import LOG  # 导入日志模块
+
+GRAPHQL_URL = 'https://api.github.com/graphql'  # GitHub GraphQL API 地址
+MAX_NODES = 500000  # GitHub 单个 GraphQL 查询允许的最大节点数
+MAX_LABELS = 10  # 每个 Issue / PR 获取的标签数，与查询中的 labels(first: 10) 一致
+
+# 每个仓库在查询中的片段：Issues、Pull Requests（默认只取关闭/合并的）以及默认分支的提交历史。
+# 时间窗口直接写入片段，批次中的每个仓库可以从各自的增量起点获取。
+REPO_FRAGMENT = '''
+  {alias}: repository(owner: {owner}, name: {name}) {{
+    issues(first: {page_size}, states: {issue_states}, filterBy: {{since: {since}}}, orderBy: {{field: UPDATED_AT, direction: DESC}}) {{
+      pageInfo {{ hasNextPage endCursor }}
+      nodes {{ number title state updatedAt closedAt url labels(first: 10) {{ nodes {{ name }} }} }}
+    }}
+    pullRequests(first: {page_size}, states: {pull_request_states}, orderBy: {{field: UPDATED_AT, direction: DESC}}) {{
+      pageInfo {{ hasNextPage endCursor }}
+      nodes {{ number title state updatedAt closedAt mergedAt url labels(first: 10) {{ nodes {{ name }} }} }}
+    }}
+    defaultBranchRef {{
+      target {{
+        ... on Commit {{
+          history(first: {page_size}, since: {history_since}, until: {history_until}) {{
+            pageInfo {{ hasNextPage endCursor }}
+            nodes {{ oid message url committedDate author {{ name }} }}
+          }}
+        }}
+      }}
+    }}
+  }}'''
+
+QUERY_HEADER = 'query {'
+
+# 获取的 Issue / Pull Request 状态：导出窗口只需要关闭的；增量同步需要全部状态，
+# 以便从本地存储中删除之后又被重新打开的记录
+CLOSED_STATES = {'issues': ['CLOSED'], 'pullRequests': ['CLOSED', 'MERGED']}
+ALL_STATES = {'issues': ['OPEN', 'CLOSED'], 'pullRequests': ['OPEN', 'CLOSED', 'MERGED']}
+
+# 单个仓库单个连接的翻页查询，用于补齐批量查询中 hasNextPage 为真的部分。
+# GraphQL 不允许声明未使用的变量，因此每个查询只声明自己用到的变量。
+PAGE_QUERIES = {
+    'issues': '''query($owner: String!, $name: String!, $pageSize: Int!, $after: String, $since: DateTime, $states: [IssueState!]) {
+  repository(owner: $owner, name: $name) {
+    issues(first: $pageSize, after: $after, states: $states, filterBy: {since: $since}, orderBy: {field: UPDATED_AT, direction: DESC}) {
+      pageInfo { hasNextPage endCursor }
+      nodes { number title state updatedAt closedAt url labels(first: 10) { nodes { name } } }
+    }
+  }
+}''',
+    'pullRequests': '''query($owner: String!, $name: String!, $pageSize: Int!, $after: String, $states: [PullRequestState!]) {
+  repository(owner: $owner, name: $name) {
+    pullRequests(first: $pageSize, after: $after, states: $states, orderBy: {field: UPDATED_AT, direction: DESC}) {
+      pageInfo { hasNextPage endCursor }
+      nodes { number title state updatedAt closedAt mergedAt url labels(first: 10) { nodes { name } } }
+    }
+  }
+}''',
+    'history': '''query($owner: String!, $name: String!, $pageSize: Int!, $after: String, $historySince: GitTimestamp, $historyUntil: GitTimestamp) {
+  repository(owner: $owner, name: $name) {
+    defaultBranchRef {
+      target {
+        ... on Commit {
+          history(first: $pageSize, after: $after, since: $historySince, until: $historyUntil) {
+            pageInfo { hasNextPage endCursor }
+            nodes { oid message url committedDate author { name } }
+          }
+        }
+      }
+    }
+  }
+}''',
+}
+PAGE_VARIABLES = {'issues': ['since'], 'pullRequests': [], 'history': ['historySince', 'historyUntil']}
+
+
+class GitHubGraphQLClient(GitHubClient):
+    """
+    基于 GitHub GraphQL API 的客户端：把多个仓库打包进一个带别名的查询，
+    一次往返即可取回多个仓库的 Commits、Issues 和 Pull Requests。
+    返回的数据结构与 REST 客户端一致（{'commits', 'issues', 'pull_requests'}）。
+    """
+    def __init__(self, token, max_concurrent_requests=8, cache=None, scheduler=None, store=None, transport=None,
+                 webhook_max_silence_hours=None, batch_size=20, page_size=100):
+        super().__init__(token, max_concurrent_requests, cache=cache, scheduler=scheduler, store=store,
+                         transport=transport, webhook_max_silence_hours=webhook_max_silence_hours)
+        self.page_size = page_size  # 每个连接单页获取的节点数（最大 100）
+        # 每个仓库最多消耗 page_size 个提交加上 Issues、PR 各 page_size 个（每个带最多 10 个标签）节点，批量大小不能超过节点上限
+        self.batch_size = max(1, min(batch_size, MAX_NODES // ((1 + 2 * (1 + MAX_LABELS)) * page_size)))
+
+    def fetch_updates(self, repo, since=None, until=None):
+        return self.fetch_updates_batch([repo], since, until)[repo]
+
+    def fetch_updates_batch(self, repos, since=None, until=None):
+        """
+        分批获取多个仓库的更新，每批一个 GraphQL 查询，批次之间并发执行。
+        获取失败的仓库得到空列表。
+        :return: {repo: {'commits': [...], 'issues': [...], 'pull_requests': [...]}}
+        """
+        results = {repo: {resource: [] for resource in RESOURCES} for repo in repos}
+        for _, batch_results in self._iter_batches(repos, lambda batch: self._fetch_batch(batch, since, until)):
+            results.update(batch_results)
+        return results
+
+    def sync_repo(self, repo, since):
+        self._sync_batch([repo], since)
+
+    def sync_repos(self, repos, since):
+        # 按批次增量同步多个仓库到本地存储
+        for _ in self._iter_batches(repos, lambda batch: self._sync_batch(batch, since)):
+            pass
+
+    def _sync_batch(self, repos, since):
+        """
+        增量同步一批仓库：整批共用一次查询，每个仓库的每类数据从各自的增量起点获取，
+        新加入或长期未同步的仓库不会让同批其他仓库重新完整获取。获取失败的仓库不推进游标。
+        """
+        windows = {repo: {resource: self.store.delta_since(repo, resource, since) for resource in RESOURCES}
+                   for repo in repos}
+        results = self._fetch_batch(repos, windows, None, ALL_STATES)
+        for repo, updates in results.items():
+            for resource in RESOURCES:
+                self.store.merge(repo, resource, updates[resource], windows[repo][resource])
+        return results
+
+    def _iter_batches(self, repos, fetch):
+        # 按 batch_size 切分仓库列表并发执行 fetch，按完成顺序产出 (该批仓库, 该批结果)
+        batches = [repos[i:i + self.batch_size] for i in range(0, len(repos), self.batch_size)]
+        with ThreadPoolExecutor(max_workers=self.max_concurrent_requests) as executor:
+            futures = {executor.submit(fetch, batch): batch for batch in batches}
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+
+    def _iter_window_issues(self, repo, since, until=None):
+        if self.store is None:
+            return self.fetch_updates(repo, since, until)['issues']
+        return super()._iter_window_issues(repo, since, until)
+
+    def export_progress_for_repos(self, repos, days):
+        """
+        按批次获取所有仓库的更新，每批完成后立即写出该批仓库的进展文件并逐个产出 (repo, file_path)。
+        Webhook 事件流健康的仓库不参与批量查询，直接从本地存储渲染。
+        """
+        today = date.today()
+        since = today - timedelta(days=days)
+        window_since = since.isoformat()
+        if self.store is None:
+            fetch = lambda batch: self._fetch_batch(batch, window_since, today.isoformat())
+        else:
+            fetch = lambda batch: self._sync_batch(batch, window_since)
+
+        polled = []
+        for repo in repos:
+            if self.needs_polling(repo, window_since):
+                polled.append(repo)
+                continue
+            try:
+                yield repo, self.render_progress_by_date_range(repo, days)
+            except Exception as e:
+                LOG.error(f"[{repo}]项目进展导出失败：{str(e)}")
+
+        for batch, batch_results in self._iter_batches(polled, fetch):
+            for repo in batch:
+                try:
+                    self._split_repo(repo)  # 名称不合法的订阅没有参与查询，作为导出失败报告
+                    if self.store is None:
+                        issues = batch_results.get(repo, {}).get('issues', [])
+                    else:
+                        issues = self.store.iter_query(repo, 'issues', window_since)  # 与历史记录合并后的窗口数据
+                    yield repo, self._write_progress_file(repo, since, today, days, issues)
+                except Exception as e:
+                    LOG.error(f"[{repo}]项目进展导出失败：{str(e)}")
+
+    def _fetch_batch(self, repos, since, until, states=CLOSED_STATES):
+        """
+        用一个带别名的查询获取一批仓库，再为仍有下一页的连接补充翻页查询。
+        单个仓库出错（如仓库不存在）只影响该仓库，返回结果中不包含获取失败的仓库。
+        :param since: 所有仓库共用的起始时间，或 {repo: {resource: 起始时间}}（增量同步时每个仓库各不相同）。
+        :param states: 获取的 Issue / Pull Request 状态，CLOSED_STATES 或 ALL_STATES。
+        """
+        LOG.debug(f"准备通过 GraphQL 获取 {len(repos)} 个仓库的更新：{repos}")
+        results = {}
+        fragments = []
+        valid = []  # 名称合法、参与本次查询的仓库，下标即查询中的别名序号
+        for repo in repos:
+            try:
+                owner, name = self._split_repo(repo)
+            except ValueError as e:
+                LOG.error(f"从 {repo} 获取更新失败：{str(e)}")
+                continue
+            window = self._window(since, repo)
+            fragments.append(REPO_FRAGMENT.format(
+                alias=f'r{len(valid)}', owner=json.dumps(owner), name=json.dumps(name), page_size=self.page_size,
+                since=json.dumps(self._timestamp(window['issues'])),
+                history_since=json.dumps(self._timestamp(window['commits'])),
+                history_until=json.dumps(self._timestamp(until)),
+                issue_states=self._states_literal(states['issues']),
+                pull_request_states=self._states_literal(states['pullRequests'])))
+            valid.append(repo)
+        if not valid:
+            return results
+        query = QUERY_HEADER + ''.join(fragments) + '\n}'
+
+        try:
+            data = self._query(query, {})
+        except Exception as e:
+            LOG.error(f"GraphQL 批量获取失败：{str(e)}")
+            return results
+
+        for index, repo in enumerate(valid):
+            repository = data.get(f'r{index}')
+            if repository is None:
+                LOG.error(f"从 {repo} 获取更新失败：仓库不存在或无访问权限")
+                continue
+            try:
+                results[repo] = self._collect_repository(repo, repository, self._window(since, repo), until, states)
+            except Exception as e:
+                LOG.error(f"从 {repo} 获取更新失败：{str(e)}")
+        return results
+
+    def _collect_repository(self, repo, repository, window, until, states=CLOSED_STATES):
+        # 把查询结果转换为与 REST 接口一致的结构，并按各类数据的起始时间补齐剩余分页
+        issues = self._drain(repo, 'issues', repository['issues'], window['issues'], until, states)
+        pull_requests = self._drain(repo, 'pullRequests', repository['pullRequests'], window['pull_requests'], until,
+                                    states)
+        target = (repository.get('defaultBranchRef') or {}).get('target') or {}
+        history = (self._drain(repo, 'history', target['history'], window['commits'], until)
+                   if 'history' in target else [])
+        return {
+            'commits': [self._commit_from_node(node) for node in history],
+            'issues': [self._issue_from_node(IssueRecord, node) for node in issues],
+            'pull_requests': [self._issue_from_node(PullRequestRecord, node) for node in pull_requests
+                              if not window['pull_requests'] or node['updatedAt'] >= window['pull_requests']],
+        }
+
+    def _drain(self, repo, connection_name, connection, since, until, states=CLOSED_STATES):
+        # 沿 endCursor 继续获取某个连接的剩余分页
+        nodes = list(connection['nodes'])
+        page_info = connection['pageInfo']
+        while page_info['hasNextPage']:
+            if connection_name == 'pullRequests' and since and nodes and nodes[-1]['updatedAt'] < since:
+                break  # Pull Requests 按更新时间倒序，已越过 since 无需继续翻页
+            owner, name = self._split_repo(repo)
+            window = self._variables(since, until)
+            variables = {'owner': owner, 'name': name, 'pageSize': self.page_size, 'after': page_info['endCursor'],
+                         **{key: window[key] for key in PAGE_VARIABLES[connection_name]}}
+            if connection_name in states:
+                variables['states'] = states[connection_name]
+            repository = self._query(PAGE_QUERIES[connection_name], variables)['repository']
+            if connection_name == 'history':
+                connection = repository['defaultBranchRef']['target']['history']
+            else:
+                connection = repository[connection_name]
+            nodes.extend(connection['nodes'])
+            page_info = connection['pageInfo']
+        return nodes
+
+    def _query(self, query, variables):
+        # 发送 GraphQL 请求；部分错误（如单个仓库不存在）仍会返回其余数据
+        response = self._send(lambda h: self.http.post(GRAPHQL_URL, headers=h,
+                                                       json={'query': query, 'variables': variables}))
+        response.raise_for_status()
+        payload = response.json()
+        for error in payload.get('errors', []):
+            LOG.warning(f"GraphQL 查询返回错误：{error.get('message')}")
+        if payload.get('data') is None:
+            raise ValueError("GraphQL 响应中没有数据")
+        return payload['data']
+
+    @staticmethod
+    def _split_repo(repo):
+        # 把 "owner/name" 拆分为 (owner, name)，格式不对时抛出 ValueError
+        owner, _, name = repo.partition('/')
+        if not owner or not name or '/' in name:
+            raise ValueError(f"仓库名称格式应为 owner/name：{repo!r}")
+        return owner, name
+
+    @staticmethod
+    def _window(since, repo):
+        # 某个仓库各类数据的起始时间：{resource: since}
+        if isinstance(since, dict):
+            return since[repo]
+        return {resource: since for resource in RESOURCES}
+
+    @staticmethod
+    def _timestamp(value):
+        # GraphQL 的 DateTime / GitTimestamp 需要完整的 ISO-8601 时间
+        return f"{value}T00:00:00Z" if value and len(value) == 10 else value
+
+    @staticmethod
+    def _states_literal(states):
+        # 把状态列表写成 GraphQL 枚举列表字面量，如 [CLOSED, MERGED]
+        return '[' + ', '.join(states) + ']'
+
+    @classmethod
+    def _variables(cls, since, until):
+        return {'since': cls._timestamp(since), 'historySince': cls._timestamp(since),
+                'historyUntil': cls._timestamp(until)}
+
+    @staticmethod
+    def _issue_from_node(record_type, node):
+        fields = dict(number=node['number'], title=node['title'], state=node['state'].lower(),
+                      labels=[label['name'] for label in (node.get('labels') or {}).get('nodes', [])],
+                      updated_at=node['updatedAt'], closed_at=node['closedAt'], html_url=node['url'])
+        if record_type is PullRequestRecord:
+            fields['merged_at'] = node.get('mergedAt')
+        return record_type(**fields)
+
+    @staticmethod
+    def _commit_from_node(node):
+        author = node.get('author') or {}
+        return CommitRecord(sha=node['oid'], message=node['message'], author=author.get('name'),
+                            date=node['committedDate'], html_url=node['url'])
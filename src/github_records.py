@@ -0,0 +1,85 @@
+_FIELDS = {}  # 每个记录类型的字段列表缓存
+
+
+class Record:
+    """
+    精简记录的基类：使用 __slots__ 只保存报告需要的字段，避免在内存中保留完整的 API 响应。
+    支持 record['field'] / record.get('field') 的字典式访问，兼容原先直接使用 JSON 字典的代码。
+    """
+    __slots__ = ()
+
+    def __init__(self, **fields):
+        for name in self._fields():
+            setattr(self, name, fields.get(name))
+
+    @classmethod
+    def _fields(cls):
+        # 汇总继承链上所有 __slots__ 字段
+        if cls not in _FIELDS:
+            _FIELDS[cls] = tuple(name for klass in reversed(cls.__mro__) for name in getattr(klass, '__slots__', ()))
+        return _FIELDS[cls]
+
+    def __getitem__(self, key):
+        if key not in self._fields():
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        value = getattr(self, key, None) if key in self._fields() else None
+        return default if value is None else value
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self._fields()}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()})"
+
+
+class CommitRecord(Record):
+    __slots__ = ('sha', 'message', 'author', 'date', 'html_url')
+
+    @classmethod
+    def from_api(cls, item):
+        # 从 REST 接口的提交对象中投影出所需字段
+        commit = item.get('commit') or {}
+        signature = commit.get('committer') or commit.get('author') or {}
+        return cls(sha=item.get('sha'), message=commit.get('message'),
+                   author=(commit.get('author') or {}).get('name'), date=signature.get('date'),
+                   html_url=item.get('html_url'))
+
+
+class IssueRecord(Record):
+    __slots__ = ('number', 'title', 'state', 'labels', 'updated_at', 'closed_at', 'html_url')
+
+    @classmethod
+    def from_api(cls, item):
+        # 从 REST 接口的 Issue 对象中投影出所需字段，标签只保留名称
+        return cls(number=item.get('number'), title=item.get('title'), state=item.get('state'),
+                   labels=[label['name'] for label in item.get('labels') or []],
+                   updated_at=item.get('updated_at'), closed_at=item.get('closed_at'),
+                   html_url=item.get('html_url'))
+
+
+class PullRequestRecord(IssueRecord):
+    __slots__ = ('merged_at',)
+
+    @classmethod
+    def from_api(cls, item):
+        record = super().from_api(item)
+        record.merged_at = item.get('merged_at')
+        return record
+
+
+RECORD_TYPES = {'commits': CommitRecord, 'issues': IssueRecord, 'pull_requests': PullRequestRecord}
+
+
+def is_pull_request(item):
+    # GitHub 的 /issues 接口同样会返回 Pull Request，它们带有 pull_request 字段
+    return 'pull_request' in item
@@ -1,8 +1,9 @@
 import gradio as gr  # 导入gradio库用于创建GUI
 
 from config import Config  # 导入配置管理模块
-from github_client import GitHubClient  # 导入用于GitHub API操作的客户端
-from hacker_news_client import HackerNewsClient
+from http_transport import init_transport  # 导入共享HTTP传输层的初始化函数
+from github_client import create_github_client  # 导入用于GitHub API操作的客户端
+from hacker_news_client import create_hacker_news_client  # 导入Hacker News客户端工厂函数
 from report_generator import ReportGenerator  # 导入报告生成器模块
 from llm import LLM  # 导入可能用于处理语言模型的LLM类
 from subscription_manager import SubscriptionManager  # 导入订阅管理器
@@ -10,8 +11,9 @@ from logger import LOG  # 导入日志记录器
 
 # 创建各个组件的实例
 config = Config()
-github_client = GitHubClient(config.github_token)
-hacker_news_client = HackerNewsClient() # 创建 Hacker News 客户端实例
+init_transport(config.http)  # 初始化所有网络客户端共享的连接池
+github_client = create_github_client(config)
+hacker_news_client = create_hacker_news_client(config) # 创建 Hacker News 客户端实例
 subscription_manager = SubscriptionManager(config.subscriptions_file)
 
 def generate_github_report(model_type, model_name, repo, days):
@@ -23,13 +25,12 @@ def generate_github_report(model_type, model_name, repo, days):
         config.ollama_model_name = model_name
 
     llm = LLM(config)  # 创建语言模型实例
-    report_generator = ReportGenerator(llm, config.report_types)  # 创建报告生成器实例
+    report_generator = ReportGenerator(llm, config.report_types, compaction=config.report_compaction)  # 创建报告生成器实例
 
     # 定义一个函数，用于导出和生成指定时间范围内项目的进展报告
     raw_file_path = github_client.export_progress_by_date_range(repo, days)  # 导出原始数据文件路径
-    report, report_file_path = report_generator.generate_github_report(raw_file_path)  # 生成并获取报告内容及文件路径
-
-    return report, report_file_path  # 返回报告内容和报告文件路径
+    # 流式生成报告：Markdown 随模型输出逐步渲染，生成完成后再提供文件下载
+    yield from stream_report(report_generator.stream_github_report(raw_file_path))
 
 def generate_hn_hour_topic(model_type, model_name):
     config.llm_model_type = model_type
@@ -40,12 +41,18 @@ def generate_hn_hour_topic(model_type, model_name):
         config.ollama_model_name = model_name
 
     llm = LLM(config)  # 创建语言模型实例
-    report_generator = ReportGenerator(llm, config.report_types)  # 创建报告生成器实例
+    report_generator = ReportGenerator(llm, config.report_types, compaction=config.report_compaction)  # 创建报告生成器实例
 
     markdown_file_path = hacker_news_client.export_top_stories()
-    report, report_file_path = report_generator.generate_hn_topic_report(markdown_file_path)
+    yield from stream_report(report_generator.stream_hn_topic_report(markdown_file_path))
+
 
-    return report, report_file_path  # 返回报告内容和报告文件路径
+def stream_report(updates):
+    # 逐段产出 (报告内容, 文件)，生成过程中文件输出保持为空，完成后返回报告文件路径
+    report, report_file_path = "", None
+    for report, report_file_path in updates:
+        yield report, None
+    yield report, report_file_path
 
 
 # 定义一个回调函数，用于根据 Radio 组件的选择返回不同的 Dropdown 选项
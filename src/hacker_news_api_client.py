@@ -0,0 +1,58 @@
+from concurrent.futures import ThreadPoolExecutor  # 导入线程池用于并发获取新闻条目
+from datetime import datetime, timezone  # 导入日期处理模块，用于转换发布时间
+from hacker_news_client import HackerNewsClient  # 导入基于 HTML 抓取的客户端作为基类
+from logger import LOG  # 导入日志模块
+
+ITEM_URL = 'https://news.ycombinator.com/item?id={}'  # 没有外部链接的帖子（如 Ask HN）指向讨论页
+
+
+class HackerNewsAPIClient(HackerNewsClient):
+    """
+    基于 Hacker News 官方 Firebase API 的客户端：先读取 topstories 的 ID 列表，
+    再用有界线程池并发获取各条目，除标题和链接外还返回分数、评论数、作者和发布时间。
+    返回结构与 HTML 抓取一致，可直接用于导出热门新闻。
+    """
+    def __init__(self, transport=None, api_url='https://hacker-news.firebaseio.com/v0/',
+                 max_stories=30, max_concurrent_requests=16, index=None, extractor=None):
+        super().__init__(transport, index=index, extractor=extractor)
+        self.api_url = api_url.rstrip('/') + '/'  # Firebase API 根地址
+        self.max_stories = max_stories  # 获取的热门新闻条数，与首页一致默认 30 条
+        self.max_concurrent_requests = max_concurrent_requests  # 同时在途的最大条目请求数
+
+    def fetch_top_stories(self):
+        LOG.debug("准备通过 API 获取Hacker News的热门新闻。")
+        try:
+            response = self.http.get(f'{self.api_url}topstories.json')
+            response.raise_for_status()  # 检查请求是否成功
+            story_ids = response.json()[:self.max_stories]
+        except Exception as e:
+            LOG.error(f"获取Hacker News的热门新闻列表失败：{str(e)}")
+            return []
+
+        # executor.map 按提交顺序返回结果，保持首页排名顺序
+        with ThreadPoolExecutor(max_workers=self.max_concurrent_requests) as executor:
+            top_stories = [story for story in executor.map(self._fetch_story, story_ids) if story]
+        LOG.info(f"成功获取 {len(top_stories)} 条Hacker News新闻。")
+        return top_stories
+
+    def _fetch_story(self, story_id):
+        # 获取单条新闻，已删除、已失效或获取失败的条目返回 None
+        try:
+            response = self.http.get(f'{self.api_url}item/{story_id}.json')
+            response.raise_for_status()
+            item = response.json()
+        except Exception as e:
+            LOG.warning(f"获取Hacker News条目 {story_id} 失败：{str(e)}")
+            return None
+        if not item or item.get('deleted') or item.get('dead'):
+            return None
+        return {
+            'id': story_id,
+            'title': item.get('title'),
+            'link': item.get('url') or ITEM_URL.format(story_id),
+            'score': item.get('score', 0),
+            'comments': item.get('descendants', 0),
+            'author': item.get('by'),
+            'time': datetime.fromtimestamp(item['time'], timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+                    if item.get('time') else None,
+        }
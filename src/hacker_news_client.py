@@ -1,37 +1,103 @@
-import requests  # 导入requests库用于HTTP请求
-from bs4 import BeautifulSoup  # 导入BeautifulSoup库用于解析HTML内容
 from datetime import datetime  # 导入datetime模块用于获取日期和时间
 import os  # 导入os模块用于文件和目录操作
+import threading  # 导入threading模块用于限制每个主机的并发请求数
+from concurrent.futures import ThreadPoolExecutor  # 导入线程池用于并发抓取多个列表页
+from urllib.parse import urlparse  # 导入urlparse用于按主机区分限速
+from http_transport import get_transport  # 导入共享的HTTP传输层
+from hn_parser import get_parser, parse_stories  # 导入可插拔的HTML解析后端
+from article_extractor import ArticleCache, ArticleExtractor  # 导入文章正文提取器
+from rate_limiter import TokenBucket  # 导入令牌桶，用于控制对同一主机的请求节奏
+from story_index import StoryIndex, story_key  # 导入新闻索引，用于按增量保存快照
 from logger import LOG  # 导入日志模块
 
+PAGINATED_LISTS = ('news', 'best')  # 支持 ?p= 翻页的列表；newest 按条目 ID 游标翻页，只抓取第一页
+
+
 class HackerNewsClient:
-    def __init__(self):
+    def __init__(self, transport=None, parser='auto', index=None, pages=1, lists=('news',),
+                 max_concurrent_per_host=2, requests_per_second=1, extractor=None):
         self.url = 'https://news.ycombinator.com/'  # Hacker News的URL
+        self.http = transport or get_transport()  # 共享连接池与重试策略的HTTP传输层
+        self.parser = get_parser(parser)  # HTML解析后端：selectolax、lxml 或 soup，auto 时选择已安装的最快后端
+        self.index = index  # 可选的 StoryIndex 实例，启用后每小时的快照按新出现/仍在榜分组并注明排名变化
+        self.pages = pages  # 抓取深度：news（和 best）列表抓取前 pages 页
+        self.lists = lists  # 抓取的列表，按合并时的优先顺序排列：news、best、newest
+        self.max_concurrent_per_host = max_concurrent_per_host  # 对同一主机同时在途的最大请求数
+        self.requests_per_second = requests_per_second  # 对同一主机每秒最多发起的请求数
+        self.extractor = extractor  # 可选的 ArticleExtractor 实例，导出时为新闻补充链接文章的正文摘录
+        self._hosts = {}  # 每个主机的 (并发信号量, 令牌桶)
+        self._hosts_lock = threading.Lock()
 
     def fetch_top_stories(self):
         LOG.debug("准备获取Hacker News的热门新闻。")
+        page_urls = self.page_urls()
+        if len(page_urls) == 1:
+            try:
+                return self._fetch_page(page_urls[0])
+            except Exception as e:
+                LOG.error(f"获取Hacker News的热门新闻失败：{str(e)}")
+                return []
+
+        # 并发抓取所有列表页，executor.map 按提交顺序返回，合并时保持列表和页码顺序
+        with ThreadPoolExecutor(max_workers=self.max_concurrent_per_host) as executor:
+            pages = list(executor.map(self._fetch_page_or_empty, page_urls))
+        top_stories = self.merge_pages(pages)
+        LOG.info(f"抓取 {len(page_urls)} 个列表页，合并得到 {len(top_stories)} 条Hacker News新闻。")
+        return top_stories
+
+    def page_urls(self):
+        # 按合并优先顺序列出需要抓取的列表页，首页沿用 self.url
+        urls = []
+        for name in self.lists:
+            depth = self.pages if name in PAGINATED_LISTS else 1
+            for page in range(1, depth + 1):
+                if name == 'news' and page == 1:
+                    urls.append(self.url)
+                else:
+                    urls.append(f"{self.url}{name}" + (f"?p={page}" if page > 1 else ""))
+        return urls
+
+    @staticmethod
+    def merge_pages(pages):
+        # 按列表和页码顺序合并为一个排名流，同一新闻只保留排名最靠前的一次
+        seen = set()
+        merged = []
+        for stories in pages:
+            for story in stories:
+                key = story_key(story)
+                if key not in seen:
+                    seen.add(key)
+                    merged.append(story)
+        return merged
+
+    def _fetch_page(self, url):
+        with self._polite(url):
+            response = self.http.get(url)
+        response.raise_for_status()  # 检查请求是否成功
+        return self.parse_stories(response.text)  # 解析新闻数据
+
+    def _fetch_page_or_empty(self, url):
+        # 单个列表页失败只记录日志，不影响其他页
         try:
-            response = requests.get(self.url, timeout=10)
-            response.raise_for_status()  # 检查请求是否成功
-            top_stories = self.parse_stories(response.text)  # 解析新闻数据
-            return top_stories
+            return self._fetch_page(url)
         except Exception as e:
-            LOG.error(f"获取Hacker News的热门新闻失败：{str(e)}")
+            LOG.error(f"获取Hacker News列表页 {url} 失败：{str(e)}")
             return []
 
+    def _polite(self, url):
+        # 对同一主机限制并发数和请求速率，返回在请求期间持有的信号量
+        host = urlparse(url).netloc
+        with self._hosts_lock:
+            if host not in self._hosts:
+                self._hosts[host] = (threading.BoundedSemaphore(self.max_concurrent_per_host),
+                                     TokenBucket(self.requests_per_second, 1))
+            slots, bucket = self._hosts[host]
+        bucket.acquire()
+        return slots
+
     def parse_stories(self, html_content):
         LOG.debug("解析Hacker News的HTML内容。")
-        soup = BeautifulSoup(html_content, 'html.parser')
-        stories = soup.find_all('tr', class_='athing')  # 查找所有包含新闻的<tr>标签
-        
-        top_stories = []
-        for story in stories:
-            title_tag = story.find('span', class_='titleline').find('a')
-            if title_tag:
-                title = title_tag.text
-                link = title_tag['href']
-                top_stories.append({'title': title, 'link': link})
-        
+        top_stories = parse_stories(html_content, self.parser)  # 只提取 tr.athing 行中的标题和链接
         LOG.info(f"成功解析 {len(top_stories)} 条Hacker News新闻。")
         return top_stories
 
@@ -56,12 +122,82 @@ class HackerNewsClient:
         file_path = os.path.join(dir_path, f'{hour}.md')  # 定义文件路径
         with open(file_path, 'w') as file:
             file.write(f"# Hacker News Top Stories ({date} {hour}:00)\n\n")
-            for idx, story in enumerate(top_stories, start=1):
-                file.write(f"{idx}. [{story['title']}]({story['link']})\n")
+            if self.index is None:
+                for idx, story in enumerate(self._with_content(top_stories), start=1):
+                    file.write(self._story_entry(idx, story))
+            else:
+                self._write_snapshot_delta(file, self.index.record_snapshot(top_stories, f"{date}T{hour}:00:00"))
         
         LOG.info(f"Hacker News热门新闻文件生成：{file_path}")
         return file_path
 
+    def _write_snapshot_delta(self, file, delta):
+        """
+        按索引的对比结果分组写出完整快照：新出现的新闻和仍在榜的新闻都保留链接、元数据和文章摘录，
+        仍在榜的新闻另外注明排名变化。该文件就是主题报告的输入，报告需要原始链接；
+        跨快照的增量（排名、分数轨迹）只保存在索引中。
+        """
+        enriched = self._with_content([story for story, _ in delta])  # 文章缓存命中时不会重复下载
+        entries = [(idx, story, previous_rank)
+                   for idx, (story, (_, previous_rank)) in enumerate(zip(enriched, delta), start=1)]
+        file.write("## New Stories\n")
+        for idx, story, previous_rank in entries:
+            if previous_rank is None:
+                file.write(self._story_entry(idx, story))
+        file.write("\n## Still Trending\n")
+        for idx, story, previous_rank in entries:
+            if previous_rank is not None:
+                file.write(self._story_entry(idx, story, f" (rank {previous_rank} -> {idx})"))
+
+    def _with_content(self, stories):
+        # 启用文章提取时并发下载链接文章，为每条新闻补充 content 字段
+        if self.extractor is None or not stories:
+            return stories
+        return self.extractor.enrich(stories)
+
+    def _story_entry(self, idx, story, note=""):
+        entry = f"{idx}. [{story['title']}]({story['link']}){self._story_meta(story)}{note}\n"
+        if story.get('content'):
+            entry += f"   > {story['content']}\n"  # 正文摘录作为引用块，供主题报告总结文章内容
+        return entry
+
+    @staticmethod
+    def _story_meta(story):
+        # API 后端额外提供分数、评论数和作者，附在标题后为报告提供热度信号；HTML 抓取没有这些字段
+        if story.get('score') is None:
+            return ""
+        return f" ({story['score']} points, {story['comments']} comments, by {story['author']})"
+
+
+def create_hacker_news_client(config):
+    """
+    根据配置创建 Hacker News 客户端：html 抓取首页，api 使用官方 Firebase API。
+    """
+    hacker_news = config.hacker_news
+    index = None
+    if hacker_news.get('index', {}).get('enabled', False):
+        index = StoryIndex(hacker_news['index'].get('path', 'data/hn_stories.db'))
+    crawl = hacker_news.get('crawl', {})
+    articles = hacker_news.get('articles', {})
+    extractor = None
+    if articles.get('enabled', False):
+        extractor = ArticleExtractor(ArticleCache(articles.get('cache_path', 'cache/hn_articles.db'),
+                                                  articles.get('ttl_hours', 24)),
+                                     max_workers=articles.get('max_workers', 8),
+                                     max_bytes=articles.get('max_bytes', 1024 * 1024),
+                                     timeout=articles.get('timeout', 10),
+                                     max_chars=articles.get('max_chars', 1500))
+    if hacker_news.get('backend', 'html') == 'api':
+        from hacker_news_api_client import HackerNewsAPIClient  # 延迟导入，避免与子类模块循环导入
+        return HackerNewsAPIClient(api_url=hacker_news.get('api_url', 'https://hacker-news.firebaseio.com/v0/'),
+                                   max_stories=hacker_news.get('max_stories', 30),
+                                   max_concurrent_requests=hacker_news.get('max_concurrent_requests', 16),
+                                   index=index, extractor=extractor)
+    return HackerNewsClient(parser=hacker_news.get('parser', 'auto'), index=index, extractor=extractor,
+                            pages=crawl.get('pages', 1), lists=tuple(crawl.get('lists', ['news'])),
+                            max_concurrent_per_host=crawl.get('max_concurrent_per_host', 2),
+                            requests_per_second=crawl.get('requests_per_second', 1))
+
 
 if __name__ == "__main__":
     client = HackerNewsClient()
@@ -0,0 +1,92 @@
+from bs4 import BeautifulSoup, SoupStrainer  # 导入BeautifulSoup，作为始终可用的后备解析器
+from logger import LOG  # 导入日志模块
+
+try:
+    from selectolax.lexbor import LexborHTMLParser  # 可选依赖：基于 C 实现（lexbor）的 HTML5 解析器，速度最快
+except ImportError:
+    LexborHTMLParser = None
+
+try:
+    import lxml.html  # 可选依赖：基于 libxml2 的解析器
+except ImportError:
+    lxml = None
+
+
+def _is_story_row(value):
+    # 解析阶段的 class 属性尚未拆分为列表（如 "athing submission"），需要按空白切分后匹配
+    classes = value.split() if isinstance(value, str) else value or []
+    return 'athing' in classes
+
+
+STORY_ROWS = SoupStrainer('tr', class_=_is_story_row)  # 只为新闻所在的 <tr> 行构建节点，跳过页面其余部分
+STORY_XPATH = "//tr[contains(concat(' ', normalize-space(@class), ' '), ' athing ')]"
+TITLELINE_XPATH = ".//span[contains(concat(' ', normalize-space(@class), ' '), ' titleline ')]"
+
+
+def parse_with_selectolax(html_content):
+    stories = []
+    for row in LexborHTMLParser(html_content).css('tr.athing'):
+        title_tag = row.css_first('span.titleline a')
+        if title_tag is not None:
+            stories.append({'title': title_tag.text(), 'link': title_tag.attributes.get('href')})
+    return stories
+
+
+def parse_with_lxml(html_content):
+    if not html_content.strip():
+        return []  # lxml 无法解析空文档
+    stories = []
+    for row in lxml.html.fromstring(html_content).xpath(STORY_XPATH):
+        titlelines = row.xpath(TITLELINE_XPATH)
+        links = titlelines[0].xpath('.//a') if titlelines else []
+        if links:
+            stories.append({'title': links[0].text_content(), 'link': links[0].get('href')})
+    return stories
+
+
+def parse_with_soup(html_content):
+    # 使用 SoupStrainer 限定只解析新闻行，已安装 lxml 时用它作为 BeautifulSoup 的底层解析器
+    soup = BeautifulSoup(html_content, 'lxml' if lxml else 'html.parser', parse_only=STORY_ROWS)
+    stories = []
+    for row in soup.find_all('tr', class_='athing'):
+        titleline = row.find('span', class_='titleline')
+        title_tag = titleline.find('a') if titleline else None
+        if title_tag:
+            stories.append({'title': title_tag.text, 'link': title_tag.get('href')})
+    return stories
+
+
+PARSERS = {
+    'selectolax': parse_with_selectolax,
+    'lxml': parse_with_lxml,
+    'soup': parse_with_soup,
+}
+
+
+def available_parsers():
+    # 按速度从快到慢列出当前环境可用的解析后端
+    installed = {'selectolax': LexborHTMLParser is not None, 'lxml': lxml is not None, 'soup': True}
+    return [name for name in PARSERS if installed[name]]
+
+
+def get_parser(name='auto'):
+    """
+    返回解析函数：auto 时选择已安装的最快后端，指定的后端未安装时退回 SoupStrainer 解析。
+    """
+    if name == 'auto':
+        name = available_parsers()[0]
+    elif name not in available_parsers():
+        LOG.warning(f"HTML 解析后端 {name} 不可用，改用 soup")
+        name = 'soup'
+    return PARSERS[name]
+
+
+def parse_stories(html_content, parser=parse_with_soup):
+    """
+    解析 Hacker News 列表页，返回 [{'title', 'link'}]。
+    HTML5 解析器会丢弃不在 <table> 中的 <tr> 片段，快速后端没有解析到任何新闻时用 SoupStrainer 再解析一次。
+    """
+    stories = parser(html_content)
+    if not stories and parser is not parse_with_soup:
+        stories = parse_with_soup(html_content)
+    return stories
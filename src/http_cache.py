@@ -0,0 +1,93 @@
+import json  # 导入json模块用于序列化缓存键
+import os  # 导入os模块用于创建缓存目录
+import sqlite3  # 导入sqlite3用于持久化缓存
+import threading  # 导入threading模块保证多线程访问安全
+import time  # 导入time模块记录访问时间
+from logger import LOG  # 导入日志模块
+
+class HTTPCache:
+    """
+    持久化的 HTTP 验证器缓存：按 URL + 查询参数保存 ETag / Last-Modified 与响应体，
+    用于发送条件请求（If-None-Match / If-Modified-Since），命中 304 时直接返回本地响应体。
+    缓存总大小超过 max_size_mb 时，按最近访问时间（LRU）淘汰。
+    """
+    def __init__(self, path='cache/http_cache.db', max_size_mb=64):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)  # 确保缓存目录存在
+        self.path = path
+        self.max_size = int(max_size_mb * 1024 * 1024)  # 缓存允许的最大字节数
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, etag TEXT, last_modified TEXT,"
+                " body TEXT, link_next TEXT, size INTEGER, accessed_at REAL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at)")
+
+    @staticmethod
+    def make_key(url, params):
+        # 忽略值为 None 的参数（requests 也不会发送它们），并按参数名排序保证键稳定
+        items = sorted((k, str(v)) for k, v in (params or {}).items() if v is not None)
+        return json.dumps([url, items])
+
+    def get(self, url, params):
+        """
+        查找缓存条目，命中时刷新其访问时间。
+        :return: 包含 etag、last_modified、body、link_next 的字典，未命中返回 None。
+        """
+        key = self.make_key(url, params)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, body, link_next FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            with self._conn:
+                self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        return {'etag': row[0], 'last_modified': row[1], 'body': row[2], 'link_next': row[3]}
+
+    @staticmethod
+    def validators(entry):
+        # 根据缓存条目构造条件请求头
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def put(self, url, params, etag, last_modified, body, link_next=None):
+        """
+        保存一次完整响应。没有任何验证器的响应无法发起条件请求，不做缓存。
+        """
+        if not etag and not last_modified:
+            return
+        key = self.make_key(url, params)
+        size = len(body.encode('utf-8'))
+        if size > self.max_size:
+            return  # 单个响应超过缓存上限，直接跳过
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, etag, last_modified, body, link_next, size, accessed_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, etag, last_modified, body, link_next, size, time.time())
+                )
+                self._evict()
+
+    def _evict(self):
+        # 按 LRU 顺序淘汰最久未访问的条目，直到总大小回到上限以内（调用方需持有锁）
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_size:
+            return
+        evicted = []
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at"):
+            if total <= self.max_size:
+                break
+            evicted.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", evicted)
+        LOG.debug(f"HTTP 缓存淘汰 {len(evicted)} 个条目")
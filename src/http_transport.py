@@ -0,0 +1,79 @@
+import threading  # 导入threading模块保护共享实例的创建
+import requests  # 导入requests库用于HTTP请求
+from requests.adapters import HTTPAdapter  # 导入HTTPAdapter用于配置连接池
+from urllib3.util.retry import Retry  # 导入Retry用于配置退避重试
+from logger import LOG  # 导入日志模块
+
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS'])  # 可以安全重试的请求方法
+RETRY_STATUSES = (500, 502, 503, 504)  # 视为临时故障、需要重试的状态码
+
+
+class HTTPTransport:
+    """
+    所有网络客户端共享的 HTTP 传输层：
+    - 复用 requests.Session 的 keep-alive 连接池，每个主机一个池，可按主机单独设置池大小；
+    - 幂等请求遇到连接错误或 5xx 时，按带随机抖动的指数退避自动重试；
+    - 连接超时和读取超时分别可配置。
+    """
+    def __init__(self, pool_connections=10, pool_maxsize=10, pool_maxsize_per_host=None,
+                 max_retries=3, backoff_factor=0.5, connect_timeout=5, read_timeout=30):
+        self.timeout = (connect_timeout, read_timeout)  # 默认的 (连接超时, 读取超时)
+        self.connect_timeout = connect_timeout
+        self.session = requests.Session()
+        self._retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,  # 第 n 次重试前等待 backoff_factor * 2^(n-1) 秒
+            backoff_jitter=backoff_factor,  # 在退避时间上叠加随机抖动，避免大量请求同时重试
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=IDEMPOTENT_METHODS,  # 非幂等请求（如 POST）不自动重试
+            raise_on_status=False,  # 重试耗尽后返回最后一次响应，由调用方处理状态码
+            respect_retry_after_header=False,  # 限流的 Retry-After 由各客户端自行处理
+        )
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=self._retry)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        # 为指定主机挂载单独大小的连接池（更长的前缀优先匹配）
+        for host, maxsize in (pool_maxsize_per_host or {}).items():
+            host_adapter = HTTPAdapter(pool_connections=1, pool_maxsize=maxsize, max_retries=self._retry)
+            self.session.mount(f'https://{host}/', host_adapter)
+            self.session.mount(f'http://{host}/', host_adapter)
+
+    def get(self, url, timeout=None, **kwargs):
+        return self.session.get(url, timeout=timeout or self.timeout, **kwargs)
+
+    def post(self, url, timeout=None, **kwargs):
+        return self.session.post(url, timeout=timeout or self.timeout, **kwargs)
+
+
+_shared_transport = None
+_shared_lock = threading.Lock()
+
+
+def init_transport(http_config):
+    """
+    按配置创建进程内共享的 HTTPTransport，应在创建各网络客户端之前调用。
+    """
+    global _shared_transport
+    with _shared_lock:
+        _shared_transport = HTTPTransport(
+            pool_connections=http_config.get('pool_connections', 10),
+            pool_maxsize=http_config.get('pool_maxsize', 10),
+            pool_maxsize_per_host=http_config.get('pool_maxsize_per_host', {}),
+            max_retries=http_config.get('max_retries', 3),
+            backoff_factor=http_config.get('backoff_factor', 0.5),
+            connect_timeout=http_config.get('connect_timeout', 5),
+            read_timeout=http_config.get('read_timeout', 30),
+        )
+        LOG.debug(f"共享 HTTP 传输层已初始化：{http_config}")
+    return _shared_transport
+
+
+def get_transport():
+    """
+    返回进程内共享的 HTTPTransport，尚未初始化时使用默认配置创建。
+    """
+    global _shared_transport
+    with _shared_lock:
+        if _shared_transport is None:
+            _shared_transport = HTTPTransport()
+        return _shared_transport
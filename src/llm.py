@@ -1,8 +1,18 @@
+import copy  # 导入copy模块为路由中的各模型服务复制配置
 import json
-import requests
+import time  # 导入time模块测量调用耗时
 from openai import OpenAI  # 导入OpenAI库用于访问GPT模型
+from http_transport import get_transport  # 导入共享的HTTP传输层
+from llm_cache import LLMCache  # 导入内容寻址的LLM响应缓存
+from llm_executor import provider_slots  # 导入各模型服务共享的并发配额
+from llm_metrics import LLMMetricsStore  # 导入本地的LLM调用指标库
+from openai_batch import OpenAIBatchClient  # 导入OpenAI批处理客户端
 from logger import LOG  # 导入日志模块
 
+DEFAULT_CONTEXT_WINDOWS = {'openai': 128000, 'ollama': 2048}  # Ollama 未设置 num_ctx 时默认只有 2048 个 token
+DEFAULT_OLLAMA_OPTIONS = {"temperature": 0.7}  # 未配置时使用的 Ollama 生成参数
+COLD_START_SECONDS = 1.0  # Ollama 加载模型耗时超过该值视为冷启动（模型已驻留时加载耗时只有几毫秒）
+
 class LLM:
     def __init__(self, config):
         """
@@ -16,36 +26,252 @@ class LLM:
             self.client = OpenAI()  # 创建OpenAI客户端实例
         elif self.model == "ollama":
             self.api_url = config.ollama_api_url  # 设置Ollama API的URL
+            self.http = get_transport()  # 复用共享连接池，避免每次请求重新握手
         else:
             LOG.error(f"不支持的模型类型: {self.model}")
             raise ValueError(f"不支持的模型类型: {self.model}")  # 如果模型类型不支持，抛出错误
+        # 同一模型服务的所有实例共享并发配额，避免并发生成报告时压垮本地 Ollama
+        self._slots = provider_slots(self.model, config.llm_max_concurrent_requests.get(self.model))
+        self.cache = None  # 可选的 LLMCache 实例，相同请求直接返回已有结果
+        if config.llm_cache.get('enabled', False):
+            self.cache = LLMCache(config.llm_cache.get('path', 'cache/llm_cache.db'),
+                                  config.llm_cache.get('max_size_mb', 32),
+                                  config.llm_cache.get('ttl_hours', 24 * 7))
+        self.metrics = None  # 可选的 LLMMetricsStore 实例，记录每次调用的 token 数和耗时
+        if config.llm_metrics.get('enabled', False):
+            self.metrics = LLMMetricsStore(config.llm_metrics.get('path', 'cache/llm_metrics.db'))
+        self.batch = None  # 可选的 OpenAIBatchClient，启用后不要求实时返回的报告以批处理方式生成
+        if self.model == "openai" and config.llm_batch.get('enabled', False):
+            self.batch = OpenAIBatchClient(base_url=config.llm_batch.get('base_url', 'https://api.openai.com/v1'),
+                                           poll_interval=config.llm_batch.get('poll_interval_seconds', 60),
+                                           completion_window=config.llm_batch.get('completion_window', '24h'),
+                                           max_wait_hours=config.llm_batch.get('max_wait_hours', 24))
 
-    def generate_report(self, system_prompt, user_content):
+    def generate_report(self, system_prompt, user_content, use_cache=True, tags=None):
         """
         生成报告，根据配置选择不同的模型来处理请求。
 
         :param system_prompt: 系统提示信息，包含上下文和规则。
         :param user_content: 用户提供的内容，通常是Markdown格式的文本。
+        :param use_cache: 为 False 时跳过缓存查找，强制重新生成（结果仍会写入缓存）。
+        :param tags: 调用指标的标签，如 {'report_type': 'github', 'subject': 'owner_repo'}。
         :return: 生成的报告内容。
         """
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_content},
-        ]
+        messages = self._messages(system_prompt, user_content)
+        key, cached = self._lookup_cache(system_prompt, user_content, use_cache)
+        if cached is not None:
+            self._record_call(tags, {}, 0.0, cached=True)
+            return cached
 
         # 根据选择的模型调用相应的生成报告方法
+        stats = {}  # 由各模型的生成方法填入 token 数等用量
+        with self._slots.hold(system_prompt):  # 相同系统提示的请求优先背靠背执行
+            start = time.perf_counter()
+            if self.model == "openai":
+                report = self._generate_report_openai(messages, stats)
+            elif self.model == "ollama":
+                report = self._generate_report_ollama(messages, stats)
+            else:
+                raise ValueError(f"不支持的模型类型: {self.model}")
+            latency = time.perf_counter() - start
+        self._record_call(tags, stats, latency)
+
+        if key is not None:
+            self.cache.put(key, report)
+        return report
+
+    def stream_report(self, system_prompt, user_content, use_cache=True, tags=None):
+        """
+        流式生成报告，逐段产出模型返回的文本，调用方可以边接收边展示或写入文件。
+        缓存命中时一次性产出完整报告；只有完整接收的报告才会写入缓存。
+
+        :param system_prompt: 系统提示信息，包含上下文和规则。
+        :param user_content: 用户提供的内容，通常是Markdown格式的文本。
+        :param use_cache: 为 False 时跳过缓存查找，强制重新生成（结果仍会写入缓存）。
+        :param tags: 调用指标的标签，同 generate_report。
+        :return: 文本片段的生成器。
+        """
+        messages = self._messages(system_prompt, user_content)
+        key, cached = self._lookup_cache(system_prompt, user_content, use_cache)
+        if cached is not None:
+            self._record_call(tags, {}, 0.0, cached=True, streamed=True)
+            yield cached
+            return
+
+        stats = {}
         if self.model == "openai":
-            return self._generate_report_openai(messages)
+            chunks = self._stream_report_openai(messages, stats)
         elif self.model == "ollama":
-            return self._generate_report_ollama(messages)
+            chunks = self._stream_report_ollama(messages, stats)
         else:
             raise ValueError(f"不支持的模型类型: {self.model}")
 
-    def _generate_report_openai(self, messages):
+        parts = []
+        ttft = None  # 首个文本片段到达的耗时
+        with self._slots.hold(system_prompt):  # 流式接收期间一直占用配额
+            start = time.perf_counter()
+            for chunk in chunks:
+                if ttft is None:
+                    ttft = time.perf_counter() - start
+                parts.append(chunk)
+                yield chunk
+            latency = time.perf_counter() - start
+        self._record_call(tags, stats, latency, ttft=ttft, streamed=True)
+        if key is not None:
+            self.cache.put(key, "".join(parts))
+
+    def generate_reports_batch(self, requests, use_cache=True):
+        """
+        以批处理方式一次提交多份报告的生成请求（需启用 OpenAI 批处理模式），等待整个批次完成后返回。
+        缓存命中的请求不会提交。
+
+        :param requests: {custom_id: (system_prompt, user_content, tags)} 字典。
+        :param use_cache: 为 False 时跳过缓存查找，强制重新生成（结果仍会写入缓存）。
+        :return: {custom_id: 报告内容}，失败的请求对应一个异常实例。
+        """
+        if self.batch is None:
+            raise ValueError(f"{self.model} 未启用批处理模式")
+        results = {}
+        pending = {}
+        for custom_id, (system_prompt, user_content, tags) in requests.items():
+            key, cached = self._lookup_cache(system_prompt, user_content, use_cache)
+            if cached is not None:
+                self._record_call(tags, {}, 0.0, cached=True)
+                results[custom_id] = cached
+            else:
+                pending[custom_id] = (key, self._messages(system_prompt, user_content), tags)
+        if not pending:
+            return results
+
+        start = time.perf_counter()
+        outputs = self.batch.run(self.model_name, {custom_id: messages for custom_id, (_, messages, _) in pending.items()})
+        latency = time.perf_counter() - start
+        for custom_id, (key, _, tags) in pending.items():
+            output = outputs[custom_id]
+            if isinstance(output, Exception):
+                LOG.error(f"批处理请求 {custom_id} 生成报告失败：{output}")
+                results[custom_id] = output
+                continue
+            report, usage = output
+            self._record_call(tags, {'prompt_tokens': usage.get('prompt_tokens'),
+                                     'completion_tokens': usage.get('completion_tokens')}, latency, batched=True)
+            if key is not None:
+                self.cache.put(key, report)
+            results[custom_id] = report
+        return results
+
+    @staticmethod
+    def _messages(system_prompt, user_content):
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_content},
+        ]
+
+    def _lookup_cache(self, system_prompt, user_content, use_cache):
+        # 返回 (缓存键, 缓存的报告)：未启用缓存时键为 None，未命中或跳过查找时报告为 None
+        if self.cache is None:
+            return None, None
+        key = LLMCache.make_key(self.model, self.model_name, system_prompt, user_content, self._params())
+        cached = self.cache.get(key) if use_cache else None
+        if cached is not None:
+            LOG.info(f"LLM 缓存命中，跳过 {self.model} {self.model_name} 的生成请求。")
+        return key, cached
+
+    @property
+    def model_name(self):
+        # 当前使用的模型名称（Gradio 界面可能在运行时修改配置）
+        return self.config.openai_model_name if self.model == "openai" else self.config.ollama_model_name
+
+    @property
+    def context_window(self):
+        # 当前模型服务的上下文窗口大小（token 数），用于切分过长的输入
+        return self.config.llm_context_window.get(self.model, DEFAULT_CONTEXT_WINDOWS[self.model])
+
+    def _params(self):
+        # 影响生成结果的请求参数，作为缓存键的一部分；Ollama 的上下文大小显式设为 context_window
+        if self.model == "ollama":
+            return {"num_ctx": self.context_window, **self.config.llm_ollama.get('options', DEFAULT_OLLAMA_OPTIONS)}
+        return {}
+
+    def _ollama_payload(self, messages, stream):
+        # keep_alive 让模型在两次定时任务之间保持驻留；options 每次都相同，避免 Ollama 因参数变化重新加载模型
+        return {
+            "model": self.config.ollama_model_name,  # 使用配置中的Ollama模型名称
+            "messages": messages,
+            "options": self._params(),
+            "keep_alive": self.config.llm_ollama.get('keep_alive', '30m'),
+            "stream": stream
+        }
+
+    def warm_up(self):
+        """
+        预热本地模型：向 Ollama 发送不含消息的请求，只加载模型并按 keep_alive 保持驻留。
+        定时任务在获取数据的同时调用，使模型加载与数据获取重叠；未启用预热或非 Ollama 时不做任何事。
+        预热失败只记录警告，不影响后续生成。
+        """
+        if self.model != "ollama" or not self.config.llm_ollama.get('warm_up', False):
+            return
+        try:
+            start = time.perf_counter()
+            timeout = (self.http.connect_timeout, self.config.llm_request_timeout)
+            response = self.http.post(self.api_url, json=self._ollama_payload([], stream=False), timeout=timeout)
+            response.raise_for_status()
+            stats = self._ollama_stats(response.json())
+            self._record_call({'report_type': 'warm_up'}, stats, time.perf_counter() - start)
+            LOG.info(f"Ollama {self.config.ollama_model_name} 模型已预热，加载耗时 {stats['load_seconds'] or 0:.2f} 秒。")
+        except Exception as e:
+            LOG.warning(f"预热 Ollama 模型失败：{str(e)}")
+
+    def _record_call(self, tags, stats, latency, ttft=None, cached=False, streamed=False, batched=False):
+        """
+        把一次调用的 token 数、耗时、首个 token 耗时和生成速度写入指标库。
+        模型未返回生成速度时，按输出 token 数除以首个 token 之后的耗时估算；
+        批处理请求的耗时是整个批次的等待时间，不估算生成速度。
+        """
+        if self.metrics is None:
+            return
+        tags = tags or {}
+        completion_tokens = stats.get('completion_tokens')
+        tokens_per_second = stats.get('tokens_per_second')
+        if tokens_per_second is None and not batched and completion_tokens and latency - (ttft or 0) > 0:
+            tokens_per_second = completion_tokens / (latency - (ttft or 0))
+        record = {
+            'provider': self.model, 'model': self.model_name,
+            'report_type': tags.get('report_type'), 'subject': tags.get('subject'),
+            'prompt_tokens': stats.get('prompt_tokens'), 'completion_tokens': completion_tokens,
+            'latency': round(latency, 3), 'ttft': round(ttft, 3) if ttft is not None else None,
+            'tokens_per_second': round(tokens_per_second, 1) if tokens_per_second else None,
+            'load_seconds': stats.get('load_seconds'), 'cold_start': stats.get('cold_start'),
+            'cached': cached, 'streamed': streamed,
+        }
+        LOG.debug(f"LLM 调用指标：{record}")
+        try:
+            self.metrics.record(**record)
+        except Exception as e:
+            LOG.warning(f"记录 LLM 调用指标失败：{str(e)}")
+
+    @staticmethod
+    def _ollama_stats(data):
+        # Ollama 在响应（流式时为最后一行）中返回 token 数和以纳秒计的模型加载、生成耗时
+        stats = {'prompt_tokens': data.get('prompt_eval_count'), 'completion_tokens': data.get('eval_count'),
+                 'load_seconds': None, 'cold_start': None}
+        if data.get('eval_count') and data.get('eval_duration'):
+            stats['tokens_per_second'] = data['eval_count'] / (data['eval_duration'] / 1e9)
+        if data.get('load_duration') is not None:
+            stats['load_seconds'] = round(data['load_duration'] / 1e9, 3)
+            stats['cold_start'] = stats['load_seconds'] > COLD_START_SECONDS
+        return stats
+
+    def cache_metrics(self):
+        # 返回 LLM 缓存的命中统计，未启用缓存时返回空字典
+        return self.cache.metrics() if self.cache is not None else {}
+
+    def _generate_report_openai(self, messages, stats):
         """
         使用 OpenAI GPT 模型生成报告。
 
         :param messages: 包含系统提示和用户内容的消息列表。
+        :param stats: 用于返回 token 用量的字典。
         :return: 生成的报告内容。
         """
         LOG.info(f"使用 OpenAI {self.config.openai_model_name} 模型生成报告。")
@@ -55,33 +281,56 @@ class LLM:
                 messages=messages
             )
             LOG.debug("GPT 响应: {}", response)
+            if response.usage is not None:
+                stats.update(prompt_tokens=response.usage.prompt_tokens,
+                             completion_tokens=response.usage.completion_tokens)
             return response.choices[0].message.content  # 返回生成的报告内容
         except Exception as e:
             LOG.error(f"生成报告时发生错误：{e}")
             raise
 
-    def _generate_report_ollama(self, messages):
+    def _stream_report_openai(self, messages, stats):
+        """
+        使用 OpenAI GPT 模型流式生成报告，逐段产出增量文本；最后一个片段携带 token 用量。
+        """
+        LOG.info(f"使用 OpenAI {self.config.openai_model_name} 模型流式生成报告。")
+        try:
+            stream = self.client.chat.completions.create(
+                model=self.config.openai_model_name,
+                messages=messages,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+                usage = getattr(chunk, 'usage', None)
+                if usage is not None:
+                    stats.update(prompt_tokens=usage.prompt_tokens, completion_tokens=usage.completion_tokens)
+        except Exception as e:
+            LOG.error(f"生成报告时发生错误：{e}")
+            raise
+
+    def _generate_report_ollama(self, messages, stats):
         """
         使用 Ollama LLaMA 模型生成报告。
 
         :param messages: 包含系统提示和用户内容的消息列表。
+        :param stats: 用于返回 token 用量和生成速度的字典。
         :return: 生成的报告内容。
         """
         LOG.info(f"使用 Ollama {self.config.ollama_model_name} 模型生成报告。")
         try:
-            payload = {
-                "model": self.config.ollama_model_name,  # 使用配置中的Ollama模型名称
-                "messages": messages,
-                "max_tokens": 4000,
-                "temperature": 0.7,
-                "stream": False
-            }
-
-            response = requests.post(self.api_url, json=payload)  # 发送POST请求到Ollama API
+            payload = self._ollama_payload(messages, stream=False)
+
+            # 生成报告可能耗时数分钟，读取超时单独配置（None 表示不限制）
+            timeout = (self.http.connect_timeout, self.config.llm_request_timeout)
+            response = self.http.post(self.api_url, json=payload, timeout=timeout)  # 发送POST请求到Ollama API
             response_data = response.json()
 
             # 调试输出查看完整的响应结构
             LOG.debug("Ollama 响应: {}", response_data)
+            stats.update(self._ollama_stats(response_data))
 
             # 直接从响应数据中获取 content
             message_content = response_data.get("message", {}).get("content", None)
@@ -94,6 +343,54 @@ class LLM:
             LOG.error(f"生成报告时发生错误：{e}")
             raise
 
+    def _stream_report_ollama(self, messages, stats):
+        """
+        使用 Ollama 模型流式生成报告：Ollama 以逐行 JSON 返回增量消息，最后一行的 done 为 true。
+        """
+        LOG.info(f"使用 Ollama {self.config.ollama_model_name} 模型流式生成报告。")
+        try:
+            payload = self._ollama_payload(messages, stream=True)
+            timeout = (self.http.connect_timeout, self.config.llm_request_timeout)
+            response = self.http.post(self.api_url, json=payload, timeout=timeout, stream=True)
+            with response:
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    data = json.loads(line)
+                    if "error" in data:
+                        raise ValueError(f"Ollama API 返回错误：{data['error']}")
+                    content = data.get("message", {}).get("content")
+                    if content:
+                        yield content
+                    if data.get("done"):
+                        stats.update(self._ollama_stats(data))
+                        break
+        except Exception as e:
+            LOG.error(f"生成报告时发生错误：{e}")
+            raise
+
+
+def create_llm(config):
+    """
+    根据配置创建语言模型：启用 llm.router 时按 providers 顺序为每个模型服务创建 LLM 实例，
+    由 LLMRouter 负责对冲与故障切换；否则只使用 llm.model_type 对应的单个服务。
+    """
+    router = config.llm_router
+    if not router.get('enabled', False):
+        return LLM(config)
+    from llm_router import LLMRouter  # 延迟导入，只有启用路由时才需要
+    providers = []
+    for model_type in router.get('providers', ['ollama', 'openai']):
+        provider_config = copy.copy(config)  # 各服务只有模型类型不同，其余配置共用
+        provider_config.llm_model_type = model_type
+        providers.append(LLM(provider_config))
+    return LLMRouter(providers,
+                     latency_budget=router.get('latency_budget_seconds', 120),
+                     hedge_quantile=router.get('hedge_quantile', 0.95),
+                     min_samples=router.get('min_samples', 20),
+                     failure_threshold=router.get('failure_threshold', 3),
+                     cooldown=router.get('cooldown_seconds', 300))
+
 if __name__ == '__main__':
     from config import Config  # 导入配置管理类
     config = Config()
@@ -0,0 +1,93 @@
+import hashlib  # 导入hashlib模块用于计算内容寻址的缓存键
+import json  # 导入json模块用于稳定地序列化缓存键的组成部分
+import os  # 导入os模块用于创建缓存目录
+import sqlite3  # 导入sqlite3用于持久化缓存
+import threading  # 导入threading模块保证多线程访问安全
+import time  # 导入time模块记录写入和访问时间
+from logger import LOG  # 导入日志模块
+
+
+class LLMCache:
+    """
+    内容寻址的 LLM 响应缓存：按 (模型类型, 模型名称, 系统提示, 用户内容, 生成参数) 的哈希保存生成结果。
+    任务重试、安静仓库产生相同的 Markdown、重复点击 Gradio 按钮时直接返回已有结果。
+    条目超过 ttl_hours 视为过期；总大小超过 max_size_mb 时按最近访问时间（LRU）淘汰。
+    """
+    def __init__(self, path='cache/llm_cache.db', max_size_mb=32, ttl_hours=24 * 7, clock=time.time):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)  # 确保缓存目录存在
+        self.max_size = int(max_size_mb * 1024 * 1024)  # 缓存允许的最大字节数
+        self.ttl = ttl_hours * 3600  # 条目有效期（秒）
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, response TEXT, size INTEGER, created_at REAL, accessed_at REAL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_responses_accessed ON responses(accessed_at)")
+
+    @staticmethod
+    def make_key(model_type, model_name, system_prompt, user_content, params=None):
+        # 参数按键排序后序列化，保证相同请求得到相同的键
+        payload = json.dumps([model_type, model_name, system_prompt, user_content, params or {}],
+                             sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """
+        查找未过期的缓存响应，命中时刷新访问时间；同时统计命中和未命中次数。
+        """
+        now = self._clock()
+        with self._lock:
+            row = self._conn.execute("SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                self._misses += 1
+                return None
+            self._hits += 1
+            with self._conn:
+                self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def put(self, key, response):
+        size = len(response.encode('utf-8'))
+        if size > self.max_size:
+            return  # 单个响应超过缓存上限，直接跳过
+        now = self._clock()
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, response, size, created_at, accessed_at)"
+                    " VALUES (?, ?, ?, ?, ?)", (key, response, size, now, now)
+                )
+                self._evict(now)
+
+    def _evict(self, now):
+        # 先删除过期条目，再按 LRU 顺序淘汰，直到总大小回到上限以内（调用方需持有锁）
+        expired = self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,)).rowcount
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        evicted = []
+        if total > self.max_size:
+            for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at"):
+                if total <= self.max_size:
+                    break
+                evicted.append((key,))
+                total -= size
+            self._conn.executemany("DELETE FROM responses WHERE key = ?", evicted)
+        if expired or evicted:
+            LOG.debug(f"LLM 缓存淘汰 {expired} 个过期条目、{len(evicted)} 个最久未访问的条目")
+
+    def metrics(self):
+        """
+        返回缓存命中统计：hits、misses、hit_rate，以及当前条目数和总字节数。
+        """
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+            lookups = self._hits + self._misses
+            return {'hits': self._hits, 'misses': self._misses,
+                    'hit_rate': round(self._hits / lookups, 3) if lookups else 0.0,
+                    'entries': entries, 'size_bytes': size}
@@ -0,0 +1,108 @@
+import threading  # 导入threading模块创建各模型服务共享的并发配额
+from contextlib import contextmanager  # 导入contextmanager用于按提示占用配额
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED  # 导入线程池用于并发生成报告
+from logger import LOG  # 导入日志模块
+
+DEFAULT_PROVIDER_LIMITS = {'openai': 16, 'ollama': 2}  # 本地 Ollama 只能并行处理少量请求，OpenAI 可以更多
+MAX_AFFINITY_STREAK = 32  # 连续优先放行相同提示的请求数上限，避免其他提示的请求一直等待
+
+_provider_slots = {}
+_provider_lock = threading.Lock()
+
+
+class PromptAffinitySlots:
+    """
+    按系统提示排队的并发配额：有空位时优先放行与上一个请求系统提示相同的等待者，
+    使相同提示的请求背靠背执行，命中 Ollama 服务端的前缀（KV）缓存；其余等待者按先来先到。
+    连续放行相同提示超过 MAX_AFFINITY_STREAK 次后让位给最早的等待者。
+    """
+    def __init__(self, limit):
+        self._cond = threading.Condition()
+        self._free = limit
+        self._waiting = []  # 等待中的 (提示, 占位对象)，按到达顺序排列
+        self._last_prompt = None
+        self._streak = 0
+
+    @contextmanager
+    def hold(self, prompt=None):
+        self.acquire(prompt)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def acquire(self, prompt=None):
+        entry = (prompt, object())
+        with self._cond:
+            self._waiting.append(entry)
+            while self._free == 0 or self._next() is not entry:
+                self._cond.wait()
+            self._waiting.remove(entry)
+            self._free -= 1
+            self._streak = self._streak + 1 if prompt == self._last_prompt else 1
+            self._last_prompt = prompt
+            if self._free > 0 and self._waiting:
+                # 还有空位：唤醒此前轮到别人而继续等待的线程重新检查，避免并发数低于配额
+                self._cond.notify_all()
+
+    def release(self):
+        with self._cond:
+            self._free += 1
+            self._cond.notify_all()
+
+    def __enter__(self):
+        self.acquire()
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+    def _next(self):
+        # 下一个应被放行的等待者（调用方需持有锁）
+        if self._streak < MAX_AFFINITY_STREAK:
+            for entry in self._waiting:
+                if entry[0] == self._last_prompt:
+                    return entry
+        return self._waiting[0]
+
+
+def provider_slots(provider, limit=None):
+    """
+    返回某个模型服务在进程内共享的并发配额（PromptAffinitySlots）。
+    同一服务的所有 LLM 实例共用一个配额，第一次创建时的 limit 生效。
+    """
+    with _provider_lock:
+        if provider not in _provider_slots:
+            limit = limit or DEFAULT_PROVIDER_LIMITS.get(provider, 1)
+            _provider_slots[provider] = PromptAffinitySlots(limit)
+            LOG.debug(f"LLM 服务 {provider} 的最大并发请求数：{limit}")
+        return _provider_slots[provider]
+
+
+class LLMExecutor:
+    """
+    报告生成的线程池：任务一提交就开始执行，调用方按完成顺序收集结果。
+    实际同时发往模型服务的请求数由 provider_slots 限制，线程池大小只决定最多排队执行的任务数。
+    """
+    def __init__(self, max_workers=8):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='llm')
+
+    def submit(self, fn, *args, **kwargs):
+        return self._executor.submit(fn, *args, **kwargs)
+
+    def map_unordered(self, fn, items):
+        """
+        边消费 items 边提交 fn(*item)，按完成顺序产出 (item, future)。
+        items 可以是生成器（如边获取边导出的仓库数据），数据获取与报告生成因此可以重叠进行。
+        调用方通过 future.result() 获取结果或异常。
+        """
+        pending = {}
+        for item in items:
+            pending[self.submit(fn, *item)] = item
+            done, _ = wait(pending, timeout=0, return_when=FIRST_COMPLETED)  # 不阻塞地取出已完成的任务
+            for future in done:
+                yield pending.pop(future), future
+        for future in as_completed(pending):
+            yield pending[future], future
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
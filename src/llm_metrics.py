@@ -0,0 +1,79 @@
+import os  # 导入os模块用于创建指标目录
+import sqlite3  # 导入sqlite3用于持久化调用指标
+import threading  # 导入threading模块保证多线程访问安全
+import time  # 导入time模块记录调用时间
+
+GROUP_BY_COLUMNS = ('report_type', 'subject', 'provider', 'model', 'cold_start')  # summary 允许的分组字段
+ADDED_COLUMNS = {'load_seconds': 'REAL', 'cold_start': 'INTEGER'}  # 建表之后新增的列，打开旧指标库时自动补齐
+# 参与耗时与速度平均值的调用：排除缓存命中和模型预热（预热只加载模型，不生成内容）
+TIMED_CALL = "cached = 0 AND COALESCE(report_type, '') != 'warm_up'"
+
+
+class LLMMetricsStore:
+    """
+    本地的 LLM 调用指标库：每次生成请求记录一行，包括报告类型、仓库（或日期等主题）、
+    输入/输出 token 数、总耗时、首个 token 耗时、生成速度，以及本地模型的加载耗时和是否冷启动，
+    可按报告类型、主题、模型或冷/热启动汇总查询。
+    """
+    def __init__(self, path='cache/llm_metrics.db', clock=time.time):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)  # 确保指标目录存在
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS calls ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT, created_at REAL, provider TEXT, model TEXT,"
+                " report_type TEXT, subject TEXT, prompt_tokens INTEGER, completion_tokens INTEGER,"
+                " latency REAL, ttft REAL, tokens_per_second REAL, cached INTEGER, streamed INTEGER)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_calls_created ON calls(created_at)")
+            existing = {row[1] for row in self._conn.execute("PRAGMA table_info(calls)")}
+            for column, column_type in ADDED_COLUMNS.items():
+                if column not in existing:
+                    self._conn.execute(f"ALTER TABLE calls ADD COLUMN {column} {column_type}")
+
+    def record(self, provider, model, report_type=None, subject=None, prompt_tokens=None, completion_tokens=None,
+               latency=None, ttft=None, tokens_per_second=None, cached=False, streamed=False,
+               load_seconds=None, cold_start=None):
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT INTO calls (created_at, provider, model, report_type, subject, prompt_tokens,"
+                    " completion_tokens, latency, ttft, tokens_per_second, cached, streamed, load_seconds, cold_start)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (self._clock(), provider, model, report_type, subject, prompt_tokens, completion_tokens,
+                     latency, ttft, tokens_per_second, int(cached), int(streamed), load_seconds,
+                     None if cold_start is None else int(cold_start))
+                )
+
+    def summary(self, group_by='report_type', since=None):
+        """
+        按 group_by 汇总调用指标，返回按总耗时降序排列的字典列表；since 为时间戳，只统计之后的调用。
+        缓存命中和模型预热只计入 calls 和 cached（预热另计入平均加载耗时），不参与耗时与速度的平均值。
+        """
+        if group_by not in GROUP_BY_COLUMNS:
+            raise ValueError(f"不支持的分组字段: {group_by}")
+        query = (
+            f"SELECT {group_by}, COUNT(*), SUM(cached), SUM(prompt_tokens), SUM(completion_tokens),"
+            f" SUM(CASE WHEN {TIMED_CALL} THEN latency END), AVG(CASE WHEN {TIMED_CALL} THEN latency END),"
+            f" MAX(CASE WHEN {TIMED_CALL} THEN latency END), AVG(CASE WHEN {TIMED_CALL} THEN ttft END),"
+            f" AVG(CASE WHEN {TIMED_CALL} THEN tokens_per_second END), AVG(load_seconds)"
+            f" FROM calls WHERE created_at >= ? GROUP BY {group_by} ORDER BY 6 DESC"
+        )
+        with self._lock:
+            rows = self._conn.execute(query, (since or 0,)).fetchall()
+        keys = (group_by, 'calls', 'cached', 'prompt_tokens', 'completion_tokens', 'total_latency',
+                'avg_latency', 'max_latency', 'avg_ttft', 'avg_tokens_per_second', 'avg_load_seconds')
+        return [dict(zip(keys, row)) for row in rows]
+
+    def recent(self, limit=20):
+        # 最近的调用记录，按时间倒序
+        with self._lock:
+            cursor = self._conn.execute("SELECT * FROM calls ORDER BY id DESC LIMIT ?", (limit,))
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
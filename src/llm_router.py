@@ -0,0 +1,197 @@
+import bisect  # 导入bisect模块把耗时归入直方图的桶
+import threading  # 导入threading模块保护各服务的统计数据
+import time  # 导入time模块测量耗时和判断熔断是否结束
+from collections import deque  # 导入deque保存最近的耗时样本
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED  # 导入线程池用于发出对冲请求
+from logger import LOG  # 导入日志模块
+
+HISTOGRAM_BUCKETS = (1, 2, 5, 10, 20, 30, 60, 120, 300, 600)  # 耗时直方图的桶上界（秒）
+MIN_SAMPLE_SECONDS = 0.05  # 缓存命中等几乎立即返回的调用不计入耗时分布，避免拉低对冲阈值
+
+
+class ProviderHealth:
+    """
+    单个模型服务的健康状况和耗时分布：
+    - 最近 window 次成功调用的耗时，用于计算分位数（如 p95）和直方图；
+    - 连续失败 failure_threshold 次后熔断 cooldown 秒，期间路由跳过该服务。
+    """
+    def __init__(self, window=200, failure_threshold=3, cooldown=300, clock=time.monotonic):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._clock = clock
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.consecutive_failures = 0
+        self.open_until = 0  # 熔断结束的时间
+
+    def record_success(self, latency):
+        with self._lock:
+            if latency >= MIN_SAMPLE_SECONDS:
+                self._samples.append(latency)
+            self.consecutive_failures = 0
+            self.open_until = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= self.failure_threshold:
+                self.open_until = self._clock() + self.cooldown
+
+    def healthy(self):
+        return self._clock() >= self.open_until
+
+    def percentile(self, quantile, min_samples=1):
+        # 最近耗时的分位数（最近邻法），样本不足 min_samples 时返回 None
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < max(min_samples, 1):
+            return None
+        return samples[min(len(samples) - 1, int(quantile * len(samples)))]
+
+    def histogram(self):
+        # 按 HISTOGRAM_BUCKETS 统计最近耗时的分布，键为桶上界（最后一个桶为 'inf'）
+        counts = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+        with self._lock:
+            for latency in self._samples:
+                counts[bisect.bisect_left(HISTOGRAM_BUCKETS, latency)] += 1
+        return dict(zip(list(HISTOGRAM_BUCKETS) + ['inf'], counts))
+
+
+class LLMRouter:
+    """
+    按顺序在多个模型服务（LLM 实例）之间路由生成请求，接口与 LLM 相同：
+    - 请求先发给第一个健康的服务；超过它最近耗时的分位数（默认 p95，不超过 latency_budget）仍未返回时，
+      向下一个服务发出对冲请求，采用最先成功返回的结果；
+    - 服务报错时立即改用下一个服务；连续失败的服务暂时熔断，所有服务都熔断时仍按顺序尝试；
+    - 流式生成不做对冲，只在尚未输出任何内容时切换到下一个服务。
+    提示文件按第一个服务加载，对冲到其他服务时沿用同一提示。
+    """
+    def __init__(self, providers, latency_budget=120, hedge_quantile=0.95, min_samples=20,
+                 failure_threshold=3, cooldown=300, max_workers=16, clock=time.monotonic):
+        self.providers = providers  # 按优先级排列的 LLM 实例
+        self.latency_budget = latency_budget  # 单次请求等待主服务的最长秒数，超过后发出对冲请求
+        self.hedge_quantile = hedge_quantile
+        self.min_samples = min_samples  # 样本不足时以 latency_budget 作为对冲等待时间
+        self.health = {provider.model: ProviderHealth(failure_threshold=failure_threshold, cooldown=cooldown,
+                                                      clock=clock)
+                       for provider in providers}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='llm-router')
+
+    @property
+    def model(self):
+        return self.providers[0].model
+
+    @property
+    def model_name(self):
+        return self.providers[0].model_name
+
+    @property
+    def context_window(self):
+        # 输入需要放得下任何一个可能接手的服务
+        return min(provider.context_window for provider in self.providers)
+
+    @property
+    def metrics(self):
+        return self.providers[0].metrics
+
+    @property
+    def batch(self):
+        return self.providers[0].batch
+
+    def generate_reports_batch(self, requests, use_cache=True):
+        return self.providers[0].generate_reports_batch(requests, use_cache=use_cache)
+
+    def cache_metrics(self):
+        return self.providers[0].cache_metrics()
+
+    def warm_up(self):
+        for provider in self.providers:
+            provider.warm_up()
+
+    def health_metrics(self):
+        """
+        返回各服务的健康状况、连续失败次数、对冲分位数和耗时直方图。
+        """
+        return {model: {'healthy': health.healthy(), 'consecutive_failures': health.consecutive_failures,
+                        f'p{int(self.hedge_quantile * 100)}': health.percentile(self.hedge_quantile),
+                        'histogram': health.histogram()}
+                for model, health in self.health.items()}
+
+    def generate_report(self, system_prompt, user_content, use_cache=True, tags=None):
+        """
+        生成报告：按顺序尝试各服务，慢时对冲、失败时切换，返回最先成功的结果。
+        所有服务都失败时抛出最后一个异常。
+        """
+        candidates = self._candidates()
+        running = {}  # future -> provider
+        last_error = None
+        next_index = 0
+        while True:
+            if next_index < len(candidates) and not running:
+                next_index = self._start(candidates[next_index], running, next_index,
+                                         system_prompt, user_content, use_cache, tags)
+            timeout = self._hedge_delay(candidates[next_index - 1]) if next_index < len(candidates) else None
+            done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                slow = candidates[next_index - 1]
+                LOG.warning(f"{slow.model} 超过 {timeout:.1f} 秒未返回，向 {candidates[next_index].model} 发出对冲请求。")
+                next_index = self._start(candidates[next_index], running, next_index,
+                                         system_prompt, user_content, use_cache, tags)
+                continue
+            for future in done:
+                provider = running.pop(future)
+                if future.exception() is None:
+                    if running:
+                        LOG.info(f"采用 {provider.model} 的结果，忽略仍在进行的对冲请求。")
+                    return future.result()
+                last_error = future.exception()
+                LOG.warning(f"{provider.model} 生成报告失败：{last_error}")
+            if not running and next_index >= len(candidates):
+                raise last_error
+
+    def stream_report(self, system_prompt, user_content, use_cache=True, tags=None):
+        """
+        流式生成报告：使用第一个健康的服务，尚未输出任何内容就失败时切换到下一个服务。
+        """
+        candidates = self._candidates()
+        for index, provider in enumerate(candidates):
+            started = False
+            start = time.perf_counter()
+            try:
+                for chunk in provider.stream_report(system_prompt, user_content, use_cache=use_cache, tags=tags):
+                    started = True
+                    yield chunk
+            except Exception as e:
+                self.health[provider.model].record_failure()
+                if started or index == len(candidates) - 1:
+                    raise
+                LOG.warning(f"{provider.model} 流式生成失败，改用 {candidates[index + 1].model}：{e}")
+                continue
+            self.health[provider.model].record_success(time.perf_counter() - start)
+            return
+
+    def _candidates(self):
+        # 健康的服务按配置顺序排在前面；全部熔断时仍按顺序尝试
+        healthy = [provider for provider in self.providers if self.health[provider.model].healthy()]
+        return healthy + [provider for provider in self.providers if provider not in healthy]
+
+    def _hedge_delay(self, provider):
+        # 等待某个服务多久后发出对冲请求：最近耗时的分位数，不超过 latency_budget
+        quantile = self.health[provider.model].percentile(self.hedge_quantile, self.min_samples)
+        return min(quantile, self.latency_budget) if quantile is not None else self.latency_budget
+
+    def _start(self, provider, running, index, system_prompt, user_content, use_cache, tags):
+        future = self._executor.submit(self._call, provider, system_prompt, user_content, use_cache, tags)
+        running[future] = provider
+        return index + 1
+
+    def _call(self, provider, system_prompt, user_content, use_cache, tags):
+        # 在线程池中调用单个服务，并记录耗时或失败；被对冲淘汰的请求完成后同样计入统计
+        start = time.perf_counter()
+        try:
+            report = provider.generate_report(system_prompt, user_content, use_cache=use_cache, tags=tags)
+        except Exception:
+            self.health[provider.model].record_failure()
+            raise
+        self.health[provider.model].record_success(time.perf_counter() - start)
+        return report
@@ -0,0 +1,123 @@
+import json  # 导入json模块用于生成和解析 JSONL
+import os  # 导入os模块读取 API 密钥
+import time  # 导入time模块用于轮询等待
+from http_transport import get_transport  # 导入共享的HTTP传输层
+from logger import LOG  # 导入日志模块
+
+CHAT_COMPLETIONS_ENDPOINT = '/v1/chat/completions'
+FINISHED_STATUSES = ('completed', 'failed', 'expired', 'cancelled')  # 批处理任务的终止状态
+
+
+class OpenAIBatchClient:
+    """
+    OpenAI Batch API 客户端：把多个对话请求写成一个 JSONL 文件上传，创建批处理任务，
+    轮询直到任务结束，再下载结果文件并按 custom_id 对应回各个请求。
+    批处理不要求实时返回，按 token 计费更低、吞吐更高，适合夜间的 GitHub 报告生成。
+    """
+    def __init__(self, transport=None, api_key=None, base_url='https://api.openai.com/v1',
+                 poll_interval=60, completion_window='24h', max_wait_hours=24, sleep=time.sleep, clock=time.monotonic):
+        self.http = transport or get_transport()  # 共享连接池与重试策略的HTTP传输层
+        self.api_key = api_key or os.getenv('OPENAI_API_KEY')
+        self.base_url = base_url.rstrip('/')
+        self.poll_interval = poll_interval  # 两次查询任务状态之间的间隔（秒）
+        self.completion_window = completion_window  # 提交给 OpenAI 的完成时限
+        self.max_wait = max_wait_hours * 3600  # 本地最多等待的秒数，超时后取消任务
+        self._sleep = sleep
+        self._clock = clock
+
+    def run(self, model, requests):
+        """
+        以批处理方式执行对话请求。
+
+        :param model: 模型名称。
+        :param requests: {custom_id: messages} 字典。
+        :return: {custom_id: (content, usage)}，失败的请求对应一个异常实例。
+        """
+        input_file_id = self._upload(self.build_jsonl(model, requests))
+        batch = self._post_json('/batches', {
+            'input_file_id': input_file_id,
+            'endpoint': CHAT_COMPLETIONS_ENDPOINT,
+            'completion_window': self.completion_window,
+        })
+        LOG.info(f"已提交 OpenAI 批处理任务 {batch['id']}，共 {len(requests)} 个请求。")
+        batch = self._wait(batch['id'])
+
+        if batch['status'] == 'failed':
+            raise RuntimeError(f"OpenAI 批处理任务 {batch['id']} 失败：{batch.get('errors')}")
+        results = {}
+        # 过期或取消的任务仍可能带有已完成部分的结果
+        for file_id in (batch.get('output_file_id'), batch.get('error_file_id')):
+            if file_id:
+                results.update(self.parse_results(self._download(file_id)))
+        for custom_id in requests:
+            if custom_id not in results:
+                results[custom_id] = RuntimeError(f"OpenAI 批处理任务 {batch['id']}（{batch['status']}）未返回该请求的结果")
+        return results
+
+    @staticmethod
+    def build_jsonl(model, requests):
+        # 每行一个请求，custom_id 用于把结果对应回调用方
+        lines = [json.dumps({
+            'custom_id': custom_id,
+            'method': 'POST',
+            'url': CHAT_COMPLETIONS_ENDPOINT,
+            'body': {'model': model, 'messages': messages},
+        }, ensure_ascii=False) for custom_id, messages in requests.items()]
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def parse_results(jsonl):
+        """
+        解析结果文件（或错误文件）：成功的请求返回 (content, usage)，失败的请求返回异常。
+        """
+        results = {}
+        for line in jsonl.splitlines():
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            response = item.get('response') or {}
+            body = response.get('body') or {}
+            if item.get('error') or response.get('status_code') != 200:
+                error = item.get('error') or body.get('error') or response.get('status_code')
+                results[item['custom_id']] = RuntimeError(f"批处理请求失败：{error}")
+                continue
+            results[item['custom_id']] = (body['choices'][0]['message']['content'], body.get('usage') or {})
+        return results
+
+    def _wait(self, batch_id):
+        # 轮询任务状态直到结束；超过本地等待上限时取消任务
+        deadline = self._clock() + self.max_wait
+        while True:
+            batch = self._get_json(f'/batches/{batch_id}')
+            if batch['status'] in FINISHED_STATUSES:
+                LOG.info(f"OpenAI 批处理任务 {batch_id} 已结束：{batch['status']}，{batch.get('request_counts')}")
+                return batch
+            if self._clock() >= deadline:
+                self._post_json(f'/batches/{batch_id}/cancel', {})
+                raise TimeoutError(f"OpenAI 批处理任务 {batch_id} 超过 {self.max_wait} 秒未完成，已取消")
+            LOG.debug(f"OpenAI 批处理任务 {batch_id} 状态：{batch['status']}")
+            self._sleep(self.poll_interval)
+
+    def _upload(self, jsonl):
+        response = self.http.post(f'{self.base_url}/files', headers=self._headers(), data={'purpose': 'batch'},
+                                  files={'file': ('batch.jsonl', jsonl.encode('utf-8'), 'application/jsonl')})
+        response.raise_for_status()
+        return response.json()['id']
+
+    def _download(self, file_id):
+        response = self.http.get(f'{self.base_url}/files/{file_id}/content', headers=self._headers())
+        response.raise_for_status()
+        return response.content.decode('utf-8')
+
+    def _get_json(self, path):
+        response = self.http.get(f'{self.base_url}{path}', headers=self._headers())
+        response.raise_for_status()
+        return response.json()
+
+    def _post_json(self, path, payload):
+        response = self.http.post(f'{self.base_url}{path}', headers=self._headers(), json=payload)
+        response.raise_for_status()
+        return response.json()
+
+    def _headers(self):
+        return {'Authorization': f'Bearer {self.api_key}'}
@@ -0,0 +1,121 @@
+import re  # 导入re模块用于识别列表项、前缀、标签和链接
+from chunker import estimate_tokens  # 导入 token 估算函数，用于统计压缩效果和控制小节预算
+
+HEADING_PATTERN = re.compile(r'^#{1,6}\s')
+ITEM_PATTERN = re.compile(r'^(?P<indent>\s*)(?P<marker>[-*]|\d+\.)\s+(?P<body>\S.*)$')
+# 约定式提交前缀，如 "docs:"、"feat(core):"、"fix!:"、"partners/chroma:"；不匹配 "https://" 和 "Ask HN:"
+PREFIX_PATTERN = re.compile(r'^(?P<prefix>[A-Za-z][\w./-]*(?:\([^)]*\))?!?):\s+(?P<rest>\S.*)$')
+LABELS_PATTERN = re.compile(r'\s+\[(?P<labels>[^\[\]]+)\]$')  # 导出时附在条目末尾的标签，如 "[bug, docs]"
+URL_PATTERN = re.compile(r'https?://[^\s)>\]]+')
+COMMENT_PATTERN = re.compile(r'<!--.*?-->', re.S)
+MIN_GROUP_SIZE = 2  # 至少有两个条目共享前缀或标签时才合并为一行
+
+
+def compact_markdown(text, section_token_budget=None):
+    """
+    在调用 LLM 之前确定性地压缩 Markdown 输入，减少提示处理时间：
+    - 去掉 HTML 注释、行尾空白和连续空行；
+    - 全文去重：带链接的条目按第一个链接去重，其余按规整后的文本去重（如每小时主题报告中重复的新闻）；
+    - 同一小节中共享约定式提交前缀（或第一个标签）的顶层条目合并为一行："- docs: 标题 #1; 标题 #2"；
+    - 每个小节（两个标题之间的内容）最多保留 section_token_budget 个 token 的条目，其余只注明省略数量。
+    链接、编号和标题保持不变。返回 (压缩后的文本, 统计)，统计包括压缩前后的 token 数。
+    """
+    tokens_before = estimate_tokens(text)
+    stats = {'duplicates': 0, 'grouped': 0, 'omitted': 0}
+    seen = set()
+    output = []
+    for section in _split_sections(COMMENT_PATTERN.sub('', text).splitlines()):
+        output.extend(_compact_section(section, seen, section_token_budget, stats))
+    while output and not output[-1]:
+        output.pop()
+    compacted = '\n'.join(output) + '\n'
+    stats.update(tokens_before=tokens_before, tokens_after=estimate_tokens(compacted))
+    return compacted, stats
+
+
+def _split_sections(lines):
+    # 以标题行为界切分小节，标题行属于其后的小节
+    sections = [[]]
+    for line in lines:
+        if HEADING_PATTERN.match(line) and sections[-1]:
+            sections.append([])
+        sections[-1].append(line)
+    return sections
+
+
+def _compact_section(lines, seen, budget, stats):
+    entries = []  # 字符串，或 ('group', 前缀) 表示该前缀的合并行出现的位置
+    groups = {}  # 前缀 -> [(去掉前缀的内容, 原始行)]
+    used = 0
+    omitted = 0
+    for line in lines:
+        line = line.rstrip()
+        if not line.strip():
+            if entries and entries[-1] != '':
+                entries.append('')  # 连续空行只保留一个
+            continue
+        match = ITEM_PATTERN.match(line)
+        if match is None:
+            entries.append(line)
+            continue
+        key = _dedupe_key(match.group('body'))
+        if key in seen:
+            stats['duplicates'] += 1
+            continue
+        seen.add(key)
+
+        group = _group_of(match) if not match.group('indent') and match.group('marker') in '-*' else None
+        cost = estimate_tokens(group[1] if group else line) + 1
+        if group and group[0] not in groups:
+            cost += estimate_tokens(group[0]) + 1
+        if omitted or (budget is not None and used + cost > budget):
+            omitted += 1  # 超出预算后，本小节其余条目全部省略，保留的始终是靠前的条目
+            continue
+        used += cost
+        if group is None:
+            entries.append(line)
+        else:
+            if group[0] not in groups:
+                groups[group[0]] = []
+                entries.append(('group', group[0]))
+            groups[group[0]].append((group[1], line))
+
+    result = []
+    for entry in entries:
+        if isinstance(entry, tuple):
+            items = groups[entry[1]]
+            if len(items) >= MIN_GROUP_SIZE:
+                stats['grouped'] += len(items)
+                result.append(f"- {entry[1]}: " + "; ".join(rest for rest, _ in items))
+            else:
+                result.extend(original for _, original in items)
+        else:
+            result.append(entry)
+    if omitted:
+        stats['omitted'] += omitted
+        while result and not result[-1]:
+            result.pop()
+        result.append(f"- ... {omitted} more items omitted")
+        result.append('')
+    return result
+
+
+def _dedupe_key(body):
+    # 带链接的条目按链接去重，否则按去掉编号、大小写和多余空白后的文本去重
+    url = URL_PATTERN.search(body)
+    if url:
+        return url.group(0).rstrip('/')
+    return ' '.join(body.lower().split())
+
+
+def _group_of(match):
+    # 返回 (分组键, 去掉分组键后的内容)：优先使用约定式提交前缀，其次使用第一个标签
+    body = match.group('body')
+    prefix = PREFIX_PATTERN.match(body)
+    if prefix:
+        return prefix.group('prefix'), prefix.group('rest')
+    labels = LABELS_PATTERN.search(body)
+    if labels:
+        first_label = labels.group('labels').split(',')[0].strip()
+        return f"[{first_label}]", body[:labels.start()]
+    return None
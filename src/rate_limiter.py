@@ -0,0 +1,143 @@
+import threading  # 导入threading模块保证多线程访问安全
+import time  # 导入time模块用于计时和等待
+from logger import LOG  # 导入日志模块
+
+SECONDARY_LIMIT_BACKOFF = 60  # 二级限流未给出 Retry-After 时暂停令牌的秒数（GitHub 建议至少等待一分钟）
+
+class TokenBucket:
+    """
+    令牌桶限速器：以 rate 个/秒的速度补充令牌，最多累积 capacity 个，用于平滑请求节奏。
+    """
+    def __init__(self, rate, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = float(rate)
+        self.capacity = float(capacity or rate)
+        self._tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated_at = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        # 取走一个令牌，桶空时阻塞到下一个令牌补充完成
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            self._sleep(wait)
+
+
+class RateLimitScheduler:
+    """
+    GitHub 请求调度器：跟踪令牌池中每个令牌的剩余配额（X-RateLimit-*），
+    每次把请求分配给剩余配额最多的可用令牌；所有令牌都耗尽时等待最早的重置时间，
+    遇到二级限流（Retry-After）时暂停对应令牌，而不是让请求直接失败。
+    """
+    def __init__(self, tokens, requests_per_second=10, burst=None, max_retries=3,
+                 clock=time.time, sleep=time.sleep):
+        tokens = [token for token in tokens if token]
+        if not tokens:
+            raise ValueError("令牌池为空，至少需要配置一个 GitHub 令牌")
+        self.max_retries = max_retries  # 被限流后最多重试的次数
+        self._clock = clock
+        self._sleep = sleep
+        self._bucket = TokenBucket(requests_per_second, burst, sleep=sleep)
+        self._lock = threading.Lock()
+        # 每个令牌的配额状态：remaining/limit 在收到第一个响应前未知（None）
+        self._states = {token: {'remaining': None, 'limit': None, 'reset_at': 0.0, 'blocked_until': 0.0}
+                        for token in tokens}
+
+    def acquire(self):
+        """
+        获取一个可用令牌，必要时等待限速或配额重置。
+        :return: 本次请求应使用的令牌。
+        """
+        self._bucket.acquire()
+        while True:
+            with self._lock:
+                now = self._clock()
+                available = [token for token, state in self._states.items() if self._is_available(state, now)]
+                if available:
+                    token = max(available, key=lambda t: self._estimated_remaining(self._states[t]))
+                    state = self._states[token]
+                    if state['remaining'] is not None:
+                        state['remaining'] = max(state['remaining'] - 1, 0)  # 预扣配额，避免并发请求超发
+                    return token
+                wait = min(self._available_at(state) for state in self._states.values()) - now
+            LOG.warning(f"所有 GitHub 令牌配额已耗尽，等待 {wait:.0f} 秒后重试")
+            self._sleep(max(wait, 1))
+
+    def update(self, token, response):
+        """
+        根据响应头更新令牌配额。
+        :return: 该响应是否因限流失败、需要重试。
+        """
+        headers = response.headers
+        now = self._clock()
+        with self._lock:
+            state = self._states[token]
+            if headers.get('X-RateLimit-Remaining') is not None:
+                state['remaining'] = int(headers['X-RateLimit-Remaining'])
+            if headers.get('X-RateLimit-Limit') is not None:
+                state['limit'] = int(headers['X-RateLimit-Limit'])
+            if headers.get('X-RateLimit-Reset') is not None:
+                state['reset_at'] = float(headers['X-RateLimit-Reset'])
+
+            if response.status_code not in (403, 429):
+                return False
+            if headers.get('Retry-After') is not None:
+                # 二级限流：在 Retry-After 指定的时间内暂停使用该令牌
+                state['blocked_until'] = now + int(headers['Retry-After'])
+                LOG.warning(f"令牌 {self._mask(token)} 触发二级限流，暂停 {headers['Retry-After']} 秒")
+                return True
+            if state['remaining'] == 0:
+                LOG.warning(f"令牌 {self._mask(token)} 配额耗尽，将于 {time.ctime(state['reset_at'])} 重置")
+                return True
+            if self._is_secondary_limit(response):
+                # 二级限流但未给出 Retry-After：按 GitHub 的建议至少暂停一分钟后重试
+                state['blocked_until'] = now + SECONDARY_LIMIT_BACKOFF
+                LOG.warning(f"令牌 {self._mask(token)} 触发二级限流，暂停 {SECONDARY_LIMIT_BACKOFF} 秒")
+                return True
+            return False  # 其他 403（如权限不足）不属于限流，不重试
+
+    def metrics(self):
+        """
+        导出每个令牌的配额指标，令牌本身只保留末四位。
+        """
+        with self._lock:
+            return {self._mask(token): {'remaining': state['remaining'],
+                                        'limit': state['limit'],
+                                        'reset_at': state['reset_at']}
+                    for token, state in self._states.items()}
+
+    def _is_available(self, state, now):
+        return self._available_at(state) <= now
+
+    @staticmethod
+    def _available_at(state):
+        # 令牌下一次可用的时间：二级限流解除时间，以及配额耗尽时的重置时间
+        available_at = state['blocked_until']
+        if state['remaining'] == 0:
+            available_at = max(available_at, state['reset_at'])
+        return available_at
+
+    @staticmethod
+    def _estimated_remaining(state):
+        # 尚未收到响应的令牌视为配额充足，优先使用以便尽快获知其真实配额
+        return float('inf') if state['remaining'] is None else state['remaining']
+
+    @staticmethod
+    def _is_secondary_limit(response):
+        # 429 总是限流；403 只有在错误信息提到二级限流时才是限流
+        if response.status_code == 429:
+            return True
+        text = response.text if isinstance(response.text, str) else ''
+        return 'secondary rate limit' in text.lower()
+
+    @staticmethod
+    def _mask(token):
+        return f"...{token[-4:]}"
@@ -1,10 +1,29 @@
 import os
+import re  # 导入re模块用于查找同一天的快照文件和复用标记
+import threading  # 导入threading模块保护主题报告复用统计
+from concurrent.futures import ThreadPoolExecutor  # 导入线程池用于并行摘要各个分块
+from chunker import estimate_tokens, split_markdown  # 导入按 token 估算切分 Markdown 的工具
+from prompt_compactor import compact_markdown  # 导入调用 LLM 前的确定性输入压缩
+from snapshot_similarity import snapshot_stories, jaccard  # 导入快照新闻条目解析与相似度计算
 from logger import LOG  # 导入日志模块
 
+OUTPUT_RESERVE_RATIO = 0.25  # 上下文窗口中预留给模型输出的比例
+MIN_CHUNK_TOKENS = 256  # 分块的最小 token 数，避免系统提示过长时切出过碎的块
+MAX_REDUCE_ROUNDS = 3  # 分块摘要合并后仍然超长时，最多再摘要的轮数
+SNAPSHOT_PATTERN = re.compile(r'^\d{2}\.md$')  # Hacker News 每小时快照的文件名，如 08.md
+REUSE_MARKER_PATTERN = re.compile(r'^<!-- reused from (?P<base>\d{2}\.md)')  # 复用的主题报告第一行
+REUSE_PATCH_HEADING = "## 新上榜"  # 复用的主题报告末尾补充的新出现新闻
+
 class ReportGenerator:
-    def __init__(self, llm, report_types):
+    def __init__(self, llm, report_types, story_index=None, max_map_workers=4, compaction=None, topic_reuse=None):
         self.llm = llm  # 初始化时接受一个LLM实例，用于后续生成报告
         self.report_types = report_types
+        self.story_index = story_index  # 可选的 StoryIndex 实例，启用后每日汇总直接使用当天的去重新闻
+        self.max_map_workers = max_map_workers  # 并行摘要分块的最大线程数（实际并发仍受模型服务配额限制）
+        self.compaction = compaction or {}  # 输入压缩配置：enabled、section_token_budget
+        self.topic_reuse = topic_reuse or {}  # 主题报告复用配置：enabled、similarity_threshold
+        self._topic_counts = {'generated': 0, 'reused': 0}  # 本进程生成与复用的主题报告数
+        self._topic_lock = threading.Lock()
         self.prompts = {}  # 存储所有预加载的提示信息
         self._preload_prompts()
 
@@ -20,15 +39,18 @@ class ReportGenerator:
             with open(prompt_file, "r", encoding='utf-8') as file:
                 self.prompts[report_type] = file.read()
 
-    def generate_github_report(self, markdown_file_path):
+    def generate_github_report(self, markdown_file_path, use_cache=True):
         """
         生成 GitHub 项目的报告，并保存为 {original_filename}_report.md。
+        use_cache 为 False 时跳过 LLM 响应缓存，强制重新生成。
         """
         with open(markdown_file_path, 'r') as file:
             markdown_content = file.read()
 
         system_prompt = self.prompts.get("github")
-        report = self.llm.generate_report(system_prompt, markdown_content)
+        tags = self._tags("github", self._repo_of(markdown_file_path))
+        markdown_content = self._prepare_input(system_prompt, markdown_content, use_cache, tags)
+        report = self.llm.generate_report(system_prompt, markdown_content, use_cache=use_cache, tags=tags)
         
         report_file_path = os.path.splitext(markdown_file_path)[0] + "_report.md"
         with open(report_file_path, 'w+') as report_file:
@@ -37,24 +59,163 @@ class ReportGenerator:
         LOG.info(f"GitHub 项目报告已保存到 {report_file_path}")
         return report, report_file_path
 
-    def generate_hn_topic_report(self, markdown_file_path):
+    def generate_github_reports_batch(self, markdown_file_paths, use_cache=True):
+        """
+        以批处理方式生成多个 GitHub 项目的报告（需启用 LLM 批处理模式），分别保存为 {original_filename}_report.md。
+        返回 {markdown_file_path: (report, report_file_path)}，生成失败的文件对应一个异常实例。
+        """
+        system_prompt = self.prompts.get("github")
+        requests = {}
+        for markdown_file_path in markdown_file_paths:
+            with open(markdown_file_path, 'r') as file:
+                markdown_content = file.read()
+            tags = self._tags("github", self._repo_of(markdown_file_path))
+            markdown_content = self._prepare_input(system_prompt, markdown_content, use_cache, tags)
+            requests[markdown_file_path] = (system_prompt, markdown_content, tags)
+
+        results = {}
+        for markdown_file_path, report in self.llm.generate_reports_batch(requests, use_cache=use_cache).items():
+            if isinstance(report, Exception):
+                results[markdown_file_path] = report
+                continue
+            report_file_path = os.path.splitext(markdown_file_path)[0] + "_report.md"
+            with open(report_file_path, 'w+') as report_file:
+                report_file.write(report)
+            LOG.info(f"GitHub 项目报告已保存到 {report_file_path}")
+            results[markdown_file_path] = (report, report_file_path)
+        return results
+
+    def stream_github_report(self, markdown_file_path, use_cache=True):
+        """
+        流式生成 GitHub 项目的报告：边接收模型输出边写入 {original_filename}_report.md，
+        每收到一段文本产出一次 (当前已生成的报告, 报告文件路径)。
+        """
+        with open(markdown_file_path, 'r') as file:
+            markdown_content = file.read()
+
+        report_file_path = os.path.splitext(markdown_file_path)[0] + "_report.md"
+        tags = self._tags("github", self._repo_of(markdown_file_path))
+        yield from self._stream_to_file(self.prompts.get("github"), markdown_content, report_file_path, use_cache, tags)
+        LOG.info(f"GitHub 项目报告已保存到 {report_file_path}")
+
+    def generate_hn_topic_report(self, markdown_file_path, use_cache=True):
         """
         生成 Hacker News 小时主题的报告，并保存为 {original_filename}_topic.md。
         """
         with open(markdown_file_path, 'r') as file:
             markdown_content = file.read()
 
-        system_prompt = self.prompts.get("hacker_news_hours_topic")
-        report = self.llm.generate_report(system_prompt, markdown_content)
-        
         report_file_path = os.path.splitext(markdown_file_path)[0] + "_topic.md"
+        report = self._reuse_topic_report(markdown_file_path, markdown_content) if use_cache else None
+        if report is None:
+            system_prompt = self.prompts.get("hacker_news_hours_topic")
+            tags = self._tags("hacker_news_hours_topic", self._hour_of(markdown_file_path))
+            markdown_content = self._prepare_input(system_prompt, markdown_content, use_cache, tags)
+            report = self.llm.generate_report(system_prompt, markdown_content, use_cache=use_cache, tags=tags)
+            self._count_topic_report('generated')
+
         with open(report_file_path, 'w+') as report_file:
             report_file.write(report)
 
         LOG.info(f"Hacker News 热点主题报告已保存到 {report_file_path}")
         return report, report_file_path
 
-    def generate_hn_daily_report(self, directory_path):
+    def _reuse_topic_report(self, markdown_file_path, markdown_content):
+        """
+        首页与同一天最近一次由 LLM 生成主题报告的快照相比几乎没有变化时（新闻标题集合的 Jaccard 相似度
+        不低于 similarity_threshold），复用那份主题报告，只在末尾列出新上榜的新闻，不再调用 LLM。
+        始终与实际生成报告的快照比较，连续复用不会累积偏差；每天第一份主题报告总是完整生成。
+        不满足复用条件时返回 None。
+        """
+        if not self.topic_reuse.get('enabled', False):
+            return None
+        base = self._topic_base_snapshot(markdown_file_path)
+        if base is None:
+            return None
+        base_snapshot_path, base_report = base
+        with open(base_snapshot_path, 'r') as file:
+            base_stories = snapshot_stories(file.read())
+        stories = snapshot_stories(markdown_content)
+        similarity = jaccard(base_stories, stories)
+        threshold = self.topic_reuse.get('similarity_threshold', 0.8)
+        if similarity < threshold:
+            LOG.info(f"[{self._hour_of(markdown_file_path)}] 首页与 {os.path.basename(base_snapshot_path)} "
+                     f"的相似度 {similarity:.2f} 低于 {threshold}，重新生成主题报告。")
+            return None
+
+        report = f"<!-- reused from {os.path.basename(base_snapshot_path)} (similarity {similarity:.2f}) -->\n{base_report}"
+        new_stories = [line for key, line in stories.items() if key not in base_stories]
+        if new_stories:
+            report = report.rstrip('\n') + f"\n\n{REUSE_PATCH_HEADING}\n" + "\n".join(new_stories) + "\n"
+        counts = self._count_topic_report('reused')
+        LOG.info(f"[{self._hour_of(markdown_file_path)}] 首页与 {os.path.basename(base_snapshot_path)} 的相似度 "
+                 f"{similarity:.2f}，复用其主题报告并补充 {len(new_stories)} 条新上榜新闻；"
+                 f"主题报告跳过率 {counts['reused']}/{counts['generated'] + counts['reused']}")
+        return report
+
+    @staticmethod
+    def _topic_base_snapshot(markdown_file_path):
+        # 同一天中当前快照之前最近一份主题报告所对应的、实际由 LLM 生成报告的快照：(快照路径, 报告正文)
+        directory, filename = os.path.split(markdown_file_path)
+        earlier = sorted(name for name in os.listdir(directory or '.')
+                         if SNAPSHOT_PATTERN.match(name) and name < filename)
+        for name in reversed(earlier):
+            topic_path = os.path.join(directory, os.path.splitext(name)[0] + "_topic.md")
+            if not os.path.exists(topic_path):
+                continue
+            with open(topic_path, 'r') as file:
+                report = file.read()
+            marker = REUSE_MARKER_PATTERN.match(report)
+            if marker is None:
+                return os.path.join(directory, name), report
+            # 复用的报告：回到它所复用的报告，去掉复用标记和补充的新上榜新闻
+            base_topic_path = os.path.join(directory, os.path.splitext(marker.group('base'))[0] + "_topic.md")
+            if not os.path.exists(base_topic_path):
+                return None
+            with open(base_topic_path, 'r') as file:
+                return os.path.join(directory, marker.group('base')), file.read()
+        return None
+
+    def _count_topic_report(self, outcome):
+        with self._topic_lock:
+            self._topic_counts[outcome] += 1
+            return dict(self._topic_counts)
+
+    def topic_reuse_metrics(self):
+        """
+        返回本进程生成与复用的主题报告数，以及跳过 LLM 的比例 skip_rate。
+        """
+        with self._topic_lock:
+            counts = dict(self._topic_counts)
+        total = counts['generated'] + counts['reused']
+        counts['skip_rate'] = round(counts['reused'] / total, 3) if total else 0.0
+        return counts
+
+    def stream_hn_topic_report(self, markdown_file_path, use_cache=True):
+        """
+        流式生成 Hacker News 小时主题的报告，边接收边写入 {original_filename}_topic.md。
+        """
+        with open(markdown_file_path, 'r') as file:
+            markdown_content = file.read()
+
+        report_file_path = os.path.splitext(markdown_file_path)[0] + "_topic.md"
+        tags = self._tags("hacker_news_hours_topic", self._hour_of(markdown_file_path))
+        yield from self._stream_to_file(self.prompts.get("hacker_news_hours_topic"), markdown_content,
+                                        report_file_path, use_cache, tags)
+        LOG.info(f"Hacker News 热点主题报告已保存到 {report_file_path}")
+
+    def _stream_to_file(self, system_prompt, markdown_content, report_file_path, use_cache, tags):
+        # 每段文本立即写入并刷新到文件，同时产出累计的报告内容；超长输入先完成分块摘要，只流式输出最终报告
+        markdown_content = self._prepare_input(system_prompt, markdown_content, use_cache, tags)
+        report = ""
+        with open(report_file_path, 'w+') as report_file:
+            for chunk in self.llm.stream_report(system_prompt, markdown_content, use_cache=use_cache, tags=tags):
+                report_file.write(chunk)
+                report_file.flush()
+                report += chunk
+                yield report, report_file_path
+
+    def generate_hn_daily_report(self, directory_path, use_cache=True):
         """
         生成 Hacker News 每日汇总的报告，并保存到 hacker_news/tech_trends/ 目录下。
         这里的输入是一个目录路径，其中包含所有由 generate_hn_topic_report 生成的 *_topic.md 文件。
@@ -68,7 +229,9 @@ class ReportGenerator:
         # 确保 tech_trends 目录存在
         os.makedirs(os.path.dirname(report_file_path), exist_ok=True)
         
-        report = self.llm.generate_report(system_prompt, markdown_content)
+        tags = self._tags("hacker_news_daily_report", base_name)
+        markdown_content = self._prepare_input(system_prompt, markdown_content, use_cache, tags)
+        report = self.llm.generate_report(system_prompt, markdown_content, use_cache=use_cache, tags=tags)
         
         with open(report_file_path, 'w+') as report_file:
             report_file.write(report)
@@ -77,15 +240,102 @@ class ReportGenerator:
         return report, report_file_path
 
 
+    def _prepare_input(self, system_prompt, markdown_content, use_cache, tags):
+        # 调用 LLM 前的输入处理：先按配置压缩，再保证放得下模型上下文
+        if self.compaction.get('enabled', False):
+            markdown_content, stats = self.compact(markdown_content, self._chunk_budget(system_prompt))
+            LOG.info(f"[{tags['subject']}] 输入压缩：{stats['tokens_before']} -> {stats['tokens_after']} tokens"
+                     f"（去重 {stats['duplicates']} 条，合并 {stats['grouped']} 条，省略 {stats['omitted']} 条）")
+        return self._fit_to_context(system_prompt, markdown_content, use_cache, tags)
+
+    def compact(self, markdown_content, token_limit=None):
+        """
+        压缩 Markdown 输入，返回 (压缩后的文本, 统计)，统计包括压缩前后的 token 数。
+        去重与合并不丢失信息，总是执行；配置了小节预算时，只有去重合并后仍超过 token_limit
+        （本次请求的输入上限，None 表示不限）才按预算省略条目，放得下的输入保留全部条目。
+        """
+        compacted, stats = compact_markdown(markdown_content)
+        section_token_budget = self.compaction.get('section_token_budget')
+        if section_token_budget and (token_limit is None or stats['tokens_after'] > token_limit):
+            compacted, stats = compact_markdown(markdown_content, section_token_budget)
+        return compacted, stats
+
+    def _fit_to_context(self, system_prompt, markdown_content, use_cache, tags=None):
+        """
+        输入超过模型上下文时做 map-reduce：按 token 预算切块，用同一提示并行摘要各块，
+        再把各块摘要拼接为最终一次生成的输入；拼接结果仍然超长时继续摘要，直到放得下。
+        输入本来就放得下时原样返回。
+        """
+        budget = self._chunk_budget(system_prompt)
+        for _ in range(MAX_REDUCE_ROUNDS):
+            if estimate_tokens(markdown_content) <= budget:
+                return markdown_content
+            chunks = split_markdown(markdown_content, budget)
+            LOG.info(f"输入约 {estimate_tokens(markdown_content)} 个 token，超过上限 {budget}，切分为 {len(chunks)} 块分别摘要。")
+            with ThreadPoolExecutor(max_workers=min(len(chunks), self.max_map_workers)) as executor:
+                summaries = list(executor.map(
+                    lambda chunk: self.llm.generate_report(system_prompt, chunk, use_cache=use_cache, tags=tags),
+                    chunks))
+            markdown_content = "\n\n".join(summaries)
+        if estimate_tokens(markdown_content) > budget:
+            markdown_content, omitted = self._truncate(markdown_content, budget)
+            LOG.warning(f"经过 {MAX_REDUCE_ROUNDS} 轮摘要后输入仍超过上限，截断到 {budget} 个 token，省略 {omitted} 条。")
+        return markdown_content
+
+    @staticmethod
+    def _truncate(markdown_content, budget):
+        """
+        截断到 budget 以内，并在末尾注明省略的条目数（与输入压缩的省略说明一致），
+        避免模型把不完整的数据当作全部内容。返回 (截断后的文本, 省略的条目数)。
+        """
+        note = "\n\n- ... {} more items omitted (input truncated to fit the model context)"
+        chunks = split_markdown(markdown_content, max(budget - estimate_tokens(note.format(0)) - 4, 1))
+        # 后续块开头重复的文档标题和小节标题不计入省略条目数
+        omitted = sum(1 for chunk in chunks[1:] for line in chunk.splitlines()
+                      if line.strip() and not line.startswith('#'))
+        return chunks[0] + note.format(omitted), omitted
+
+    @staticmethod
+    def _tags(report_type, subject):
+        # LLM 调用指标的标签：报告类型和主题（仓库、小时或日期）
+        return {'report_type': report_type, 'subject': subject}
+
+    @staticmethod
+    def _repo_of(markdown_file_path):
+        # GitHub 进展文件保存在 daily_progress/{owner}_{repo}/ 下，目录名即仓库
+        directory = os.path.basename(os.path.dirname(markdown_file_path))
+        return directory or os.path.splitext(os.path.basename(markdown_file_path))[0]
+
+    @staticmethod
+    def _hour_of(markdown_file_path):
+        # Hacker News 快照保存为 hacker_news/{date}/{hour}.md，主题取 {date}/{hour}
+        date = os.path.basename(os.path.dirname(markdown_file_path))
+        hour = os.path.splitext(os.path.basename(markdown_file_path))[0]
+        return f"{date}/{hour}" if date else hour
+
+    def _chunk_budget(self, system_prompt):
+        # 每次请求中用户内容可用的 token 数：上下文窗口减去系统提示和预留的输出长度
+        context_window = self.llm.context_window
+        budget = int(context_window * (1 - OUTPUT_RESERVE_RATIO)) - estimate_tokens(system_prompt)
+        return max(budget, MIN_CHUNK_TOKENS)
+
     def _aggregate_topic_reports(self, directory_path):
         """
         聚合目录下所有以 '_topic.md' 结尾的 Markdown 文件内容，生成每日汇总报告的输入。
+        启用新闻索引时改为从索引取出当天出现过的去重新闻，不再重复读取每小时的快照。
         """
+        if self.story_index is not None:
+            return self.story_index.daily_markdown(os.path.basename(directory_path.rstrip('/')))
         markdown_content = ""
         for filename in os.listdir(directory_path):
             if filename.endswith("_topic.md"):
                 with open(os.path.join(directory_path, filename), 'r') as file:
-                    markdown_content += file.read() + "\n"
+                    report = file.read()
+                if REUSE_MARKER_PATTERN.match(report):
+                    # 复用的主题报告与原报告正文相同，只取补充的新上榜新闻
+                    _, _, patch = report.partition(REUSE_PATCH_HEADING)
+                    report = REUSE_PATCH_HEADING + patch if patch else ""
+                markdown_content += report + "\n"
         return markdown_content
 
 
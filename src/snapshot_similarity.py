@@ -0,0 +1,32 @@
+import re  # 导入re模块用于解析快照中的新闻条目
+
+# 快照中的新闻条目："1. [标题](链接) (元数据)"，或早期启用索引时不带链接的 "3. 标题 (rank 5 -> 3)"
+LINKED_ITEM_PATTERN = re.compile(r'^\d+\.\s+\[(?P<title>[^\]]+)\]\((?P<link>[^)\s]+)\)')
+PLAIN_ITEM_PATTERN = re.compile(r'^\d+\.\s+(?P<title>.+?)(?:\s+\(rank \d+ -> \d+\))?$')
+
+
+def snapshot_stories(markdown):
+    """
+    从 Hacker News 快照（export_top_stories 生成的 Markdown）中取出新闻条目，
+    返回 {规整后的标题: 条目行}。带链接的条目行写成 "- [标题](链接)"，否则只有标题。
+    两种快照格式中同一新闻的标题相同，因此以标题作为比较的键。
+    """
+    stories = {}
+    for line in markdown.splitlines():
+        match = LINKED_ITEM_PATTERN.match(line) or PLAIN_ITEM_PATTERN.match(line)
+        if match is None:
+            continue
+        title = match.group('title').strip()
+        key = ' '.join(title.lower().split())
+        link = match.groupdict().get('link')
+        if link or key not in stories:  # 同一新闻出现两次时保留带链接的写法
+            stories[key] = f"- [{title}]({link})" if link else f"- {title}"
+    return stories
+
+
+def jaccard(a, b):
+    # 两个集合的 Jaccard 相似度；两个都为空时视为完全相同
+    a, b = set(a), set(b)
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
@@ -0,0 +1,133 @@
+import os  # 导入os模块用于创建存储目录
+import sqlite3  # 导入sqlite3用于本地持久化
+import threading  # 导入threading模块保证多线程访问安全
+from datetime import datetime  # 导入日期处理模块
+from urllib.parse import urljoin  # 导入urljoin用于补全站内相对链接
+from logger import LOG  # 导入日志模块
+
+HN_BASE_URL = 'https://news.ycombinator.com/'  # HTML 抓取得到的 Ask HN 等站内链接是相对路径
+
+
+def story_key(story):
+    # 新闻的唯一标识：有 HN 条目 ID 时使用 ID，否则使用补全后的链接
+    if story.get('id') is not None:
+        return f"item:{story['id']}"
+    return urljoin(HN_BASE_URL, story['link'])
+
+
+class StoryIndex:
+    """
+    Hacker News 新闻索引（SQLite，WAL 模式）：按条目 ID 或链接记录每条新闻的首次/最后出现时间、出现次数，
+    以及排名和分数的变化轨迹。每次快照只为新出现或排名、分数发生变化的新闻追加轨迹记录，
+    同时按天累计每条新闻当天的出现次数、最佳排名和最高分数，可以直接取出某天出现过的去重新闻。
+    """
+    def __init__(self, path='data/hn_stories.db'):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)  # 确保存储目录存在
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS stories ("
+                " story_key TEXT PRIMARY KEY, title TEXT, link TEXT, first_seen TEXT, last_seen TEXT,"
+                " snapshots INTEGER, last_rank INTEGER, best_rank INTEGER, last_score INTEGER, max_score INTEGER)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS observations ("
+                " story_key TEXT, seen_at TEXT, rank INTEGER, score INTEGER,"
+                " PRIMARY KEY (story_key, seen_at))"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS story_days ("
+                " story_key TEXT, day TEXT, snapshots INTEGER, best_rank INTEGER, max_score INTEGER,"
+                " PRIMARY KEY (story_key, day))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_stories_last_seen ON stories(last_seen)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_story_days_day ON story_days(day)")
+
+    def record_snapshot(self, stories, seen_at=None):
+        """
+        记录一次快照，返回 (story, previous_rank) 列表：previous_rank 为 None 表示首次出现。
+        :param stories: 按排名排序的新闻列表。
+        """
+        seen_at = seen_at or datetime.now().strftime('%Y-%m-%dT%H:%M:%S')
+        delta = []
+        with self._lock:
+            with self._conn:
+                for rank, story in enumerate(stories, start=1):
+                    key = story_key(story)
+                    score = story.get('score')
+                    row = self._conn.execute(
+                        "SELECT last_rank, last_score FROM stories WHERE story_key = ?", (key,)
+                    ).fetchone()
+                    if row is None:
+                        self._conn.execute(
+                            "INSERT INTO stories (story_key, title, link, first_seen, last_seen, snapshots,"
+                            " last_rank, best_rank, last_score, max_score) VALUES (?, ?, ?, ?, ?, 1, ?, ?, ?, ?)",
+                            (key, story['title'], urljoin(HN_BASE_URL, story['link']), seen_at, seen_at,
+                             rank, rank, score, score)
+                        )
+                    else:
+                        self._conn.execute(
+                            "UPDATE stories SET title = ?, last_seen = ?, snapshots = snapshots + 1, last_rank = ?,"
+                            " best_rank = MIN(best_rank, ?), last_score = ?, max_score = MAX(IFNULL(max_score, ?), ?)"
+                            " WHERE story_key = ?",
+                            (story['title'], seen_at, rank, rank, score, score, score, key)
+                        )
+                    # 按天累计：当天出现次数、当天最佳排名和最高分数
+                    self._conn.execute(
+                        "INSERT INTO story_days (story_key, day, snapshots, best_rank, max_score) VALUES (?, ?, 1, ?, ?)"
+                        " ON CONFLICT (story_key, day) DO UPDATE SET snapshots = snapshots + 1,"
+                        " best_rank = MIN(best_rank, excluded.best_rank),"
+                        " max_score = MAX(IFNULL(max_score, excluded.max_score), IFNULL(excluded.max_score, max_score))",
+                        (key, seen_at[:10], rank, score)
+                    )
+                    # 轨迹只记录变化：排名和分数都未变化时不追加
+                    if row is None or (row[0], row[1]) != (rank, score):
+                        self._conn.execute(
+                            "INSERT OR REPLACE INTO observations (story_key, seen_at, rank, score) VALUES (?, ?, ?, ?)",
+                            (key, seen_at, rank, score)
+                        )
+                    delta.append((story, row[0] if row else None))
+        LOG.debug(f"新闻索引记录快照 {seen_at}：{sum(1 for _, previous in delta if previous is None)} 条新出现")
+        return delta
+
+    def trajectory(self, story):
+        """
+        返回新闻的排名和分数轨迹 [(seen_at, rank, score)]，按时间排序。
+        """
+        with self._lock:
+            return self._conn.execute(
+                "SELECT seen_at, rank, score FROM observations WHERE story_key = ? ORDER BY seen_at",
+                (story_key(story),)
+            ).fetchall()
+
+    def stories_seen_on(self, day):
+        """
+        返回某天至少出现在一次快照中的去重新闻，按当天的最佳排名、出现次数排序。
+        snapshots、best_rank、max_score 均为当天的统计，first_seen、last_seen 为全部历史。
+        :param day: 'YYYY-MM-DD' 格式的日期。
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT s.title, s.link, s.first_seen, s.last_seen, d.snapshots, d.best_rank, d.max_score"
+                " FROM story_days d JOIN stories s ON s.story_key = d.story_key"
+                " WHERE d.day = ? ORDER BY d.best_rank, d.snapshots DESC",
+                (day,)
+            ).fetchall()
+        columns = ('title', 'link', 'first_seen', 'last_seen', 'snapshots', 'best_rank', 'max_score')
+        return [dict(zip(columns, row)) for row in rows]
+
+    def daily_markdown(self, day):
+        """
+        把某天出现过的去重新闻渲染为每日汇总报告的输入，出现次数反映话题热度。
+        """
+        lines = [f"# Hacker News Stories ({day})\n"]
+        for story in self.stories_seen_on(day):
+            score = f", max {story['max_score']} points" if story['max_score'] is not None else ""
+            lines.append(f"- [{story['title']}]({story['link']}) (best rank {story['best_rank']}, "
+                         f"seen in {story['snapshots']} snapshots{score})")
+        return "\n".join(lines) + "\n"
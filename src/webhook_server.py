@@ -0,0 +1,165 @@
+import hashlib  # 导入hashlib模块用于计算签名摘要
+import hmac  # 导入hmac模块用于校验 Webhook 签名
+import json  # 导入json模块用于解析事件负载
+import threading  # 导入threading模块在后台线程中运行接收服务
+from datetime import datetime, timezone  # 导入日期处理模块，把提交时间转换为 UTC
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer  # 导入标准库HTTP服务，无需额外依赖
+from event_store import utc_timestamp  # 导入时间戳格式化函数
+from github_records import CommitRecord, IssueRecord, PullRequestRecord, is_pull_request  # 导入精简记录类型
+from logger import LOG  # 导入日志模块
+
+SIGNATURE_HEADER = 'X-Hub-Signature-256'  # GitHub 使用 HMAC-SHA256 签名的请求头
+EVENT_HEADER = 'X-GitHub-Event'  # 事件类型请求头
+DELIVERY_HEADER = 'X-GitHub-Delivery'  # 推送编号请求头
+MAX_BODY_BYTES = 25 * 1024 * 1024  # GitHub 单次推送负载的上限为 25 MB
+
+
+def sign(secret, body):
+    """
+    按 GitHub 的规则计算负载签名，也可用于在本地回放事件时构造请求头。
+    """
+    return 'sha256=' + hmac.new(secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+
+
+def verify_signature(secret, body, signature):
+    # 使用常量时间比较，避免通过响应时间推测签名
+    return bool(signature) and hmac.compare_digest(sign(secret, body), signature)
+
+
+def commit_timestamp(timestamp):
+    # push 事件中的提交时间带有提交者的本地时区（如 -04:00），转换为与存储中其他记录一致的 UTC 时间戳
+    if not timestamp:
+        return timestamp
+    moment = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return utc_timestamp(moment.astimezone(timezone.utc))
+
+
+def records_from_event(event, payload):
+    """
+    将 Webhook 事件负载转换为 (resource, 记录列表)，不关心的事件返回 None。
+    """
+    if event == 'issues' and not is_pull_request(payload['issue']):
+        return 'issues', [IssueRecord.from_api(payload['issue'])]
+    if event == 'pull_request':
+        return 'pull_requests', [PullRequestRecord.from_api(payload['pull_request'])]
+    if event == 'push':
+        # 轮询只获取默认分支的提交，推送到其他分支的提交同样忽略
+        default_branch = payload['repository'].get('default_branch')
+        if payload.get('ref') != f'refs/heads/{default_branch}':
+            return None
+        return 'commits', [CommitRecord(sha=commit['id'], message=commit.get('message'),
+                                        author=(commit.get('author') or {}).get('name'),
+                                        date=commit_timestamp(commit.get('timestamp')), html_url=commit.get('url'))
+                           for commit in payload.get('commits') or []]
+    return None
+
+
+class WebhookReceiver:
+    """
+    处理 GitHub Webhook 推送（issues、pull_request、push）：校验签名后将事件追加到本地存储，
+    并记录仓库最近一次收到推送的时间，供守护进程判断是否可以跳过该仓库的 REST 轮询。
+    """
+    def __init__(self, store, secret):
+        if not secret:
+            raise ValueError("未配置 Webhook 密钥，拒绝接收未签名的推送")
+        self.store = store  # EventStore 实例
+        self.secret = secret  # 在 GitHub 仓库 Webhook 设置中填写的密钥
+
+    def handle(self, event, body, signature, delivery=None):
+        """
+        处理一次推送，返回 (HTTP 状态码, 说明)。
+        """
+        if not verify_signature(self.secret, body, signature):
+            LOG.warning(f"Webhook 推送 {delivery} 签名校验失败")
+            return 401, 'invalid signature'
+        try:
+            payload = json.loads(body)
+            repo = payload['repository']['full_name']
+        except (ValueError, KeyError, TypeError):
+            return 400, 'malformed payload'
+
+        self.store.record_webhook_delivery(repo, event, utc_timestamp())  # ping 等事件同样说明推送链路正常
+        converted = records_from_event(event, payload)
+        if converted is None:
+            return 202, 'ignored'
+        resource, records = converted
+        if resource != 'commits':
+            # 与轮询一致只保存已关闭（含已合并）的 Issue / Pull Request；打开或重新打开的从存储中删除
+            reopened = [record for record in records if record['state'] != 'closed']
+            records = [record for record in records if record['state'] == 'closed']
+            if reopened:
+                self.store.remove(repo, resource, reopened)
+        if records:
+            self.store.append(repo, resource, records)
+        LOG.debug(f"[{repo}] 收到 Webhook 事件 {event}（{delivery}），写入 {len(records)} 条 {resource}")
+        return 200, 'ok'
+
+
+class WebhookServer:
+    """
+    基于标准库 ThreadingHTTPServer 的轻量接收服务，在后台线程中运行。
+    """
+    def __init__(self, receiver, host='0.0.0.0', port=8080):
+        self.receiver = receiver
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._thread = None
+
+    @property
+    def server_address(self):
+        return self.httpd.server_address  # 端口为 0 时返回实际监听的端口
+
+    def _handler_class(self):
+        receiver = self.receiver
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                if length > MAX_BODY_BYTES:
+                    return self._reply(413, 'payload too large')
+                body = self.rfile.read(length)
+                try:
+                    status, message = receiver.handle(self.headers.get(EVENT_HEADER), body,
+                                                      self.headers.get(SIGNATURE_HEADER),
+                                                      self.headers.get(DELIVERY_HEADER))
+                except Exception as e:
+                    LOG.error(f"Webhook 推送处理失败：{str(e)}")
+                    status, message = 500, 'internal error'
+                self._reply(status, message)
+
+            def _reply(self, status, message):
+                body = message.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/plain; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                LOG.debug(f"Webhook 请求：{format % args}")  # 使用统一的日志模块，而不是写入标准错误
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        LOG.info(f"Webhook 接收服务已启动：{self.server_address}")
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+
+def create_webhook_server(config, store):
+    """
+    根据配置创建 Webhook 接收服务，未启用 Webhook 或未启用本地存储时返回 None。
+    """
+    webhook = config.github_webhook
+    if not webhook.get('enabled', False) or store is None:
+        return None
+    receiver = WebhookReceiver(store, config.github_webhook_secret)
+    return WebhookServer(receiver, webhook.get('host', '0.0.0.0'), webhook.get('port', 8080))
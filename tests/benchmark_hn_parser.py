@@ -0,0 +1,46 @@
+"""
+Hacker News 列表页解析的微基准：对比原先的整页 html.parser 解析与各个可用后端的耗时，并校验输出一致。
+
+用法：python tests/benchmark_hn_parser.py [已保存的 HN 页面 ...]
+未指定页面时使用 tests/fixtures/hn_front_page.html。
+"""
+import sys
+import os
+import timeit
+from bs4 import BeautifulSoup
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from hn_parser import PARSERS, available_parsers, parse_stories  # 导入要对比的解析后端
+
+DEFAULT_PAGE = os.path.join(os.path.dirname(__file__), 'fixtures', 'hn_front_page.html')
+
+
+def parse_full_tree(html_content):
+    # 原先的实现：用纯 Python 的 html.parser 构建整页文档树
+    soup = BeautifulSoup(html_content, 'html.parser')
+    stories = []
+    for story in soup.find_all('tr', class_='athing'):
+        title_tag = story.find('span', class_='titleline').find('a')
+        if title_tag:
+            stories.append({'title': title_tag.text, 'link': title_tag['href']})
+    return stories
+
+
+def benchmark(html_content, number=50):
+    expected = parse_full_tree(html_content)
+    baseline = min(timeit.repeat(lambda: parse_full_tree(html_content), number=number, repeat=3)) / number
+    print(f"{'html.parser (整页)':<20}{baseline * 1000:8.2f} ms   1.0x   {len(expected)} 条")
+    for name in available_parsers():
+        parser = PARSERS[name]
+        assert parse_stories(html_content, parser) == expected, f"{name} 的输出与原实现不一致"
+        elapsed = min(timeit.repeat(lambda: parse_stories(html_content, parser), number=number, repeat=3)) / number
+        print(f"{name:<20}{elapsed * 1000:8.2f} ms {baseline / elapsed:5.1f}x")
+
+
+if __name__ == '__main__':
+    for path in sys.argv[1:] or [DEFAULT_PAGE]:
+        with open(path, encoding='utf-8') as file:
+            print(f"# {path}")
+            benchmark(file.read())
@@ -0,0 +1,108 @@
+import sys
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from article_extractor import ArticleCache, ArticleExtractor, extract_main_text  # 导入要测试的文章提取器
+from http_transport import HTTPTransport  # 导入HTTP传输层，测试中关闭重试
+
+PARAGRAPH = "Rust makes small string optimizations practical without giving up memory safety."
+ARTICLE = f"""<html><head><script>var tracking = 1;</script></head><body>
+<nav><p>Home | About | Subscribe to our newsletter for more updates</p></nav>
+<article><h1>Small strings</h1><p>{PARAGRAPH}</p><p>Share</p></article>
+<footer><p>Copyright 2024 Example Blog. All rights reserved worldwide.</p></footer></body></html>"""
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    # 本地替身服务：返回文章、超大页面、PDF 和错误状态，并记录每个路径的请求次数
+    requests = {}
+
+    def do_GET(self):
+        StandInHandler.requests[self.path] = StandInHandler.requests.get(self.path, 0) + 1
+        if self.path in ('/missing', '/flaky'):
+            self.send_error(404 if self.path == '/missing' else 503)
+            return
+        if self.path == '/article':
+            body, content_type = ARTICLE.encode('utf-8'), 'text/html; charset=utf-8'
+        elif self.path == '/huge':
+            body, content_type = (f"<p>{PARAGRAPH}</p>" * 1000).encode('utf-8'), 'text/html'
+        else:
+            body, content_type = b'%PDF-1.4', 'application/pdf'
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestArticleExtractor(unittest.TestCase):
+    def setUp(self):
+        """
+        在每个测试方法之前运行，启动本地替身服务并创建临时缓存。
+        """
+        StandInHandler.requests = {}
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        self.base_url = 'http://127.0.0.1:%d' % self.httpd.server_address[1]
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache = ArticleCache(os.path.join(self.tmp_dir, 'articles.db'), ttl_hours=1)
+        self.extractor = ArticleExtractor(self.cache, HTTPTransport(max_retries=0), max_workers=4, max_bytes=4096)
+
+    def tearDown(self):
+        """
+        在每个测试方法之后运行，关闭替身服务并删除临时缓存。
+        """
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_extract_main_text_skips_noise(self):
+        # 正文只保留 <article> 中足够长的段落，去掉脚本、导航和页脚
+        self.assertEqual(extract_main_text(ARTICLE), PARAGRAPH)
+
+    def test_enrich_fetches_each_url_once(self):
+        # 同一链接在缓存有效期内只下载一次，站内链接和非 HTML 内容得到空正文
+        stories = [{'title': 'A', 'link': f'{self.base_url}/article'},
+                   {'title': 'Ask HN', 'link': 'item?id=2'},
+                   {'title': 'Paper', 'link': f'{self.base_url}/paper.pdf'}]
+
+        first = self.extractor.enrich(stories)
+        second = self.extractor.enrich(stories)
+
+        self.assertEqual([story['content'] for story in first], [PARAGRAPH, '', ''])
+        self.assertEqual(first, second)
+        self.assertEqual(StandInHandler.requests, {'/article': 1, '/paper.pdf': 1})
+
+    def test_only_permanent_failures_are_cached(self):
+        # 404 缓存为空正文；503 等暂时性错误不缓存，下一次重新下载
+        for _ in range(2):
+            self.assertEqual(self.extractor.extract(f'{self.base_url}/missing'), '')
+            self.assertEqual(self.extractor.extract(f'{self.base_url}/flaky'), '')
+        self.assertEqual(StandInHandler.requests, {'/missing': 1, '/flaky': 2})
+
+    def test_byte_cap_limits_download(self):
+        # 超过字节上限的页面只使用已读取的部分
+        text = ArticleExtractor(transport=HTTPTransport(max_retries=0), max_bytes=1024,
+                                max_chars=100000).extract(f'{self.base_url}/huge')
+        self.assertTrue(0 < len(text) < 1024)
+
+    def test_cache_entries_expire(self):
+        # 超过 TTL 的条目视为未命中
+        now = [1000.0]
+        cache = ArticleCache(os.path.join(self.tmp_dir, 'ttl.db'), ttl_hours=1, clock=lambda: now[0])
+        cache.put('https://example.com/a', 'text')
+        self.assertEqual(cache.get('https://example.com/a'), 'text')
+        now[0] += 3601
+        self.assertIsNone(cache.get('https://example.com/a'))
+
+if __name__ == '__main__':
+    unittest.main()
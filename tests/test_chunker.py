@@ -0,0 +1,46 @@
+import sys
+import os
+import unittest
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from chunker import estimate_tokens, split_markdown  # 导入要测试的切分函数
+
+
+class TestChunker(unittest.TestCase):
+    def test_estimate_tokens(self):
+        # 英文约 4 个字符一个 token，中文每个字符一个 token
+        self.assertEqual(estimate_tokens(""), 0)
+        self.assertEqual(estimate_tokens("abcdefgh"), 2)
+        self.assertEqual(estimate_tokens("修复问题"), 4)
+
+    def test_short_input_is_one_chunk(self):
+        text = "# Progress for a/b\n\n## Issues\n- Fix bug #1"
+        self.assertEqual(split_markdown(text, 1000), [text])
+
+    def test_chunks_respect_budget_and_repeat_headings(self):
+        # 每块不超过预算，开头重复文档标题和当前小节标题，所有条目都被保留
+        issues = "\n".join(f"- issue number {i} with some words" for i in range(40))
+        prs = "\n".join(f"- pull request {i}" for i in range(10))
+        text = f"# Progress for a/b\n\n## Issues\n{issues}\n## Pull Requests\n{prs}"
+
+        chunks = split_markdown(text, 60)
+
+        self.assertGreater(len(chunks), 2)
+        for chunk in chunks:
+            self.assertLessEqual(estimate_tokens(chunk), 60)
+            self.assertTrue(chunk.startswith("# Progress for a/b\n"))
+        self.assertTrue(chunks[1].startswith("# Progress for a/b\n## Issues\n- issue number"))
+        self.assertIn("## Pull Requests\n- pull request 0", "\n".join(chunks))
+        self.assertEqual(sum(chunk.count("- issue number") for chunk in chunks), 40)
+        self.assertEqual(sum(chunk.count("- pull request") for chunk in chunks), 10)
+
+    def test_long_line_is_split(self):
+        # 单行超过上限时按字符切开，内容不丢失
+        chunks = split_markdown("x" * 1000, 50)
+        self.assertEqual("".join(chunk.replace("\n", "") for chunk in chunks), "x" * 1000)
+        self.assertTrue(all(estimate_tokens(chunk) <= 50 for chunk in chunks))
+
+if __name__ == '__main__':
+    unittest.main()
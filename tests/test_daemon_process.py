@@ -0,0 +1,63 @@
+import sys
+import os
+import threading
+import unittest
+from unittest.mock import MagicMock
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from daemon_process import github_job, github_batch_reports  # 导入要测试的定时任务
+from llm_executor import LLMExecutor  # 导入报告生成线程池
+
+
+class TestGitHubJob(unittest.TestCase):
+    def setUp(self):
+        """
+        在每个测试方法之前运行，创建启用批处理模式的报告生成器和通知器的模拟对象。
+        """
+        self.report_generator = MagicMock()
+        self.report_generator.llm.batch = MagicMock()
+        self.notifier = MagicMock()
+        self.exports = [('owner/a', 'a.md'), ('owner/b', 'b.md')]
+
+    def test_batch_job_does_not_block_scheduler(self):
+        # 批处理在报告生成线程池中等待，github_job 不等批次完成就返回
+        release = threading.Event()
+
+        def wait_for_batch(paths):
+            release.wait(5)
+            return {path: (f"report {path}", path) for path in paths}
+
+        self.report_generator.generate_github_reports_batch.side_effect = wait_for_batch
+        github_client = MagicMock()
+        github_client.export_progress_for_repos.return_value = iter(self.exports)
+        subscription_manager = MagicMock()
+        executor = LLMExecutor(max_workers=2)
+        self.addCleanup(executor.shutdown)
+
+        github_job(subscription_manager, github_client, self.report_generator, self.notifier, 1, executor)
+        self.notifier.notify_github_report.assert_not_called()
+
+        release.set()
+        executor.shutdown()
+        self.assertEqual(self.notifier.notify_github_report.call_count, 2)
+
+    def test_batch_failure_falls_back_to_per_repo_reports(self):
+        # 整个批次失败时逐个仓库生成，单个仓库失败不影响其他仓库的通知
+        self.report_generator.generate_github_reports_batch.side_effect = TimeoutError("batch expired")
+
+        def generate(path):
+            if path == 'b.md':
+                raise RuntimeError("boom")
+            return ("report a", "a_report.md")
+
+        self.report_generator.generate_github_report.side_effect = generate
+
+        github_batch_reports(self.exports, self.report_generator, self.notifier)
+
+        self.notifier.notify_github_report.assert_called_once_with('owner/a', "report a")
+
+
+if __name__ == '__main__':
+    unittest.main()
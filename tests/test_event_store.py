@@ -0,0 +1,126 @@
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timezone
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from event_store import EventStore  # 导入要测试的 EventStore 类
+from github_records import CommitRecord  # 导入提交记录类型
+
+class TestEventStore(unittest.TestCase):
+    def setUp(self):
+        """
+        在每个测试方法之前运行，创建临时存储。
+        """
+        self.tmp_dir = tempfile.mkdtemp()
+        self.store = EventStore(os.path.join(self.tmp_dir, 'events.db'))
+        self.repo = "DjangoPeng/openai-quickstart"
+
+    def tearDown(self):
+        """
+        在每个测试方法之后运行，删除临时存储。
+        """
+        shutil.rmtree(self.tmp_dir)
+
+    def test_delta_since_without_cursor(self):
+        """
+        测试没有游标时从请求的起始时间完整获取。
+        """
+        self.assertEqual(self.store.delta_since(self.repo, 'issues', '2024-08-20'), '2024-08-20')
+
+    def test_delta_since_uses_cursor(self):
+        """
+        测试历史已覆盖请求窗口时只获取游标之后的增量，窗口更早时重新完整获取。
+        """
+        self.store.merge(self.repo, 'issues', [
+            {'number': 1, 'title': 'Fix bug', 'updated_at': '2024-08-21T10:00:00Z'},
+            {'number': 2, 'title': 'Add docs', 'updated_at': '2024-08-23T08:00:00Z'},
+        ], '2024-08-20')
+
+        self.assertEqual(self.store.delta_since(self.repo, 'issues', '2024-08-22'), '2024-08-23T08:00:00Z')
+        self.assertEqual(self.store.delta_since(self.repo, 'issues', '2024-08-15'), '2024-08-15')
+
+    def test_merge_and_query_window(self):
+        """
+        测试增量记录与历史记录合并（同一编号覆盖旧记录），并按时间窗口查询。
+        """
+        self.store.merge(self.repo, 'issues', [
+            {'number': 1, 'title': 'Fix bug', 'updated_at': '2024-08-21T10:00:00Z'},
+            {'number': 2, 'title': 'Add docs', 'updated_at': '2024-08-23T08:00:00Z'},
+        ], '2024-08-20')
+        self.store.merge(self.repo, 'issues', [
+            {'number': 1, 'title': 'Fix bug (reworded)', 'updated_at': '2024-08-24T09:00:00Z'},
+        ], '2024-08-23T08:00:00Z')
+
+        issues = self.store.query(self.repo, 'issues', since='2024-08-22')
+        self.assertEqual([issue['title'] for issue in issues], ['Fix bug (reworded)', 'Add docs'])
+        self.assertEqual(self.store.delta_since(self.repo, 'issues', '2024-08-20'), '2024-08-24T09:00:00Z')
+
+    def test_merge_removes_reopened_items(self):
+        """
+        测试同步到已重新打开的 Issue 时从存储中删除它，游标仍推进到其更新时间。
+        """
+        self.store.merge(self.repo, 'issues', [
+            {'number': 1, 'title': 'Fix bug', 'state': 'closed', 'updated_at': '2024-08-21T10:00:00Z'},
+            {'number': 2, 'title': 'Add docs', 'state': 'closed', 'updated_at': '2024-08-22T08:00:00Z'},
+        ], '2024-08-20')
+        self.store.merge(self.repo, 'issues', [
+            {'number': 1, 'title': 'Fix bug', 'state': 'open', 'updated_at': '2024-08-24T09:00:00Z'},
+            {'number': 3, 'title': 'New issue', 'state': 'open', 'updated_at': '2024-08-24T10:00:00Z'},
+        ], '2024-08-22T08:00:00Z')
+
+        self.assertEqual([issue['number'] for issue in self.store.query(self.repo, 'issues')], [2])
+        self.assertEqual(self.store.delta_since(self.repo, 'issues', '2024-08-20'), '2024-08-24T10:00:00Z')
+
+    def test_commit_cursor_uses_commit_date(self):
+        """
+        测试提交记录以 SHA 去重，以提交时间推进游标，增量同步时回退重叠窗口但不早于已覆盖的最早时间。
+        """
+        commit = CommitRecord(sha='abc123', message='Initial commit', date='2024-08-22T12:00:00Z')
+        self.store.merge(self.repo, 'commits', [commit, commit], '2024-08-20')
+
+        self.assertEqual(len(self.store.query(self.repo, 'commits')), 1)
+        self.assertEqual(self.store.delta_since(self.repo, 'commits', '2024-08-21'), '2024-08-20')
+        self.store.merge(self.repo, 'commits', [], '2024-08-01')
+        self.assertEqual(self.store.delta_since(self.repo, 'commits', '2024-08-21'), '2024-08-15T12:00:00Z')
+
+    def test_late_commit_with_older_date_is_synced(self):
+        """
+        测试游标之后才合并进来、但提交时间早于游标的提交，会在下一次增量同步的重叠窗口中取回，且不会重复。
+        """
+        self.store.merge(self.repo, 'commits',
+                         [CommitRecord(sha='new', message='Newest', date='2024-08-24T00:00:00Z')], '2024-08-01')
+        fetch_since = self.store.delta_since(self.repo, 'commits', '2024-08-20')
+        rebased = CommitRecord(sha='old', message='Rebased', date='2024-08-22T00:00:00Z')
+        self.assertLessEqual(fetch_since, rebased['date'])
+
+        self.store.merge(self.repo, 'commits',
+                         [rebased, CommitRecord(sha='new', message='Newest', date='2024-08-24T00:00:00Z')], fetch_since)
+        self.assertEqual([commit['sha'] for commit in self.store.query(self.repo, 'commits')], ['new', 'old'])
+
+    def test_webhook_health_expires(self):
+        """
+        测试超过静默上限未收到推送时，Webhook 事件流不再视为健康。
+        """
+        self.assertFalse(self.store.webhook_healthy(self.repo, 24))
+        self.store.record_webhook_delivery(self.repo, 'issues', '2024-08-24T00:00:00Z')
+        self.assertTrue(self.store.webhook_healthy(self.repo, 24, now=datetime(2024, 8, 24, 12, tzinfo=timezone.utc)))
+        self.assertFalse(self.store.webhook_healthy(self.repo, 24, now=datetime(2024, 8, 26, tzinfo=timezone.utc)))
+
+    def test_covers_requires_all_resources(self):
+        """
+        测试只有三类数据都从 since 之前同步过，才视为存储已覆盖该窗口。
+        """
+        self.store.merge(self.repo, 'issues', [], '2024-08-17')
+        self.assertFalse(self.store.covers(self.repo, '2024-08-17'))
+        self.store.merge(self.repo, 'commits', [], '2024-08-17')
+        self.store.merge(self.repo, 'pull_requests', [], '2024-08-10')
+        self.assertTrue(self.store.covers(self.repo, '2024-08-17'))
+        self.assertFalse(self.store.covers(self.repo, '2024-08-01'))
+
+if __name__ == '__main__':
+    unittest.main()
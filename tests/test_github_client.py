@@ -1,12 +1,17 @@
 import sys
 import os
+import shutil
+import tempfile
 import unittest
+from datetime import date
 from unittest.mock import patch, MagicMock
 
 # 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
 
-from github_client import GitHubClient  # 导入要测试的 GitHubClient 类
+from github_client import GitHubClient, create_github_client  # 导入要测试的 GitHubClient 类和工厂函数
+from config import Config  # 导入配置类
+from event_store import EventStore  # 导入本地事件存储
 
 class TestGitHubClient(unittest.TestCase):
     def setUp(self):
@@ -17,7 +22,20 @@ class TestGitHubClient(unittest.TestCase):
         self.client = GitHubClient(self.token)  # 使用该令牌初始化 GitHubClient 实例
         self.repo = "DjangoPeng/openai-quickstart"  # 要测试的仓库名称
 
-    @patch('github_client.requests.get')
+    def test_create_client_without_token(self):
+        """
+        测试未配置令牌时仍可创建客户端（匿名请求），只是不启用令牌池调度。
+        """
+        config = Config()
+        config.github_token, config.github_tokens = None, [None]
+        config.github_cache, config.github_store, config.github_webhook = {}, {}, {}
+        config.github_backend = 'rest'
+
+        client = create_github_client(config)
+        self.assertIsNone(client.scheduler)
+        self.assertEqual(client.rate_limit_metrics(), {})
+
+    @patch('http_transport.requests.Session.get')
     def test_fetch_commits(self, mock_get):
         """
         测试 fetch_commits 方法是否正确获取提交记录。
@@ -32,9 +50,9 @@ class TestGitHubClient(unittest.TestCase):
         commits = self.client.fetch_commits(self.repo)
         self.assertEqual(len(commits), 1)  # 检查返回的提交记录数量是否为 1
         self.assertEqual(commits[0]['sha'], "abc123")  # 检查返回的提交记录 SHA 值
-        self.assertEqual(commits[0]['commit']['message'], "Initial commit")  # 检查提交记录中的消息
+        self.assertEqual(commits[0]['message'], "Initial commit")  # 检查提交记录中的消息（已投影为精简记录）
 
-    @patch('github_client.requests.get')
+    @patch('http_transport.requests.Session.get')
     def test_fetch_issues(self, mock_get):
         """
         测试 fetch_issues 方法是否正确获取关闭的问题。
@@ -51,7 +69,7 @@ class TestGitHubClient(unittest.TestCase):
         self.assertEqual(issues[0]['number'], 1)  # 检查问题编号是否正确
         self.assertEqual(issues[0]['title'], "Fix bug")  # 检查问题标题是否正确
 
-    @patch('github_client.requests.get')
+    @patch('http_transport.requests.Session.get')
     def test_fetch_pull_requests(self, mock_get):
         """
         测试 fetch_pull_requests 方法是否正确获取拉取请求。
@@ -68,7 +86,23 @@ class TestGitHubClient(unittest.TestCase):
         self.assertEqual(pull_requests[0]['number'], 42)  # 检查拉取请求的编号是否正确
         self.assertEqual(pull_requests[0]['title'], "Add new feature")  # 检查拉取请求的标题是否正确
 
-    @patch('github_client.requests.get')
+    @patch('http_transport.requests.Session.get')
+    def test_fetch_pull_requests_stops_past_since(self, mock_get):
+        """
+        测试 pulls 接口按更新时间倒序获取，遇到早于 since 的拉取请求即停止。
+        """
+        mock_response = MagicMock()
+        mock_response.json.return_value = [{"number": 2, "title": "New", "updated_at": "2024-08-25T00:00:00Z"},
+                                           {"number": 1, "title": "Old", "updated_at": "2024-08-20T00:00:00Z"}]
+        mock_response.status_code = 200
+        mock_get.return_value = mock_response
+
+        pull_requests = self.client.fetch_pull_requests(self.repo, since="2024-08-23")
+        self.assertEqual([pull_request['number'] for pull_request in pull_requests], [2])
+        params = mock_get.call_args.kwargs['params']
+        self.assertEqual((params['sort'], params['direction']), ('updated', 'desc'))
+
+    @patch('http_transport.requests.Session.get')
     def test_export_daily_progress(self, mock_get):
         """
         测试 export_daily_progress 方法是否正确导出每日进度报告。
@@ -83,7 +117,7 @@ class TestGitHubClient(unittest.TestCase):
         file_path = self.client.export_daily_progress(self.repo)
         self.assertTrue(file_path.endswith('.md'))  # 检查生成的文件路径是否以 .md 结尾
 
-    @patch('github_client.requests.get')
+    @patch('http_transport.requests.Session.get')
     def test_export_progress_by_date_range(self, mock_get):
         """
         测试 export_progress_by_date_range 方法是否正确导出指定日期范围内的进度报告。
@@ -98,5 +132,188 @@ class TestGitHubClient(unittest.TestCase):
         file_path = self.client.export_progress_by_date_range(self.repo, days=7)
         self.assertTrue(file_path.endswith('.md'))  # 检查生成的文件路径是否以 .md 结尾
 
+    @patch('http_transport.requests.Session.get')
+    def test_fetch_updates(self, mock_get):
+        """
+        测试 fetch_updates 并发获取三类数据后是否按类型正确归位。
+        """
+        def fake_get(url, headers=None, params=None, timeout=None):
+            mock_response = MagicMock()
+            mock_response.json.return_value = [{"sha": url, "number": url, "html_url": url}]
+            return mock_response
+        mock_get.side_effect = fake_get
+
+        updates = self.client.fetch_updates(self.repo)
+        self.assertTrue(updates['commits'][0]['html_url'].endswith('/commits'))
+        self.assertTrue(updates['issues'][0]['html_url'].endswith('/issues'))
+        self.assertTrue(updates['pull_requests'][0]['html_url'].endswith('/pulls'))
+
+    @patch('http_transport.requests.Session.get')
+    def test_fetch_issues_follows_next_link(self, mock_get):
+        """
+        测试整页返回时是否按 Link: rel="next" 继续请求，并以 per_page=100 分页。
+        """
+        first_page = MagicMock()
+        first_page.json.return_value = [{"number": i, "title": f"Issue {i}"} for i in range(100)]
+        first_page.links = {'next': {'url': 'https://api.github.com/repositories/1/issues?page=2'}}
+        last_page = MagicMock()
+        last_page.json.return_value = [{"number": 100, "title": "Issue 100"}]
+        mock_get.side_effect = [first_page, last_page]
+
+        issues = self.client.fetch_issues(self.repo)
+        self.assertEqual(len(issues), 101)  # 两页数据全部返回
+        self.assertEqual(mock_get.call_count, 2)  # 最后一页不足一页，不再继续请求
+        self.assertEqual(mock_get.call_args_list[0].kwargs['params']['per_page'], 100)
+        self.assertEqual(mock_get.call_args_list[1].args[0], 'https://api.github.com/repositories/1/issues?page=2')
+
+    @patch('http_transport.requests.Session.get')
+    def test_fetch_issues_served_from_cache_on_304(self, mock_get):
+        """
+        测试启用缓存时是否发送 If-None-Match，并在 304 时返回缓存的响应体。
+        """
+        mock_cache = MagicMock()
+        mock_cache.get.return_value = {'etag': '"abc"', 'last_modified': None,
+                                       'body': '[{"number": 7, "title": "Cached"}]', 'link_next': None}
+        mock_cache.validators.return_value = {'If-None-Match': '"abc"'}
+        client = GitHubClient(self.token, cache=mock_cache)
+
+        mock_response = MagicMock()
+        mock_response.status_code = 304
+        mock_get.return_value = mock_response
+
+        issues = client.fetch_issues(self.repo)
+        self.assertEqual([(issue['number'], issue['title']) for issue in issues], [(7, "Cached")])
+        self.assertEqual(mock_get.call_args.kwargs['headers']['If-None-Match'], '"abc"')
+        mock_cache.put.assert_not_called()  # 304 不需要重写缓存
+
+    @patch('http_transport.requests.Session.get')
+    def test_fetch_issues_retries_after_rate_limit(self, mock_get):
+        """
+        测试启用调度器时，被限流的请求是否换用调度器分配的令牌重试。
+        """
+        mock_scheduler = MagicMock()
+        mock_scheduler.max_retries = 3
+        mock_scheduler.acquire.side_effect = ["token_a", "token_b"]
+        mock_scheduler.update.side_effect = [True, False]  # 第一次被限流，第二次成功
+        client = GitHubClient(self.token, scheduler=mock_scheduler)
+
+        limited, ok = MagicMock(), MagicMock()
+        ok.json.return_value = [{"number": 1, "title": "Fix bug"}]
+        mock_get.side_effect = [limited, ok]
+
+        issues = client.fetch_issues(self.repo)
+        self.assertEqual(len(issues), 1)
+        self.assertEqual(mock_get.call_args_list[1].kwargs['headers']['Authorization'], 'token token_b')
+
+    @patch('http_transport.requests.Session.get')
+    def test_sync_repo_fetches_only_delta(self, mock_get):
+        """
+        测试启用本地存储时，第二次同步只从游标开始获取增量。
+        """
+        mock_store = MagicMock()
+        mock_store.delta_since.return_value = "2024-08-23T08:00:00Z"
+        client = GitHubClient(self.token, store=mock_store)
+        mock_response = MagicMock()
+        mock_response.json.return_value = []
+        mock_get.return_value = mock_response
+
+        client.sync_repo(self.repo, "2024-08-17")
+
+        for call in mock_get.call_args_list:
+            if not call.args[0].endswith('/pulls'):  # pulls 接口不支持 since，由客户端截断
+                self.assertEqual(call.kwargs['params']['since'], "2024-08-23T08:00:00Z")
+            if not call.args[0].endswith('/commits'):  # 获取全部状态，以便删除被重新打开的记录
+                self.assertEqual(call.kwargs['params']['state'], 'all')
+        self.assertEqual(mock_store.merge.call_count, 3)  # 三类数据都已合并
+
+    @patch('http_transport.requests.Session.get')
+    def test_sync_repo_keeps_cursor_on_failure(self, mock_get):
+        """
+        测试获取失败时不合并结果，游标保持不变。
+        """
+        mock_store = MagicMock()
+        mock_store.delta_since.return_value = "2024-08-17"
+        client = GitHubClient(self.token, store=mock_store)
+        mock_get.side_effect = Exception("Connection error")
+
+        client.sync_repo(self.repo, "2024-08-17")
+        mock_store.merge.assert_not_called()
+
+    @patch('http_transport.requests.Session.get')
+    def test_render_progress_from_store_without_network(self, mock_get):
+        """
+        测试离线渲染只读取本地存储，不发起任何网络请求。
+        """
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        store = EventStore(os.path.join(tmp_dir, 'events.db'))
+        store.merge(self.repo, 'issues', [{'number': 7, 'title': 'Fix bug', 'updated_at': f'{date.today()}T01:00:00Z'},
+                                          {'number': 8, 'title': 'Fix typo', 'labels': ['docs', 'good first issue'],
+                                           'updated_at': f'{date.today()}T02:00:00Z'}],
+                    '2024-01-01')
+        client = GitHubClient(self.token, store=store)
+
+        file_path = client.render_progress_by_date_range(self.repo, days=1)
+
+        mock_get.assert_not_called()
+        with open(file_path) as file:
+            content = file.read()
+        self.assertIn("- Fix bug #7\n", content)
+        self.assertIn("- Fix typo #8 [docs, good first issue]\n", content)  # 标签附在条目末尾
+
+    @patch('http_transport.requests.Session.get')
+    def test_fetch_issues_drops_pull_requests(self, mock_get):
+        """
+        测试 /issues 接口返回的 Pull Request 被丢弃，且记录只保留报告需要的字段。
+        """
+        mock_response = MagicMock()
+        mock_response.json.return_value = [
+            {"number": 1, "title": "Fix bug", "user": {"login": "django"}, "reactions": {"+1": 3},
+             "labels": [{"name": "bug", "color": "d73a4a"}]},
+            {"number": 2, "title": "Add feature", "pull_request": {"url": "https://api.github.com/pulls/2"}},
+        ]
+        mock_get.return_value = mock_response
+
+        issues = self.client.fetch_issues(self.repo)
+        self.assertEqual([issue['number'] for issue in issues], [1])
+        self.assertEqual(issues[0]['labels'], ['bug'])
+        self.assertFalse(hasattr(issues[0], '__dict__'))  # __slots__ 记录不携带实例字典
+        with self.assertRaises(KeyError):
+            issues[0]['user']
+
+    @patch('http_transport.requests.Session.get')
+    def test_export_skips_polling_for_healthy_webhook(self, mock_get):
+        """
+        测试 Webhook 事件流健康且存储已覆盖窗口时，导出进展不再发起 REST 请求。
+        """
+        mock_store = MagicMock()
+        mock_store.webhook_healthy.return_value = True
+        mock_store.covers.return_value = True
+        mock_store.iter_query.return_value = []
+        client = GitHubClient(self.token, store=mock_store, webhook_max_silence_hours=24)
+
+        client.export_progress_by_date_range(self.repo, days=1)
+        mock_get.assert_not_called()
+
+        mock_store.webhook_healthy.return_value = False  # 事件流中断后恢复轮询
+        mock_store.delta_since.return_value = "2024-08-17"
+        mock_get.return_value = MagicMock(**{'json.return_value': []})
+        client.export_progress_by_date_range(self.repo, days=1)
+        self.assertEqual(mock_get.call_count, 3)
+
+    def test_export_progress_for_repos_isolates_errors(self):
+        """
+        测试 export_progress_for_repos 中单个仓库失败时，其他仓库仍能正常导出。
+        """
+        def fake_export(repo, days):
+            if repo == "broken/repo":
+                raise RuntimeError("disk full")
+            return f"{repo}.md"
+
+        with patch.object(self.client, 'export_progress_by_date_range', side_effect=fake_export):
+            results = dict(self.client.export_progress_for_repos([self.repo, "broken/repo", "some/repo"], days=1))
+
+        self.assertEqual(results, {self.repo: f"{self.repo}.md", "some/repo": "some/repo.md"})
+
 if __name__ == '__main__':
     unittest.main()
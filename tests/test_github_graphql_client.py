@@ -0,0 +1,131 @@
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from github_graphql_client import GitHubGraphQLClient  # 导入要测试的 GitHubGraphQLClient 类
+from event_store import EventStore  # 导入本地事件存储
+from github_records import IssueRecord  # 导入精简记录类型
+
+
+def make_connection(nodes, has_next_page=False, end_cursor=None):
+    return {'pageInfo': {'hasNextPage': has_next_page, 'endCursor': end_cursor}, 'nodes': nodes}
+
+
+def make_repository(issues=None, pull_requests=None, history=None):
+    return {
+        'issues': issues or make_connection([]),
+        'pullRequests': pull_requests or make_connection([]),
+        'defaultBranchRef': {'target': {'history': history or make_connection([])}},
+    }
+
+
+def make_response(data):
+    response = MagicMock()
+    response.json.return_value = {'data': data}
+    return response
+
+
+class TestGitHubGraphQLClient(unittest.TestCase):
+    def setUp(self):
+        """
+        在每个测试方法之前运行，初始化测试环境。
+        """
+        self.client = GitHubGraphQLClient("fake_token", batch_size=2)
+        self.issue_node = {'number': 1, 'title': 'Fix bug', 'state': 'CLOSED', 'updatedAt': '2024-08-24T01:00:00Z',
+                           'closedAt': '2024-08-24T01:00:00Z', 'url': 'https://github.com/a/b/issues/1'}
+        self.commit_node = {'oid': 'abc123', 'message': 'Initial commit', 'url': 'https://github.com/a/b/commit/abc123',
+                            'committedDate': '2024-08-24T00:00:00Z', 'author': {'name': 'django'}}
+
+    @patch('http_transport.requests.Session.post')
+    def test_fetch_updates_batch_matches_rest_structure(self, mock_post):
+        """
+        测试一次批量查询是否返回与 REST 客户端相同的结构，且不存在的仓库只得到空结果。
+        """
+        mock_post.return_value = make_response({
+            'r0': make_repository(issues=make_connection([self.issue_node]),
+                                  history=make_connection([self.commit_node])),
+            'r1': None,
+        })
+
+        updates = self.client.fetch_updates_batch(["a/b", "missing/repo"], since="2024-08-23")
+
+        self.assertEqual(mock_post.call_count, 1)  # 两个仓库只需一次往返
+        self.assertEqual(updates["a/b"]['issues'][0]['number'], 1)
+        self.assertEqual(updates["a/b"]['issues'][0]['title'], 'Fix bug')
+        self.assertEqual(updates["a/b"]['commits'][0]['sha'], 'abc123')
+        self.assertEqual(updates["a/b"]['commits'][0]['message'], 'Initial commit')
+        self.assertEqual(updates["missing/repo"], {'commits': [], 'issues': [], 'pull_requests': []})
+        query = mock_post.call_args.kwargs['json']['query']
+        self.assertIn('filterBy: {since: "2024-08-23T00:00:00Z"}', query)
+        self.assertIn('history(first: 100, since: "2024-08-23T00:00:00Z", until: null)', query)
+        self.assertIn('pullRequests(first: 100, states: [CLOSED, MERGED]', query)  # 导出窗口只获取关闭的记录
+
+    @patch('http_transport.requests.Session.post')
+    def test_batches_and_follow_up_pages(self, mock_post):
+        """
+        测试仓库按 batch_size 分批，并为 hasNextPage 的连接补充翻页查询。
+        """
+        second_issue = dict(self.issue_node, number=2, title='Second page')
+
+        def fake_post(url, headers=None, json=None, timeout=None):
+            if 'after' in json['variables']:
+                return make_response({'repository': {'issues': make_connection([second_issue])}})
+            aliases = [line.split(':')[0].strip() for line in json['query'].splitlines()
+                       if ': repository(' in line]
+            data = {alias: make_repository() for alias in aliases}
+            if 'r0' in data and '"a"' in json['query']:
+                data['r0'] = make_repository(issues=make_connection([self.issue_node], True, 'cursor1'))
+            return make_response(data)
+        mock_post.side_effect = fake_post
+
+        updates = self.client.fetch_updates_batch(["a/b", "c/d", "e/f"])
+
+        self.assertEqual(mock_post.call_count, 3)  # 两个批量查询 + 一次翻页查询
+        self.assertEqual([issue['number'] for issue in updates["a/b"]['issues']], [1, 2])
+        self.assertEqual(set(updates), {"a/b", "c/d", "e/f"})
+
+    @patch('http_transport.requests.Session.post')
+    def test_malformed_repo_fails_alone(self, mock_post):
+        """
+        测试名称格式不对的订阅只作为该仓库失败，不影响同批次其他仓库的获取和导出。
+        """
+        mock_post.return_value = make_response({'r0': make_repository(issues=make_connection([self.issue_node]))})
+
+        updates = self.client.fetch_updates_batch(["not-a-repo", "a/b"])
+        self.assertEqual(updates["a/b"]['issues'][0]['number'], 1)
+        self.assertEqual(updates["not-a-repo"], {'commits': [], 'issues': [], 'pull_requests': []})
+        self.assertEqual(mock_post.call_args.kwargs['json']['query'].count(': repository('), 1)
+
+        with patch.object(self.client, '_write_progress_file', return_value='progress.md'):
+            exported = dict(self.client.export_progress_for_repos(["not-a-repo", "a/b"], days=1))
+        self.assertEqual(exported, {"a/b": 'progress.md'})
+
+    @patch('http_transport.requests.Session.post')
+    def test_sync_batch_uses_per_repo_cursors(self, mock_post):
+        """
+        测试增量同步时批次中每个仓库从各自的游标获取，新加入的仓库不会让其他仓库重新完整获取。
+        """
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        store = EventStore(os.path.join(tmp_dir, 'events.db'))
+        store.merge("a/b", 'issues', [self.client._issue_from_node(IssueRecord, self.issue_node)], '2024-08-01')
+        client = GitHubGraphQLClient("fake_token", batch_size=2, store=store)
+        mock_post.return_value = make_response({'r0': make_repository(), 'r1': make_repository()})
+
+        client.sync_repos(["a/b", "c/d"], '2024-08-01')
+
+        query = mock_post.call_args.kwargs['json']['query']
+        fragments = query.split(': repository(')
+        self.assertIn('filterBy: {since: "2024-08-24T01:00:00Z"}', fragments[1])  # a/b 只获取游标之后的增量
+        self.assertIn('filterBy: {since: "2024-08-01T00:00:00Z"}', fragments[2])  # c/d 从窗口起点完整获取
+        self.assertIn('states: [OPEN, CLOSED, MERGED]', query)  # 获取全部状态，以便删除被重新打开的记录
+        self.assertEqual(store.delta_since("c/d", 'issues', '2024-08-01'), '2024-08-01')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import sys
+import os
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from hacker_news_api_client import HackerNewsAPIClient  # 导入要测试的 HackerNewsAPIClient 类
+from http_transport import HTTPTransport  # 导入HTTP传输层，测试中关闭重试
+
+ITEMS = {
+    1: {'id': 1, 'type': 'story', 'title': 'Story 1', 'url': 'https://example.com/1', 'score': 120,
+        'descendants': 45, 'by': 'alice', 'time': 1725184800},
+    2: {'id': 2, 'type': 'story', 'title': 'Ask HN: Story 2', 'score': 30, 'descendants': 8, 'by': 'bob',
+        'time': 1725188400},
+    3: {'id': 3, 'deleted': True},
+    4: None,
+}
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    # 本地替身服务：按 Firebase API 的路径返回 topstories 和条目 JSON
+    def do_GET(self):
+        if self.path == '/v0/topstories.json':
+            body = [4, 2, 3, 1, 5]  # 5 不存在，返回 404
+        elif self.path.startswith('/v0/item/'):
+            item_id = int(self.path[len('/v0/item/'):-len('.json')])
+            if item_id not in ITEMS:
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = ITEMS[item_id]
+        else:
+            self.send_response(404)
+            self.end_headers()
+            return
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestHackerNewsAPIClient(unittest.TestCase):
+    def setUp(self):
+        """
+        在每个测试方法之前运行，在随机端口上启动本地替身服务。
+        """
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        api_url = 'http://127.0.0.1:%d/v0/' % self.httpd.server_address[1]
+        self.client = HackerNewsAPIClient(HTTPTransport(max_retries=0), api_url=api_url, max_concurrent_requests=4)
+
+    def tearDown(self):
+        """
+        在每个测试方法之后运行，关闭替身服务。
+        """
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def test_fetch_top_stories_keeps_rank_and_metadata(self):
+        # 按排名顺序返回有效条目，跳过已删除、为空和获取失败的条目
+        stories = self.client.fetch_top_stories()
+
+        self.assertEqual([story['title'] for story in stories], ['Ask HN: Story 2', 'Story 1'])
+        self.assertEqual(stories[0]['link'], 'https://news.ycombinator.com/item?id=2')
+        self.assertEqual(stories[1], {'id': 1, 'title': 'Story 1', 'link': 'https://example.com/1', 'score': 120,
+                                      'comments': 45, 'author': 'alice', 'time': '2024-09-01T10:00:00Z'})
+
+    def test_max_stories_limits_requests(self):
+        # 只获取 topstories 中排名靠前的 max_stories 条
+        self.client.max_stories = 1
+        self.assertEqual(self.client.fetch_top_stories(), [])  # 第一条为空条目
+
+    def test_story_meta_in_export_line(self):
+        # 导出时在标题后附加分数、评论数和作者
+        story = {'title': 'Story 1', 'link': 'https://example.com/1', 'score': 120, 'comments': 45, 'author': 'alice'}
+        self.assertEqual(self.client._story_meta(story), " (120 points, 45 comments, by alice)")
+
+if __name__ == '__main__':
+    unittest.main()
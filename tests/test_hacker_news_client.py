@@ -8,6 +8,7 @@ from io import StringIO
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
 
 from hacker_news_client import HackerNewsClient
+from hn_parser import PARSERS, available_parsers, get_parser, parse_stories  # 导入可插拔的解析后端
 from logger import LOG  # 导入日志记录器
 
 
@@ -15,7 +16,7 @@ class TestHackerNewsClient(unittest.TestCase):
     def setUp(self):
         self.client = HackerNewsClient()
 
-    @patch('hacker_news_client.requests.get')
+    @patch('http_transport.requests.Session.get')
     def test_fetch_top_stories_success(self, mock_get):
         # 模拟HTTP响应
         mock_response = MagicMock()
@@ -37,7 +38,7 @@ class TestHackerNewsClient(unittest.TestCase):
         self.assertEqual(top_stories[0]['title'], 'Story 1')
         self.assertEqual(top_stories[0]['link'], 'https://news.ycombinator.com/')
     
-    @patch('hacker_news_client.requests.get')
+    @patch('http_transport.requests.Session.get')
     def test_fetch_top_stories_failure(self, mock_get):
         # 模拟HTTP请求失败
         mock_get.side_effect = Exception("Connection error")
@@ -47,7 +48,7 @@ class TestHackerNewsClient(unittest.TestCase):
         self.assertEqual(top_stories, [])
 
     
-    @patch('hacker_news_client.requests.get')
+    @patch('http_transport.requests.Session.get')
     @patch('hacker_news_client.os.makedirs')
     @patch('hacker_news_client.open', new_callable=unittest.mock.mock_open)
     def test_export_top_stories(self, mock_open, mock_makedirs, mock_get):
@@ -76,7 +77,7 @@ class TestHackerNewsClient(unittest.TestCase):
         mock_open().write.assert_any_call("# Hacker News Top Stories (2024-09-01 14:00)\n\n")
         mock_open().write.assert_any_call("1. [Story 1](https://news.ycombinator.com/)\n")
 
-    @patch('hacker_news_client.requests.get')
+    @patch('http_transport.requests.Session.get')
     @patch('hacker_news_client.os.makedirs')
     @patch('hacker_news_client.open', new_callable=unittest.mock.mock_open)
     def test_export_top_stories_no_stories(self, mock_open, mock_makedirs, mock_get):
@@ -94,5 +95,53 @@ class TestHackerNewsClient(unittest.TestCase):
         mock_open.assert_not_called()
         self.assertIsNone(file_path)
 
+    def test_parsers_produce_identical_output(self):
+        # 所有可用的解析后端在已保存的 HN 页面上输出一致，且包含转义字符和站内链接
+        fixture = os.path.join(os.path.dirname(__file__), 'fixtures', 'hn_front_page.html')
+        with open(fixture, encoding='utf-8') as file:
+            html_content = file.read()
+        expected = parse_stories(html_content, PARSERS['soup'])
+        self.assertEqual(len(expected), 30)
+        self.assertTrue(expected[0]['title'].endswith('& friends'))
+        self.assertEqual(expected[0]['link'], 'item?id=41000000')
+        for name in available_parsers():
+            self.assertEqual(parse_stories(html_content, PARSERS[name]), expected, name)
+
+    def test_unavailable_parser_falls_back_to_soup(self):
+        # 指定的后端未安装或不存在时退回 SoupStrainer 解析
+        self.assertIs(get_parser('missing'), PARSERS['soup'])
+
+    def test_page_urls_follow_depth_and_lists(self):
+        # news 和 best 按深度翻页，newest 只抓取第一页
+        client = HackerNewsClient(pages=2, lists=('news', 'best', 'newest'))
+        self.assertEqual(client.page_urls(), [
+            'https://news.ycombinator.com/', 'https://news.ycombinator.com/news?p=2',
+            'https://news.ycombinator.com/best', 'https://news.ycombinator.com/best?p=2',
+            'https://news.ycombinator.com/newest',
+        ])
+
+    @patch('http_transport.requests.Session.get')
+    def test_multi_page_crawl_merges_and_dedupes(self, mock_get):
+        # 多个列表页合并为一个排名流，重复的新闻保留最靠前的位置，失败的页被跳过
+        def row(title, link):
+            return f'<table><tr class="athing"><td><span class="titleline"><a href="{link}">{title}</a></span></td></tr></table>'
+        pages = {
+            'https://news.ycombinator.com/': row('Story 1', 'https://a.com/1'),
+            'https://news.ycombinator.com/news?p=2': row('Story 2', 'https://a.com/2'),
+            'https://news.ycombinator.com/best': row('Story 1', 'https://a.com/1') + row('Story 3', 'https://a.com/3'),
+        }
+
+        def fake_get(url, timeout=None):
+            if url not in pages:
+                raise Exception("Connection error")
+            return MagicMock(text=pages[url])
+        mock_get.side_effect = fake_get
+
+        client = HackerNewsClient(pages=2, lists=('news', 'best'), max_concurrent_per_host=2, requests_per_second=100)
+        top_stories = client.fetch_top_stories()
+
+        self.assertEqual([story['title'] for story in top_stories], ['Story 1', 'Story 2', 'Story 3'])
+        self.assertEqual(mock_get.call_count, 4)  # best?p=2 失败，不影响其他页
+
 if __name__ == '__main__':
     unittest.main()
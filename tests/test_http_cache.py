@@ -0,0 +1,63 @@
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from http_cache import HTTPCache  # 导入要测试的 HTTPCache 类
+
+class TestHTTPCache(unittest.TestCase):
+    def setUp(self):
+        """
+        在每个测试方法之前运行，创建临时缓存目录。
+        """
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache_path = os.path.join(self.tmp_dir, 'http_cache.db')
+        self.url = 'https://api.github.com/repos/DjangoPeng/openai-quickstart/issues'
+
+    def tearDown(self):
+        """
+        在每个测试方法之后运行，删除临时缓存目录。
+        """
+        shutil.rmtree(self.tmp_dir)
+
+    def test_put_and_get(self):
+        """
+        测试保存后能否按 URL 和参数取回，且参数顺序与 None 值不影响缓存键。
+        """
+        cache = HTTPCache(self.cache_path)
+        cache.put(self.url, {'state': 'closed', 'since': '2024-08-24'}, '"abc"', None, '[]', 'next-url')
+
+        entry = cache.get(self.url, {'since': '2024-08-24', 'state': 'closed', 'until': None})
+        self.assertEqual(entry['body'], '[]')
+        self.assertEqual(entry['link_next'], 'next-url')
+        self.assertEqual(HTTPCache.validators(entry), {'If-None-Match': '"abc"'})
+        self.assertIsNone(cache.get(self.url, {'state': 'open'}))
+
+    def test_persistent(self):
+        """
+        测试缓存是否持久化到磁盘，重新打开后仍可命中。
+        """
+        HTTPCache(self.cache_path).put(self.url, {}, None, 'Sat, 24 Aug 2024 00:00:00 GMT', '[1]')
+        entry = HTTPCache(self.cache_path).get(self.url, {})
+        self.assertEqual(entry['last_modified'], 'Sat, 24 Aug 2024 00:00:00 GMT')
+
+    def test_lru_eviction(self):
+        """
+        测试超出大小上限时是否淘汰最久未访问的条目。
+        """
+        cache = HTTPCache(self.cache_path, max_size_mb=25 / (1024 * 1024))  # 上限 25 字节
+        cache.put(self.url, {'page': 1}, '"1"', None, 'x' * 10)
+        cache.put(self.url, {'page': 2}, '"2"', None, 'x' * 10)
+        cache.get(self.url, {'page': 1})  # 访问 page 1，使 page 2 成为最久未访问的条目
+        cache.put(self.url, {'page': 3}, '"3"', None, 'x' * 10)
+
+        self.assertIsNotNone(cache.get(self.url, {'page': 1}))
+        self.assertIsNone(cache.get(self.url, {'page': 2}))
+        self.assertIsNotNone(cache.get(self.url, {'page': 3}))
+
+if __name__ == '__main__':
+    unittest.main()
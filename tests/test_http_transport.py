@@ -0,0 +1,48 @@
+import sys
+import os
+import unittest
+from unittest.mock import patch
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from http_transport import HTTPTransport  # 导入要测试的 HTTPTransport 类
+
+class TestHTTPTransport(unittest.TestCase):
+    def setUp(self):
+        """
+        在每个测试方法之前运行，创建带主机级连接池配置的传输层。
+        """
+        self.transport = HTTPTransport(pool_maxsize=4, pool_maxsize_per_host={'api.github.com': 16},
+                                       max_retries=2, backoff_factor=0.1, connect_timeout=3, read_timeout=20)
+
+    def test_pool_sized_per_host(self):
+        """
+        测试指定主机使用单独大小的连接池，其余主机使用默认连接池。
+        """
+        github_adapter = self.transport.session.get_adapter('https://api.github.com/repos/a/b')
+        default_adapter = self.transport.session.get_adapter('https://news.ycombinator.com/')
+        self.assertEqual(github_adapter._pool_maxsize, 16)
+        self.assertEqual(default_adapter._pool_maxsize, 4)
+
+    def test_retries_only_idempotent_requests(self):
+        """
+        测试只对幂等请求在 5xx 时按带抖动的指数退避重试。
+        """
+        retry = self.transport.session.get_adapter('https://api.github.com/').max_retries
+        self.assertEqual(retry.total, 2)
+        self.assertIn(503, retry.status_forcelist)
+        self.assertTrue(retry.is_retry('GET', 503))
+        self.assertFalse(retry.is_retry('POST', 503))
+        self.assertGreater(retry.backoff_jitter, 0)
+
+    @patch('http_transport.requests.Session.get')
+    def test_default_timeouts(self, mock_get):
+        """
+        测试未指定超时时使用配置的 (连接超时, 读取超时)。
+        """
+        self.transport.get('https://news.ycombinator.com/')
+        mock_get.assert_called_once_with('https://news.ycombinator.com/', timeout=(3, 20))
+
+if __name__ == '__main__':
+    unittest.main()
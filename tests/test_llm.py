@@ -1,5 +1,7 @@
 import sys
 import os
+import shutil
+import tempfile
 import unittest
 from unittest.mock import patch, MagicMock
 
@@ -15,6 +17,8 @@ class TestLLM(unittest.TestCase):
         在每个测试方法运行前执行，初始化 LLM 实例和测试数据。
         """
         self.config = Config()  # 初始化配置对象
+        self.config.llm_cache = {}  # 默认不启用响应缓存，避免测试之间互相影响
+        self.config.llm_metrics = {}  # 默认不记录调用指标
         self.llm = LLM(self.config)  # 使用配置对象初始化 LLM 实例
 
         # 设置示例的系统提示信息
@@ -40,7 +44,7 @@ class TestLLM(unittest.TestCase):
             llm = LLM(self.config)
         mock_log_error.assert_called_with("不支持的模型类型: invalid_model")
 
-    @patch('llm.requests.post')
+    @patch('http_transport.requests.Session.post')
     @patch('llm.LOG.error')
     def test_ollama_invalid_response_structure(self, mock_log_error, mock_post):
         """
@@ -75,6 +79,156 @@ class TestLLM(unittest.TestCase):
         # 检查是否记录了预期的错误日志
         mock_log_error.assert_called_with("生成报告时发生错误：OpenAI API error")
 
+    @patch('http_transport.requests.Session.post')
+    def test_ollama_response_cached(self, mock_post):
+        """
+        测试启用缓存时相同请求只调用一次 Ollama，use_cache=False 时强制重新生成。
+        """
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        self.config.llm_model_type = "ollama"
+        self.config.llm_cache = {'enabled': True, 'path': os.path.join(tmp_dir, 'llm_cache.db')}
+        llm = LLM(self.config)
+        mock_response = MagicMock()
+        mock_response.json.return_value = {"message": {"content": "report"}}
+        mock_post.return_value = mock_response
+
+        self.assertEqual(llm.generate_report(self.system_prompt, self.github_content), "report")
+        self.assertEqual(llm.generate_report(self.system_prompt, self.github_content), "report")
+        self.assertEqual(mock_post.call_count, 1)
+        llm.generate_report(self.system_prompt, self.github_content, use_cache=False)
+        self.assertEqual(mock_post.call_count, 2)
+
+        self.config.ollama_model_name = "another-model"  # 模型名称是缓存键的一部分
+        llm.generate_report(self.system_prompt, self.github_content)
+        self.assertEqual(mock_post.call_count, 3)
+        self.assertEqual(llm.cache_metrics()['hits'], 1)
+
+    @patch('http_transport.requests.Session.post')
+    def test_ollama_call_metrics_recorded(self, mock_post):
+        """
+        测试启用调用指标时记录 Ollama 返回的 token 数、生成速度以及调用方传入的标签。
+        """
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        self.config.llm_model_type = "ollama"
+        self.config.llm_metrics = {'enabled': True, 'path': os.path.join(tmp_dir, 'llm_metrics.db')}
+        llm = LLM(self.config)
+        mock_response = MagicMock()
+        mock_response.json.return_value = {"message": {"content": "report"}, "prompt_eval_count": 120,
+                                           "eval_count": 60, "eval_duration": 2_000_000_000}
+        mock_post.return_value = mock_response
+
+        llm.generate_report(self.system_prompt, self.github_content,
+                            tags={'report_type': 'github', 'subject': 'langchain-ai_langchain'})
+
+        call = llm.metrics.recent(1)[0]
+        self.assertEqual((call['provider'], call['report_type'], call['subject']),
+                         ('ollama', 'github', 'langchain-ai_langchain'))
+        self.assertEqual((call['prompt_tokens'], call['completion_tokens']), (120, 60))
+        self.assertEqual(call['tokens_per_second'], 30.0)
+        self.assertIsNone(call['ttft'])  # 非流式调用无法观测首个 token 的耗时
+        self.assertFalse(call['cached'])
+
+    @patch('llm.OpenAI')
+    def test_generate_reports_batch_skips_cached_requests(self, mock_openai):
+        """
+        测试批处理模式只提交缓存未命中的请求，结果写入缓存并按 custom_id 返回，失败的请求返回异常。
+        """
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        self.config.llm_model_type = "openai"
+        self.config.llm_cache = {'enabled': True, 'path': os.path.join(tmp_dir, 'llm_cache.db')}
+        self.config.llm_batch = {'enabled': True}
+        llm = LLM(self.config)
+        llm.batch = MagicMock()
+        llm.batch.run.return_value = {'repo_a': ("report a", {'prompt_tokens': 10, 'completion_tokens': 5}),
+                                      'repo_b': RuntimeError("bad request")}
+        requests = {'repo_a': (self.system_prompt, "content a", None), 'repo_b': (self.system_prompt, "content b", None)}
+
+        results = llm.generate_reports_batch(requests)
+
+        self.assertEqual(results['repo_a'], "report a")
+        self.assertIsInstance(results['repo_b'], RuntimeError)
+        model, submitted = llm.batch.run.call_args.args
+        self.assertEqual(model, self.config.openai_model_name)
+        self.assertEqual(submitted['repo_a'][1]['content'], "content a")
+
+        llm.batch.run.return_value = {'repo_b': ("report b", {})}
+        results = llm.generate_reports_batch(requests)
+        self.assertEqual(results, {'repo_a': "report a", 'repo_b': "report b"})
+        self.assertEqual(list(llm.batch.run.call_args.args[1]), ['repo_b'])  # repo_a 命中缓存，不再提交
+
+    @patch('http_transport.requests.Session.post')
+    def test_ollama_keep_alive_options_and_warm_up(self, mock_post):
+        """
+        测试 Ollama 请求显式携带 keep_alive 和 num_ctx 等参数；预热请求不含消息，并记录冷启动的加载耗时。
+        """
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        self.config.llm_model_type = "ollama"
+        self.config.llm_context_window = {'ollama': 8192}
+        self.config.llm_ollama = {'keep_alive': '1h', 'warm_up': True, 'options': {'temperature': 0.2}}
+        self.config.llm_metrics = {'enabled': True, 'path': os.path.join(tmp_dir, 'llm_metrics.db')}
+        llm = LLM(self.config)
+        mock_response = MagicMock()
+        mock_response.json.return_value = {"message": {"role": "assistant", "content": ""}, "done": True,
+                                           "load_duration": 3_500_000_000}
+        mock_post.return_value = mock_response
+
+        llm.warm_up()
+
+        payload = mock_post.call_args.kwargs['json']
+        self.assertEqual(payload['messages'], [])
+        self.assertEqual(payload['keep_alive'], '1h')
+        self.assertEqual(payload['options'], {'num_ctx': 8192, 'temperature': 0.2})
+        call = llm.metrics.recent(1)[0]
+        self.assertEqual((call['report_type'], call['load_seconds'], call['cold_start']), ('warm_up', 3.5, 1))
+
+        mock_response.json.return_value = {"message": {"content": "report"}, "load_duration": 2_000_000}
+        llm.generate_report(self.system_prompt, self.github_content)
+        payload = mock_post.call_args.kwargs['json']
+        self.assertEqual(payload['options'], {'num_ctx': 8192, 'temperature': 0.2})  # 与预热参数一致，不会重新加载
+        self.assertEqual(llm.metrics.recent(1)[0]['cold_start'], 0)
+
+    @patch('http_transport.requests.Session.post')
+    def test_ollama_stream_report(self, mock_post):
+        """
+        测试 Ollama 流式生成按行解析增量消息，并在 done 后结束。
+        """
+        self.config.llm_model_type = "ollama"
+        llm = LLM(self.config)
+        mock_response = MagicMock()
+        mock_response.__enter__.return_value = mock_response
+        mock_response.iter_lines.return_value = [
+            b'{"message": {"content": "# Report"}, "done": false}',
+            b'',
+            b'{"message": {"content": "\\n- item"}, "done": false}',
+            b'{"message": {"content": ""}, "done": true}',
+        ]
+        mock_post.return_value = mock_response
+
+        chunks = list(llm.stream_report(self.system_prompt, self.github_content))
+
+        self.assertEqual(chunks, ["# Report", "\n- item"])
+        self.assertTrue(mock_post.call_args.kwargs['json']['stream'])
+        self.assertTrue(mock_post.call_args.kwargs['stream'])
+
+    @patch('llm.OpenAI')
+    def test_openai_stream_report(self, mock_openai):
+        """
+        测试 OpenAI 流式生成逐段产出 delta 内容，跳过空片段。
+        """
+        self.config.llm_model_type = "openai"
+        llm = LLM(self.config)
+
+        def chunk(content):
+            return MagicMock(choices=[MagicMock(delta=MagicMock(content=content))])
+        mock_openai().chat.completions.create.return_value = iter([chunk("Hello"), chunk(None), chunk(" world")])
+
+        self.assertEqual(list(llm.stream_report(self.system_prompt, self.github_content)), ["Hello", " world"])
+        self.assertTrue(mock_openai().chat.completions.create.call_args.kwargs['stream'])
+
 
 if __name__ == '__main__':
     unittest.main()
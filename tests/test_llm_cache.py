@@ -0,0 +1,77 @@
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from llm_cache import LLMCache  # 导入要测试的 LLMCache 类
+
+class TestLLMCache(unittest.TestCase):
+    def setUp(self):
+        """
+        在每个测试方法之前运行，创建临时缓存目录和可控的时钟。
+        """
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache_path = os.path.join(self.tmp_dir, 'llm_cache.db')
+        self.now = [1000.0]
+        self.clock = lambda: self.now[0]
+
+    def tearDown(self):
+        """
+        在每个测试方法之后运行，删除临时缓存目录。
+        """
+        shutil.rmtree(self.tmp_dir)
+
+    def test_key_covers_all_inputs(self):
+        """
+        测试缓存键随模型、提示、内容和参数变化，参数顺序不影响缓存键。
+        """
+        key = LLMCache.make_key('ollama', 'llama3.1', 'prompt', 'content', {'a': 1, 'b': 2})
+        self.assertEqual(key, LLMCache.make_key('ollama', 'llama3.1', 'prompt', 'content', {'b': 2, 'a': 1}))
+        self.assertNotEqual(key, LLMCache.make_key('openai', 'llama3.1', 'prompt', 'content', {'a': 1, 'b': 2}))
+        self.assertNotEqual(key, LLMCache.make_key('ollama', 'llama3.1', 'prompt', 'content!', {'a': 1, 'b': 2}))
+        self.assertNotEqual(key, LLMCache.make_key('ollama', 'llama3.1', 'prompt', 'content', {'a': 1, 'b': 3}))
+
+    def test_hits_misses_and_persistence(self):
+        """
+        测试缓存持久化到磁盘，并统计命中和未命中次数。
+        """
+        LLMCache(self.cache_path, clock=self.clock).put('k', 'report')
+        cache = LLMCache(self.cache_path, clock=self.clock)
+        self.assertEqual(cache.get('k'), 'report')
+        self.assertIsNone(cache.get('missing'))
+        self.assertEqual(cache.metrics(), {'hits': 1, 'misses': 1, 'hit_rate': 0.5, 'entries': 1, 'size_bytes': 6})
+
+    def test_ttl_expiry(self):
+        """
+        测试超过 TTL 的条目视为未命中，并在下次写入时被清理。
+        """
+        cache = LLMCache(self.cache_path, ttl_hours=1, clock=self.clock)
+        cache.put('old', 'report')
+        self.now[0] += 3601
+        self.assertIsNone(cache.get('old'))
+        cache.put('new', 'report')
+        self.assertEqual(cache.metrics()['entries'], 1)
+
+    def test_lru_eviction(self):
+        """
+        测试超出大小上限时淘汰最久未访问的条目。
+        """
+        cache = LLMCache(self.cache_path, max_size_mb=25 / (1024 * 1024), clock=self.clock)  # 上限 25 字节
+        cache.put('a', 'x' * 10)
+        self.now[0] += 1
+        cache.put('b', 'x' * 10)
+        self.now[0] += 1
+        cache.get('a')  # 访问 a，使 b 成为最久未访问的条目
+        self.now[0] += 1
+        cache.put('c', 'x' * 10)
+
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('c'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import sys
+import os
+import threading
+import time
+import unittest
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from llm_executor import LLMExecutor, PromptAffinitySlots, provider_slots  # 导入要测试的线程池和并发配额
+
+
+class TestLLMExecutor(unittest.TestCase):
+    def setUp(self):
+        """
+        在每个测试方法之前运行，创建报告生成线程池。
+        """
+        self.executor = LLMExecutor(max_workers=4)
+
+    def tearDown(self):
+        """
+        在每个测试方法之后运行，关闭线程池。
+        """
+        self.executor.shutdown()
+
+    def test_map_unordered_yields_in_completion_order(self):
+        # 边消费生成器边提交，先完成的任务先产出
+        def items():
+            yield ('slow', 0.3)
+            yield ('fast', 0.0)
+
+        def work(name, delay):
+            time.sleep(delay)
+            return name.upper()
+
+        results = [(item[0], future.result()) for item, future in self.executor.map_unordered(work, items())]
+        self.assertEqual(results, [('fast', 'FAST'), ('slow', 'SLOW')])
+
+    def test_map_unordered_surfaces_exceptions_per_item(self):
+        # 单个任务失败不影响其他任务，异常通过 future 返回
+        def work(value):
+            if value == 2:
+                raise ValueError("boom")
+            return value * 10
+
+        outcomes = {}
+        for (value,), future in self.executor.map_unordered(work, [(1,), (2,), (3,)]):
+            outcomes[value] = future.exception() or future.result()
+        self.assertEqual(outcomes[1], 10)
+        self.assertEqual(outcomes[3], 30)
+        self.assertIsInstance(outcomes[2], ValueError)
+
+    def test_provider_slots_are_shared_and_cap_concurrency(self):
+        # 同一服务共享一个信号量，同时执行的请求数不超过配额
+        slots = provider_slots('test-provider', 2)
+        self.assertIs(provider_slots('test-provider', 5), slots)
+
+        lock = threading.Lock()
+        active = [0]
+        peak = [0]
+
+        def call(_):
+            with slots:
+                with lock:
+                    active[0] += 1
+                    peak[0] = max(peak[0], active[0])
+                time.sleep(0.05)
+                with lock:
+                    active[0] -= 1
+
+        futures = [future for _, future in self.executor.map_unordered(call, [(i,) for i in range(8)])]
+        self.assertTrue(all(future.exception() is None for future in futures))
+        self.assertEqual(peak[0], 2)
+
+    def test_slots_prefer_waiters_with_same_prompt(self):
+        # 配额释放时，优先放行与上一个请求系统提示相同的等待者，其余按到达顺序
+        slots = PromptAffinitySlots(1)
+        order = []
+
+        def call(prompt, name):
+            with slots.hold(prompt):
+                order.append(name)
+
+        slots.acquire('github')
+        threads = []
+        for prompt, name in [('hn', 'hn-1'), ('github', 'github-2'), ('hn', 'hn-3')]:
+            thread = threading.Thread(target=call, args=(prompt, name))
+            thread.start()
+            threads.append(thread)
+            while len(slots._waiting) < len(threads):  # 等待线程进入队列，保证到达顺序确定
+                time.sleep(0.01)
+        slots.release()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(order, ['github-2', 'hn-1', 'hn-3'])
+
+    def test_slots_fill_every_free_slot_with_mixed_prompts(self):
+        # 同时空出两个位置时，不同提示的等待者不会因为先让位给相同提示的等待者而继续空等
+        slots = PromptAffinitySlots(2)
+        slots.acquire('github')
+        slots.acquire('github')
+        acquired = {name: threading.Event() for name in ('hn', 'github')}
+
+        def call(prompt):
+            slots.acquire(prompt)
+            acquired[prompt].set()
+
+        for prompt in ('hn', 'github'):
+            threading.Thread(target=call, args=(prompt,), daemon=True).start()
+            while not any(entry[0] == prompt for entry in slots._waiting):  # 等待线程进入队列
+                time.sleep(0.01)
+        with slots._cond:  # 两个位置同时空出
+            slots.release()
+            slots.release()
+
+        self.assertTrue(acquired['github'].wait(1))
+        self.assertTrue(acquired['hn'].wait(1))
+
+if __name__ == '__main__':
+    unittest.main()
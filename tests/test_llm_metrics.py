@@ -0,0 +1,91 @@
+import sys
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from llm_metrics import LLMMetricsStore  # 导入要测试的 LLMMetricsStore 类
+
+
+class TestLLMMetricsStore(unittest.TestCase):
+    def setUp(self):
+        """
+        在每个测试方法之前运行，在临时目录中创建指标库，时间由测试控制。
+        """
+        self.tmp_dir = tempfile.mkdtemp()
+        self.now = [1000.0]
+        self.store = LLMMetricsStore(os.path.join(self.tmp_dir, 'llm_metrics.db'), clock=lambda: self.now[0])
+
+    def tearDown(self):
+        """
+        在每个测试方法之后运行，删除临时目录。
+        """
+        shutil.rmtree(self.tmp_dir)
+
+    def test_summary_groups_and_excludes_cache_hits_from_latency(self):
+        # 缓存命中计入调用次数，但不拉低平均耗时
+        self.store.record('ollama', 'llama3.1', 'github', 'owner_a', 100, 50, latency=4.0, tokens_per_second=20.0)
+        self.store.record('ollama', 'llama3.1', 'github', 'owner_b', 300, 150, latency=8.0, ttft=1.0,
+                          tokens_per_second=30.0, streamed=True)
+        self.store.record('ollama', 'llama3.1', 'github', 'owner_a', latency=0.0, cached=True)
+        self.store.record('ollama', 'llama3.1', 'hacker_news_hours_topic', '2024-09-01/14', 80, 40, latency=2.0)
+
+        github, topic = self.store.summary()
+
+        self.assertEqual(github['report_type'], 'github')
+        self.assertEqual((github['calls'], github['cached']), (3, 1))
+        self.assertEqual((github['prompt_tokens'], github['completion_tokens']), (400, 200))
+        self.assertEqual((github['avg_latency'], github['max_latency']), (6.0, 8.0))
+        self.assertEqual(github['avg_ttft'], 1.0)
+        self.assertEqual(github['avg_tokens_per_second'], 25.0)
+        self.assertEqual(topic['report_type'], 'hacker_news_hours_topic')
+
+        by_subject = {row['subject']: row for row in self.store.summary(group_by='subject')}
+        self.assertEqual(by_subject['owner_b']['total_latency'], 8.0)
+
+    def test_summary_since_and_invalid_group(self):
+        # since 之前的调用不参与统计；分组字段只能是白名单中的列
+        self.store.record('openai', 'gpt-4o-mini', 'github', 'old', 10, 5, latency=1.0)
+        self.now[0] = 2000.0
+        self.store.record('openai', 'gpt-4o-mini', 'github', 'new', 10, 5, latency=1.0)
+
+        self.assertEqual([row['subject'] for row in self.store.summary('subject', since=1500.0)], ['new'])
+        self.assertEqual(self.store.recent(1)[0]['subject'], 'new')
+        with self.assertRaises(ValueError):
+            self.store.summary(group_by='subject; DROP TABLE calls')
+
+    def test_opening_old_database_adds_new_columns(self):
+        # 早期版本建的指标库没有加载耗时等列，打开时自动补齐，可按冷/热启动分组
+        path = os.path.join(self.tmp_dir, 'old_metrics.db')
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE calls (id INTEGER PRIMARY KEY AUTOINCREMENT, created_at REAL, provider TEXT,"
+                     " model TEXT, report_type TEXT, subject TEXT, prompt_tokens INTEGER, completion_tokens INTEGER,"
+                     " latency REAL, ttft REAL, tokens_per_second REAL, cached INTEGER, streamed INTEGER)")
+        conn.commit()
+        conn.close()
+
+        store = LLMMetricsStore(path)
+        store.record('ollama', 'llama3.1', 'github', latency=5.0, load_seconds=4.5, cold_start=True)
+        store.record('ollama', 'llama3.1', 'github', latency=2.0, load_seconds=0.01, cold_start=False)
+
+        rows = {row['cold_start']: row for row in store.summary(group_by='cold_start')}
+        self.assertEqual((rows[1]['avg_latency'], rows[1]['avg_load_seconds']), (5.0, 4.5))
+        self.assertEqual(rows[0]['avg_latency'], 2.0)
+
+    def test_warm_up_excluded_from_latency_averages(self):
+        # 预热调用只加载模型，计入调用次数和加载耗时，不拉低按服务或模型汇总的平均耗时
+        store = LLMMetricsStore(os.path.join(self.tmp_dir, 'warm_up.db'))
+        store.record('ollama', 'llama3.1', 'warm_up', latency=4.0, load_seconds=3.9, cold_start=True)
+        store.record('ollama', 'llama3.1', 'github', latency=10.0, ttft=1.0, tokens_per_second=20.0)
+
+        row = store.summary(group_by='provider')[0]
+        self.assertEqual(row['calls'], 2)
+        self.assertEqual((row['total_latency'], row['avg_latency'], row['avg_ttft']), (10.0, 10.0, 1.0))
+        self.assertEqual(row['avg_load_seconds'], 3.9)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,176 @@
+import sys
+import os
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from config import Config  # 导入配置类
+from llm import create_llm  # 导入语言模型工厂
+from llm_router import LLMRouter, ProviderHealth  # 导入要测试的路由与健康统计
+
+
+class FakeProvider:
+    """
+    模拟的模型服务：按设定的延迟返回固定内容，或抛出异常。
+    """
+    def __init__(self, model, delay=0.0, error=None, chunks=('part1', 'part2')):
+        self.model = model
+        self.model_name = f'{model}-model'
+        self.context_window = 8192 if model == 'ollama' else 128000
+        self.delay = delay
+        self.error = error
+        self.chunks = chunks
+        self.calls = 0
+        self.batch = None
+        self.metrics = None
+
+    def generate_report(self, system_prompt, user_content, use_cache=True, tags=None):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return f'{self.model}: {user_content}'
+
+    def stream_report(self, system_prompt, user_content, use_cache=True, tags=None):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        yield from self.chunks
+
+
+class TestProviderHealth(unittest.TestCase):
+    def test_percentile_and_histogram(self):
+        # 分位数取最近成功调用的耗时，样本不足时返回 None；直方图按桶上界统计
+        health = ProviderHealth()
+        self.assertIsNone(health.percentile(0.95))
+        for latency in [0.5] * 18 + [3, 40]:
+            health.record_success(latency)
+        self.assertEqual(health.percentile(0.95), 40)
+        self.assertEqual(health.percentile(0.5), 0.5)
+        self.assertIsNone(health.percentile(0.95, min_samples=21))
+        histogram = health.histogram()
+        self.assertEqual((histogram[1], histogram[5], histogram[60], histogram['inf']), (18, 1, 1, 0))
+
+    def test_cached_calls_are_not_sampled(self):
+        # 几乎立即返回的调用（缓存命中）不计入耗时分布
+        health = ProviderHealth()
+        health.record_success(0.001)
+        self.assertIsNone(health.percentile(0.95))
+
+    def test_circuit_opens_after_consecutive_failures(self):
+        # 连续失败达到阈值后熔断 cooldown 秒，成功一次即恢复
+        now = [100.0]
+        health = ProviderHealth(failure_threshold=2, cooldown=60, clock=lambda: now[0])
+        health.record_failure()
+        self.assertTrue(health.healthy())
+        health.record_failure()
+        self.assertFalse(health.healthy())
+        now[0] += 61
+        self.assertTrue(health.healthy())
+        health.record_failure()
+        health.record_success(1.0)
+        self.assertEqual(health.consecutive_failures, 0)
+        self.assertTrue(health.healthy())
+
+
+class TestLLMRouter(unittest.TestCase):
+    def test_primary_answers_within_budget(self):
+        # 主服务在预算内返回时不发出对冲请求
+        primary, secondary = FakeProvider('ollama'), FakeProvider('openai')
+        router = LLMRouter([primary, secondary], latency_budget=1)
+        self.assertEqual(router.generate_report('prompt', 'content'), 'ollama: content')
+        self.assertEqual((primary.calls, secondary.calls), (1, 0))
+        self.assertEqual(router.model, 'ollama')
+        self.assertEqual(router.context_window, 8192)
+
+    def test_slow_primary_is_hedged(self):
+        # 主服务超过预算仍未返回时向下一个服务发出对冲请求，采用先返回的结果
+        primary, secondary = FakeProvider('ollama', delay=1.0), FakeProvider('openai')
+        router = LLMRouter([primary, secondary], latency_budget=0.1)
+        start = time.perf_counter()
+        self.assertEqual(router.generate_report('prompt', 'content'), 'openai: content')
+        self.assertLess(time.perf_counter() - start, 0.8)
+        self.assertEqual((primary.calls, secondary.calls), (1, 1))
+
+    def test_hedge_delay_follows_primary_percentile(self):
+        # 样本足够时以主服务耗时的 p95 作为对冲等待时间，不超过 latency_budget
+        primary, secondary = FakeProvider('ollama', delay=0.5), FakeProvider('openai')
+        router = LLMRouter([primary, secondary], latency_budget=30, min_samples=5)
+        self.assertEqual(router._hedge_delay(primary), 30)
+        for _ in range(5):
+            router.health['ollama'].record_success(0.1)
+        self.assertEqual(router._hedge_delay(primary), 0.1)
+        self.assertEqual(router.generate_report('prompt', 'content'), 'openai: content')
+
+    def test_failed_primary_falls_back(self):
+        # 主服务报错时立即改用下一个服务，并记录失败
+        primary = FakeProvider('ollama', error=ConnectionError('down'))
+        secondary = FakeProvider('openai')
+        router = LLMRouter([primary, secondary], latency_budget=10)
+        self.assertEqual(router.generate_report('prompt', 'content'), 'openai: content')
+        self.assertEqual(router.health['ollama'].consecutive_failures, 1)
+
+    def test_all_providers_fail(self):
+        # 所有服务都失败时抛出最后一个异常
+        router = LLMRouter([FakeProvider('ollama', error=ConnectionError('down')),
+                            FakeProvider('openai', error=RuntimeError('quota'))], latency_budget=10)
+        with self.assertRaisesRegex(RuntimeError, 'quota'):
+            router.generate_report('prompt', 'content')
+
+    def test_unhealthy_primary_is_skipped_until_cooldown(self):
+        # 熔断期间直接使用下一个服务，冷却结束后恢复原有顺序
+        now = [0.0]
+        primary = FakeProvider('ollama', error=ConnectionError('down'))
+        secondary = FakeProvider('openai')
+        router = LLMRouter([primary, secondary], latency_budget=10, failure_threshold=1, cooldown=60,
+                           clock=lambda: now[0])
+        router.generate_report('prompt', 'content')
+        self.assertFalse(router.health_metrics()['ollama']['healthy'])
+        router.generate_report('prompt', 'content')
+        self.assertEqual(primary.calls, 1)
+        now[0] = 61
+        primary.error = None
+        self.assertEqual(router.generate_report('prompt', 'content'), 'ollama: content')
+
+    def test_stream_falls_back_before_first_chunk(self):
+        # 流式生成在尚未输出内容时失败，改用下一个服务
+        router = LLMRouter([FakeProvider('ollama', error=ConnectionError('down')),
+                            FakeProvider('openai', chunks=('a', 'b'))])
+        self.assertEqual(list(router.stream_report('prompt', 'content')), ['a', 'b'])
+
+    def test_concurrent_requests(self):
+        # 多个线程同时经由路由生成报告
+        router = LLMRouter([FakeProvider('ollama', delay=0.05), FakeProvider('openai')], latency_budget=5)
+        results = []
+        threads = [threading.Thread(target=lambda i=i: results.append(router.generate_report('p', str(i))))
+                   for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(results), sorted(f'ollama: {i}' for i in range(8)))
+
+
+class TestCreateLLM(unittest.TestCase):
+    @patch('llm.OpenAI')
+    def test_router_built_from_config(self, mock_openai):
+        # 启用路由时按 providers 顺序为每个模型服务创建 LLM 实例，原配置不受影响
+        config = Config()
+        config.llm_cache = {}
+        config.llm_metrics = {}
+        config.llm_batch = {}
+        config.llm_router = {'enabled': True, 'providers': ['ollama', 'openai'], 'latency_budget_seconds': 30}
+        router = create_llm(config)
+        self.assertIsInstance(router, LLMRouter)
+        self.assertEqual([provider.model for provider in router.providers], ['ollama', 'openai'])
+        self.assertEqual(router.latency_budget, 30)
+        config.llm_router = {}
+        self.assertNotIsInstance(create_llm(config), LLMRouter)
+
+
+if __name__ == '__main__':
+    unittest.main()
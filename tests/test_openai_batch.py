@@ -0,0 +1,156 @@
+import sys
+import os
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from openai_batch import OpenAIBatchClient  # 导入要测试的 OpenAIBatchClient 类
+from http_transport import HTTPTransport  # 导入HTTP传输层，测试中关闭重试
+
+
+class BatchStandIn:
+    # 本地替身服务的状态：上传的文件、批处理任务和每个任务被查询的次数
+    def __init__(self, polls_before_done=2, final_status='completed'):
+        self.files = {}
+        self.batches = {}
+        self.polls = {}
+        self.polls_before_done = polls_before_done
+        self.final_status = final_status
+        self.cancelled = []
+
+    def complete(self, batch):
+        # 任务完成时生成结果文件：内容含 "fail" 的请求写入错误文件
+        outputs, errors = [], []
+        for line in self.files[batch['input_file_id']].splitlines():
+            request = json.loads(line)
+            content = request['body']['messages'][1]['content']
+            if 'fail' in content:
+                errors.append({'custom_id': request['custom_id'], 'error': None,
+                               'response': {'status_code': 400, 'body': {'error': {'message': 'bad request'}}}})
+                continue
+            body = {'choices': [{'message': {'role': 'assistant', 'content': f"report: {content}"}}],
+                    'usage': {'prompt_tokens': 10, 'completion_tokens': 5}}
+            outputs.append({'custom_id': request['custom_id'], 'error': None,
+                            'response': {'status_code': 200, 'body': body}})
+        batch['output_file_id'] = self.add_file('\n'.join(json.dumps(item) for item in outputs))
+        batch['error_file_id'] = self.add_file('\n'.join(json.dumps(item) for item in errors)) if errors else None
+
+    def add_file(self, content):
+        file_id = f'file-{len(self.files) + 1}'
+        self.files[file_id] = content
+        return file_id
+
+
+def make_handler(state):
+    class StandInHandler(BaseHTTPRequestHandler):
+        # 按 OpenAI Batch API 的路径处理文件上传、任务创建、状态查询和结果下载
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers['Content-Length']))
+            if self.headers.get('Authorization') != 'Bearer test-key':
+                return self.reply(401, {'error': 'unauthorized'})
+            if self.path == '/v1/files':
+                # multipart 请求体中以 {"custom_id" 开头的行就是上传的 JSONL
+                lines = [line for line in body.decode('utf-8').splitlines() if line.startswith('{"custom_id"')]
+                return self.reply(200, {'id': state.add_file('\n'.join(lines)), 'object': 'file'})
+            if self.path == '/v1/batches':
+                payload = json.loads(body)
+                batch_id = f'batch-{len(state.batches) + 1}'
+                state.batches[batch_id] = {'id': batch_id, 'status': 'validating', **payload}
+                state.polls[batch_id] = 0
+                return self.reply(200, state.batches[batch_id])
+            if self.path.endswith('/cancel'):
+                batch_id = self.path.split('/')[3]
+                state.cancelled.append(batch_id)
+                state.batches[batch_id]['status'] = 'cancelling'
+                return self.reply(200, state.batches[batch_id])
+            self.reply(404, {})
+
+        def do_GET(self):
+            if self.path.startswith('/v1/batches/'):
+                batch = state.batches[self.path.split('/')[3]]
+                state.polls[batch['id']] += 1
+                if batch['status'] not in ('cancelling', 'completed') and \
+                        state.polls[batch['id']] > state.polls_before_done:
+                    batch['status'] = state.final_status
+                    if state.final_status == 'completed':
+                        state.complete(batch)
+                elif batch['status'] == 'validating':
+                    batch['status'] = 'in_progress'
+                return self.reply(200, batch)
+            if self.path.startswith('/v1/files/') and self.path.endswith('/content'):
+                data = state.files[self.path.split('/')[3]].encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                return self.wfile.write(data)
+            self.reply(404, {})
+
+        def reply(self, status, payload):
+            data = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+    return StandInHandler
+
+
+class TestOpenAIBatchClient(unittest.TestCase):
+    def start(self, state):
+        """
+        在随机端口上启动本地替身服务，返回指向它的批处理客户端（轮询不等待）。
+        """
+        self.state = state
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(state))
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        self.addCleanup(self.httpd.server_close)
+        self.addCleanup(self.httpd.shutdown)
+        self.sleeps = []
+        return OpenAIBatchClient(HTTPTransport(max_retries=0), api_key='test-key',
+                                 base_url='http://127.0.0.1:%d/v1' % self.httpd.server_address[1],
+                                 poll_interval=30, sleep=self.sleeps.append)
+
+    def messages(self, content):
+        return [{'role': 'system', 'content': 'prompt'}, {'role': 'user', 'content': content}]
+
+    def test_run_maps_results_back_by_custom_id(self):
+        # 上传 JSONL、创建任务、轮询到完成后按 custom_id 返回结果，失败的请求返回异常
+        client = self.start(BatchStandIn(polls_before_done=2))
+
+        results = client.run('gpt-4o-mini', {'owner_a': self.messages('repo a'), 'owner_b': self.messages('fail b')})
+
+        self.assertEqual(results['owner_a'], ('report: repo a', {'prompt_tokens': 10, 'completion_tokens': 5}))
+        self.assertIsInstance(results['owner_b'], RuntimeError)
+        self.assertEqual(self.sleeps, [30, 30])  # 完成前轮询两次，每次间隔 poll_interval
+        uploaded = [json.loads(line) for line in self.state.files['file-1'].splitlines()]
+        self.assertEqual([line['custom_id'] for line in uploaded], ['owner_a', 'owner_b'])
+        self.assertEqual(uploaded[0]['url'], '/v1/chat/completions')
+        self.assertEqual(uploaded[0]['body']['model'], 'gpt-4o-mini')
+        self.assertEqual(self.state.batches['batch-1']['completion_window'], '24h')
+
+    def test_expired_batch_reports_missing_results(self):
+        # 任务过期且没有结果文件时，每个请求都返回异常
+        client = self.start(BatchStandIn(polls_before_done=0, final_status='expired'))
+
+        results = client.run('gpt-4o-mini', {'owner_a': self.messages('repo a')})
+
+        self.assertIsInstance(results['owner_a'], RuntimeError)
+
+    def test_wait_cancels_after_max_wait(self):
+        # 超过本地等待上限时取消任务并抛出超时异常
+        client = self.start(BatchStandIn(polls_before_done=100))
+        client.max_wait = 0
+
+        with self.assertRaises(TimeoutError):
+            client.run('gpt-4o-mini', {'owner_a': self.messages('repo a')})
+        self.assertEqual(self.state.cancelled, ['batch-1'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import sys
+import os
+import unittest
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from prompt_compactor import compact_markdown  # 导入要测试的压缩函数
+
+
+class TestPromptCompactor(unittest.TestCase):
+    def test_groups_by_prefix_and_label_and_drops_duplicates(self):
+        # 共享前缀或标签的条目合并为一行，重复条目、注释和多余空行被去掉，并统计压缩前后的 token 数
+        markdown = (
+            "# Progress for langchain-ai/langchain (2024-08-20 to 2024-08-21)\n\n\n"
+            "## Issues Closed in the Last 1 Days\n"
+            "- partners/chroma: release 0.1.3 #25599\n"
+            "- docs: few-shot conceptual guide #25596   \n"
+            "- docs: update examples in api ref #25589\n"
+            "- Fix crash on import #25580 [bug, core]\n"
+            "- Memory leak in loader #25581 [bug]\n"
+            "- Add box loader #25582\n"
+            "- docs: few-shot conceptual guide #25596\n"
+            "<!-- generated by bot -->\n\n"
+        )
+
+        compacted, stats = compact_markdown(markdown)
+
+        self.assertEqual(compacted, (
+            "# Progress for langchain-ai/langchain (2024-08-20 to 2024-08-21)\n\n"
+            "## Issues Closed in the Last 1 Days\n"
+            "- partners/chroma: release 0.1.3 #25599\n"
+            "- docs: few-shot conceptual guide #25596; update examples in api ref #25589\n"
+            "- [bug]: Fix crash on import #25580; Memory leak in loader #25581\n"
+            "- Add box loader #25582\n"
+        ))
+        self.assertEqual((stats['duplicates'], stats['grouped'], stats['omitted']), (1, 4, 0))
+        self.assertLess(stats['tokens_after'], stats['tokens_before'])
+
+    def test_duplicate_links_across_sections_are_collapsed(self):
+        # 每小时主题报告中重复出现的新闻链接只保留第一次，链接本身保持不变
+        markdown = (
+            "# Hacker News 热门话题 2024-09-01 10\n"
+            "1. **Rust**: small strings\n"
+            "    - https://fasterthanli.me/articles/small-strings-in-rust\n"
+            "# Hacker News 热门话题 2024-09-01 14\n"
+            "1. **Rust 再次登榜**: small strings\n"
+            "    - https://fasterthanli.me/articles/small-strings-in-rust/\n"
+            "    - https://kyju.org/blog/rust-safe-garbage-collection/\n"
+        )
+
+        compacted, stats = compact_markdown(markdown)
+
+        self.assertEqual(compacted.count("small-strings-in-rust"), 1)
+        self.assertIn("    - https://kyju.org/blog/rust-safe-garbage-collection/\n", compacted)
+        self.assertEqual(stats['duplicates'], 1)
+
+    def test_section_token_budget_keeps_leading_items(self):
+        # 每个小节超过预算后只保留靠前的条目，并注明省略数量；其他小节不受影响
+        issues = "\n".join(f"- Issue number {i} with a fairly long descriptive title #{i}" for i in range(20))
+        markdown = f"# Progress for a/b\n\n## Issues\n{issues}\n## Commits\n- Initial commit\n"
+
+        compacted, stats = compact_markdown(markdown, section_token_budget=50)
+
+        self.assertIn("- Issue number 0 with", compacted)
+        self.assertNotIn("- Issue number 19 with", compacted)
+        self.assertIn(f"- ... {stats['omitted']} more items omitted\n", compacted)
+        self.assertGreater(stats['omitted'], 10)
+        self.assertTrue(compacted.endswith("## Commits\n- Initial commit\n"))
+
+if __name__ == '__main__':
+    unittest.main()
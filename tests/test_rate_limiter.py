@@ -0,0 +1,98 @@
+import sys
+import os
+import unittest
+from unittest.mock import MagicMock
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from rate_limiter import RateLimitScheduler  # 导入要测试的 RateLimitScheduler 类
+
+class FakeClock:
+    """
+    可控的时钟，sleep 时直接推进时间，避免测试真正等待。
+    """
+    def __init__(self, now=1000.0):
+        self.now = now
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def make_response(status_code=200, **headers):
+    response = MagicMock()
+    response.status_code = status_code
+    response.headers = headers
+    return response
+
+
+class TestRateLimitScheduler(unittest.TestCase):
+    def setUp(self):
+        """
+        在每个测试方法之前运行，使用假时钟创建调度器。
+        """
+        self.clock = FakeClock()
+        self.scheduler = RateLimitScheduler(["token_aaaa", "token_bbbb"], requests_per_second=1000,
+                                            clock=self.clock.time, sleep=self.clock.sleep)
+
+    def test_prefers_token_with_most_quota(self):
+        """
+        测试调度器是否把请求分配给剩余配额最多的令牌。
+        """
+        self.scheduler.update("token_aaaa", make_response(**{'X-RateLimit-Remaining': '10', 'X-RateLimit-Limit': '5000'}))
+        self.scheduler.update("token_bbbb", make_response(**{'X-RateLimit-Remaining': '4000', 'X-RateLimit-Limit': '5000'}))
+        self.assertEqual(self.scheduler.acquire(), "token_bbbb")
+
+    def test_waits_for_reset_when_exhausted(self):
+        """
+        测试所有令牌配额耗尽时是否等待到最早的重置时间，而不是立即失败。
+        """
+        exhausted = {'X-RateLimit-Remaining': '0', 'X-RateLimit-Limit': '5000'}
+        self.assertTrue(self.scheduler.update("token_aaaa", make_response(403, **exhausted, **{'X-RateLimit-Reset': '1060'})))
+        self.assertTrue(self.scheduler.update("token_bbbb", make_response(403, **exhausted, **{'X-RateLimit-Reset': '1030'})))
+
+        self.assertEqual(self.scheduler.acquire(), "token_bbbb")
+        self.assertEqual(self.clock.sleeps, [30])
+
+    def test_secondary_rate_limit_blocks_token(self):
+        """
+        测试二级限流（Retry-After）是否只暂停对应的令牌。
+        """
+        self.assertTrue(self.scheduler.update("token_aaaa", make_response(403, **{'Retry-After': '60'})))
+        self.assertEqual(self.scheduler.acquire(), "token_bbbb")
+
+    def test_secondary_rate_limit_without_retry_after_backs_off(self):
+        """
+        测试未给出 Retry-After 的二级限流是否暂停令牌至少一分钟并重试。
+        """
+        response = make_response(403, **{'X-RateLimit-Remaining': '100'})
+        response.text = '{"message": "You have exceeded a secondary rate limit."}'
+        self.assertTrue(self.scheduler.update("token_aaaa", response))
+        self.assertTrue(self.scheduler.update("token_bbbb", make_response(429, **{'X-RateLimit-Remaining': '100'})))
+
+        self.assertEqual(self.scheduler.acquire(), "token_aaaa")
+        self.assertEqual(self.clock.sleeps, [60])
+
+    def test_non_rate_limit_forbidden_not_retried(self):
+        """
+        测试与限流无关的 403 不会触发重试。
+        """
+        self.assertFalse(self.scheduler.update("token_aaaa", make_response(403, **{'X-RateLimit-Remaining': '100'})))
+
+    def test_metrics_masks_tokens(self):
+        """
+        测试配额指标是否按令牌输出且只保留令牌末四位。
+        """
+        self.scheduler.update("token_aaaa", make_response(**{'X-RateLimit-Remaining': '42', 'X-RateLimit-Limit': '5000',
+                                                            'X-RateLimit-Reset': '2000'}))
+        metrics = self.scheduler.metrics()
+        self.assertEqual(metrics["...aaaa"], {'remaining': 42, 'limit': 5000, 'reset_at': 2000.0})
+        self.assertEqual(metrics["...bbbb"]['remaining'], None)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,7 @@
 import sys
 import os
+import shutil
+import tempfile
 import unittest
 from unittest.mock import MagicMock, patch
 
@@ -7,6 +9,7 @@ from unittest.mock import MagicMock, patch
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
 
 from report_generator import ReportGenerator  # 导入要测试的 ReportGenerator 类
+from chunker import estimate_tokens  # 导入 token 估算函数
 
 class TestReportGenerator(unittest.TestCase):
     def setUp(self):
@@ -16,6 +19,7 @@ class TestReportGenerator(unittest.TestCase):
         # 创建一个模拟的 LLM（大语言模型）对象
         self.mock_llm = MagicMock()
         self.mock_llm.model = "mock_model"  # 确保mock对象有一个有效的模型名称
+        self.mock_llm.context_window = 128000  # 默认输入都放得下，不触发分块摘要
 
         # 模拟提示内容
         self.mock_prompts = {
@@ -105,7 +109,8 @@ class TestReportGenerator(unittest.TestCase):
             self.assertEqual(content, mock_report)
 
         # 验证 LLM 的 generate_report 方法是否被正确调用，且传入了正确的参数
-        self.mock_llm.generate_report.assert_called_once_with(self.mock_prompts["github"], self.markdown_content)
+        self.mock_llm.generate_report.assert_called_once_with(self.mock_prompts["github"], self.markdown_content, use_cache=True,
+                                                              tags={"report_type": "github", "subject": "test_daily_progress"})
 
     @patch.object(ReportGenerator, '_preload_prompts', return_value=None)
     def test_generate_hn_topic_report(self, mock_preload_prompts):
@@ -133,7 +138,8 @@ class TestReportGenerator(unittest.TestCase):
             self.assertEqual(content, mock_report)
 
         # 验证 LLM 的 generate_report 方法是否被正确调用，且传入了正确的参数
-        self.mock_llm.generate_report.assert_called_once_with(self.mock_prompts["hacker_news_hours_topic"], self.markdown_content)
+        self.mock_llm.generate_report.assert_called_once_with(self.mock_prompts["hacker_news_hours_topic"], self.markdown_content, use_cache=True,
+                                                              tags={"report_type": "hacker_news_hours_topic", "subject": "test_hn_topic"})
 
     @patch.object(ReportGenerator, '_preload_prompts', return_value=None)
     def test_generate_hn_daily_report(self, mock_preload_prompts):
@@ -162,7 +168,175 @@ class TestReportGenerator(unittest.TestCase):
 
         # 验证 LLM 的 generate_report 方法是否被正确调用，且传入了正确的参数
         aggregated_content = self.report_generator._aggregate_topic_reports(self.test_hn_daily_dir_path)
-        self.mock_llm.generate_report.assert_called_once_with(self.mock_prompts["hacker_news_daily_report"], aggregated_content)
+        self.mock_llm.generate_report.assert_called_once_with(self.mock_prompts["hacker_news_daily_report"], aggregated_content, use_cache=True,
+                                                              tags={"report_type": "hacker_news_daily_report", "subject": "test_hn_daily_dir"})
+
+    @patch.object(ReportGenerator, '_preload_prompts', return_value=None)
+    def test_generate_hn_daily_report_from_story_index(self, mock_preload_prompts):
+        """
+        测试启用新闻索引时，每日汇总的输入来自索引中当天的去重新闻。
+        """
+        mock_index = MagicMock()
+        mock_index.daily_markdown.return_value = "# Hacker News Stories (test_hn_daily_dir)\n"
+        self.report_generator = ReportGenerator(self.mock_llm, ["hacker_news_daily_report"], story_index=mock_index)
+        self.report_generator.prompts = self.mock_prompts
+        self.mock_llm.generate_report.return_value = "daily"
+
+        self.report_generator.generate_hn_daily_report(self.test_hn_daily_dir_path + '/')
+
+        mock_index.daily_markdown.assert_called_once_with('test_hn_daily_dir')
+        self.mock_llm.generate_report.assert_called_once_with(self.mock_prompts["hacker_news_daily_report"],
+                                                              "# Hacker News Stories (test_hn_daily_dir)\n", use_cache=True,
+                                                              tags={"report_type": "hacker_news_daily_report", "subject": "test_hn_daily_dir"})
+
+    @patch.object(ReportGenerator, '_preload_prompts', return_value=None)
+    def test_generate_github_report_map_reduces_oversized_input(self, mock_preload_prompts):
+        """
+        测试输入超过模型上下文时，先分块摘要，再用同一提示对各块摘要做最终生成。
+        """
+        self.mock_llm.context_window = 400  # 预算为 300 - 提示长度，下面的输入需要切成多块
+        issues = "\n".join(f"- Fix bug #{i} in the request handling code path" for i in range(60))
+        with open(self.test_markdown_file_path, 'w') as file:
+            file.write("# Progress for DjangoPeng/openai-quickstart\n\n## Issues Closed\n" + issues)
+        self.report_generator = ReportGenerator(self.mock_llm, ["github"])
+        self.report_generator.prompts = self.mock_prompts
+        self.mock_llm.generate_report.side_effect = lambda prompt, content, use_cache=True, tags=None: \
+            "final" if content.startswith("summary") else "summary of " + content.splitlines()[2]
+
+        report, _ = self.report_generator.generate_github_report(self.test_markdown_file_path)
+
+        self.assertEqual(report, "final")
+        calls = self.mock_llm.generate_report.call_args_list
+        chunks = [call.args[1] for call in calls[:-1]]
+        self.assertGreater(len(chunks), 1)
+        for chunk in chunks:
+            # 每块都带上文档标题和小节标题，且都使用 GitHub 提示
+            self.assertTrue(chunk.startswith("# Progress for DjangoPeng/openai-quickstart"))
+            self.assertIn("## Issues Closed", chunk)
+        self.assertTrue(all(call.args[0] == self.mock_prompts["github"] for call in calls))
+        self.assertEqual(sum(chunk.count("- Fix bug #") for chunk in chunks), 60)
+        self.assertTrue(calls[-1].args[1].startswith("summary of "))
+
+    @patch.object(ReportGenerator, '_preload_prompts', return_value=None)
+    def test_truncation_after_reduce_rounds_is_marked(self, mock_preload_prompts):
+        """
+        测试多轮摘要后仍超长时，截断的输入末尾注明省略的条目数，而不是静默丢弃。
+        """
+        self.mock_llm.context_window = 400
+        self.report_generator = ReportGenerator(self.mock_llm, ["github"])
+        self.report_generator.prompts = self.mock_prompts
+        # 摘要不会变短：每块的“摘要”就是原文
+        self.mock_llm.generate_report.side_effect = lambda prompt, content, use_cache=True, tags=None: content
+        issues = "\n".join(f"- Fix bug #{i} in the request handling code path" for i in range(60))
+
+        content = self.report_generator._fit_to_context(self.mock_prompts["github"], "## Issues Closed\n" + issues, True)
+
+        budget = self.report_generator._chunk_budget(self.mock_prompts["github"])
+        self.assertLessEqual(estimate_tokens(content), budget)
+        kept = content.count("- Fix bug #")
+        self.assertLess(kept, 60)
+        self.assertTrue(content.endswith(f"- ... {60 - kept} more items omitted (input truncated to fit the model context)"))
+
+    @patch.object(ReportGenerator, '_preload_prompts', return_value=None)
+    def test_generate_github_report_compacts_input(self, mock_preload_prompts):
+        """
+        测试启用输入压缩时，LLM 收到的是合并了相同前缀、去掉重复条目后的内容。
+        """
+        with open(self.test_markdown_file_path, 'w') as file:
+            file.write("# Progress for a/b\n\n## Issues Closed\n- docs: fix typo #1\n- docs: add guide #2\n"
+                       "- docs: add guide #2\n")
+        self.report_generator = ReportGenerator(self.mock_llm, ["github"],
+                                                compaction={'enabled': True, 'section_token_budget': 1500})
+        self.report_generator.prompts = self.mock_prompts
+        self.mock_llm.generate_report.return_value = "report"
+
+        self.report_generator.generate_github_report(self.test_markdown_file_path)
+
+        content = self.mock_llm.generate_report.call_args.args[1]
+        self.assertEqual(content, "# Progress for a/b\n\n## Issues Closed\n- docs: fix typo #1; add guide #2\n")
+
+    @patch.object(ReportGenerator, '_preload_prompts', return_value=None)
+    def test_section_budget_only_applies_when_input_does_not_fit(self, mock_preload_prompts):
+        """
+        测试配置了小节预算时，放得下模型上下文的输入保留全部条目，放不下时才省略条目。
+        """
+        issues = "".join(f"- Fix bug #{i} in the request handling code path\n" for i in range(300))
+        with open(self.test_markdown_file_path, 'w') as file:
+            file.write("# Progress for a/b\n\n## Issues Closed\n" + issues)
+        self.report_generator = ReportGenerator(self.mock_llm, ["github"],
+                                                compaction={'enabled': True, 'section_token_budget': 1500})
+        self.report_generator.prompts = self.mock_prompts
+        self.mock_llm.generate_report.return_value = "report"
+
+        self.report_generator.generate_github_report(self.test_markdown_file_path)
+        content = self.mock_llm.generate_report.call_args.args[1]
+        self.assertEqual(content.count("- Fix bug #"), 300)
+        self.assertNotIn("more items omitted", content)
+
+        self.mock_llm.context_window = 2000  # 压缩后仍放不下：按小节预算省略条目
+        self.report_generator.generate_github_report(self.test_markdown_file_path)
+        content = self.mock_llm.generate_report.call_args.args[1]
+        self.assertIn("more items omitted", content)
+
+    @patch.object(ReportGenerator, '_preload_prompts', return_value=None)
+    def test_stream_github_report_writes_incrementally(self, mock_preload_prompts):
+        """
+        测试流式生成时每收到一段文本就写入文件，并产出累计的报告内容。
+        """
+        self.report_generator = ReportGenerator(self.mock_llm, ["github"])
+        self.report_generator.prompts = self.mock_prompts
+        report_file_path = os.path.splitext(self.test_markdown_file_path)[0] + "_report.md"
+
+        def fake_stream(system_prompt, content, use_cache=True, tags=None):
+            yield "# Report"
+            with open(report_file_path) as file:
+                self.assertEqual(file.read(), "# Report")  # 第一段已写入文件
+            yield "\n- Fix bug #123"
+        self.mock_llm.stream_report.side_effect = fake_stream
+
+        updates = list(self.report_generator.stream_github_report(self.test_markdown_file_path))
+
+        self.assertEqual([report for report, _ in updates], ["# Report", "# Report\n- Fix bug #123"])
+        with open(report_file_path) as file:
+            self.assertEqual(file.read(), "# Report\n- Fix bug #123")
+    @patch.object(ReportGenerator, '_preload_prompts', return_value=None)
+    def test_hn_topic_report_reused_when_front_page_barely_changed(self, mock_preload_prompts):
+        """
+        测试首页与上一份生成报告的快照几乎相同时复用主题报告、只补充新上榜新闻；
+        变化较大时重新调用 LLM；每日汇总只读取复用报告补充的部分。
+        """
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        stories = [f"{i}. [Story {i}](https://example.com/{i})\n" for i in range(1, 11)]
+
+        def snapshot(hour, lines):
+            path = os.path.join(directory, f"{hour}.md")
+            with open(path, 'w') as file:
+                file.write(f"# Hacker News Top Stories (2024-09-01 {hour}:00)\n\n" + "".join(lines))
+            return path
+
+        self.report_generator = ReportGenerator(self.mock_llm, ["hacker_news_hours_topic"],
+                                                topic_reuse={'enabled': True, 'similarity_threshold': 0.8})
+        self.report_generator.prompts = self.mock_prompts
+        self.mock_llm.generate_report.return_value = "topic report\n"
+
+        self.report_generator.generate_hn_topic_report(snapshot("08", stories))
+        # 替换一条新闻：相似度 9/11 ≥ 0.8，复用 08 的报告
+        report, _ = self.report_generator.generate_hn_topic_report(
+            snapshot("12", stories[:9] + ["10. [Fresh](https://example.com/fresh)\n"]))
+        self.assertEqual(self.mock_llm.generate_report.call_count, 1)
+        self.assertEqual(report, "<!-- reused from 08.md (similarity 0.82) -->\ntopic report\n\n"
+                                 "## 新上榜\n- [Fresh](https://example.com/fresh)\n")
+        # 与实际生成报告的 08 比较：再替换一条后相似度 8/12 < 0.8，重新生成
+        self.report_generator.generate_hn_topic_report(
+            snapshot("16", stories[:8] + ["9. [Fresh](https://example.com/fresh)\n", "10. Other (rank 12 -> 10)\n"]))
+        self.assertEqual(self.mock_llm.generate_report.call_count, 2)
+        self.assertEqual(self.report_generator.topic_reuse_metrics(),
+                         {'generated': 2, 'reused': 1, 'skip_rate': 0.333})
+
+        aggregated = self.report_generator._aggregate_topic_reports(directory)
+        self.assertEqual(aggregated.count("topic report"), 2)
+        self.assertIn("## 新上榜\n- [Fresh](https://example.com/fresh)", aggregated)
 
 if __name__ == '__main__':
     unittest.main()
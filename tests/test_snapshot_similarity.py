@@ -0,0 +1,36 @@
+import sys
+import os
+import unittest
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from snapshot_similarity import snapshot_stories, jaccard  # 导入要测试的快照解析与相似度计算
+
+
+class TestSnapshotSimilarity(unittest.TestCase):
+    def test_snapshot_stories_reads_both_formats(self):
+        # 完整条目与索引模式下只有排名变化的条目都按标题取出，正文摘录和标题行被忽略
+        markdown = ("# Hacker News Top Stories (2024-09-01 08:00)\n\n## New Stories\n"
+                    "1. [Show HN: Foo](https://foo.dev) (10 points, 2 comments, by a)\n"
+                    "   > excerpt\n\n## Still Trending\n"
+                    "2. Rust  2.0 released (rank 5 -> 2)\n")
+        self.assertEqual(snapshot_stories(markdown), {
+            'show hn: foo': '- [Show HN: Foo](https://foo.dev)',
+            'rust 2.0 released': '- Rust  2.0 released',
+        })
+
+    def test_same_story_matches_across_formats(self):
+        # 同一新闻在完整条目和排名变化条目中的标题相同，比较时视为同一条
+        before = snapshot_stories("1. [A](https://a.dev)\n2. [B](https://b.dev)\n")
+        after = snapshot_stories("## Still Trending\n1. B (rank 2 -> 1)\n2. A (rank 1 -> 2)\n")
+        self.assertEqual(jaccard(before, after), 1.0)
+
+    def test_jaccard(self):
+        self.assertEqual(jaccard({'a', 'b', 'c'}, {'b', 'c', 'd'}), 0.5)
+        self.assertEqual(jaccard(set(), set()), 1.0)
+        self.assertEqual(jaccard({'a'}, set()), 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
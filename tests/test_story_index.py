@@ -0,0 +1,122 @@
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from story_index import StoryIndex  # 导入要测试的 StoryIndex 类
+from hacker_news_client import HackerNewsClient  # 导入 Hacker News 客户端，测试增量快照导出
+
+STORY_A = {'title': 'Story A', 'link': 'https://example.com/a'}
+STORY_B = {'title': 'Ask HN: Story B', 'link': 'item?id=2'}
+STORY_C = {'title': 'Story C', 'link': 'https://example.com/c'}
+
+
+class TestStoryIndex(unittest.TestCase):
+    def setUp(self):
+        """
+        在每个测试方法之前运行，创建临时索引。
+        """
+        self.tmp_dir = tempfile.mkdtemp()
+        self.index = StoryIndex(os.path.join(self.tmp_dir, 'hn_stories.db'))
+
+    def tearDown(self):
+        """
+        在每个测试方法之后运行，删除临时索引。
+        """
+        shutil.rmtree(self.tmp_dir)
+
+    def test_record_snapshot_returns_delta(self):
+        """
+        测试快照返回每条新闻上一次的排名，首次出现的新闻为 None。
+        """
+        first = self.index.record_snapshot([STORY_A, STORY_B], '2024-09-01T10:00:00')
+        second = self.index.record_snapshot([STORY_B, STORY_C, STORY_A], '2024-09-01T11:00:00')
+
+        self.assertEqual([previous for _, previous in first], [None, None])
+        self.assertEqual([previous for _, previous in second], [2, None, 1])
+
+    def test_trajectory_records_only_changes(self):
+        """
+        测试排名和分数都未变化时不追加轨迹记录。
+        """
+        self.index.record_snapshot([dict(STORY_A, id=1, score=10)], '2024-09-01T10:00:00')
+        self.index.record_snapshot([dict(STORY_A, id=1, score=10)], '2024-09-01T11:00:00')
+        self.index.record_snapshot([STORY_C, dict(STORY_A, id=1, score=42)], '2024-09-01T12:00:00')
+
+        self.assertEqual(self.index.trajectory({'id': 1}),
+                         [('2024-09-01T10:00:00', 1, 10), ('2024-09-01T12:00:00', 2, 42)])
+
+    def test_stories_seen_on_day_are_unique(self):
+        """
+        测试每日汇总只包含当天出现过的去重新闻，并记录出现次数和最佳排名。
+        """
+        self.index.record_snapshot([STORY_C], '2024-08-31T23:00:00')
+        self.index.record_snapshot([STORY_A, STORY_B], '2024-09-01T10:00:00')
+        self.index.record_snapshot([STORY_B, STORY_A], '2024-09-01T11:00:00')
+
+        stories = self.index.stories_seen_on('2024-09-01')
+        self.assertEqual([(s['title'], s['snapshots'], s['best_rank']) for s in stories],
+                         [('Story A', 2, 1), ('Ask HN: Story B', 2, 1)])
+        self.assertIn("[Ask HN: Story B](https://news.ycombinator.com/item?id=2)",
+                      self.index.daily_markdown('2024-09-01'))
+
+    def test_stories_seen_on_uses_per_day_snapshots(self):
+        """
+        测试前一天和后一天出现、当天不在任何快照中的新闻不计入当天，出现次数和最佳排名按天统计。
+        """
+        self.index.record_snapshot([STORY_C, STORY_A], '2024-08-31T23:00:00')
+        self.index.record_snapshot([STORY_A], '2024-09-01T10:00:00')
+        self.index.record_snapshot([STORY_A, STORY_C], '2024-09-02T01:00:00')
+
+        stories = self.index.stories_seen_on('2024-09-01')
+        self.assertEqual([(s['title'], s['snapshots'], s['best_rank']) for s in stories], [('Story A', 1, 1)])
+        stories = self.index.stories_seen_on('2024-08-31')
+        self.assertEqual([(s['title'], s['snapshots'], s['best_rank']) for s in stories],
+                         [('Story C', 1, 1), ('Story A', 1, 2)])
+
+    def test_export_writes_snapshot_delta(self):
+        """
+        测试启用索引时，每小时的快照按新出现/仍在榜分组，仍在榜的新闻同样保留链接并注明排名变化。
+        """
+        client = HackerNewsClient(index=self.index)
+        cwd = os.getcwd()
+        os.chdir(self.tmp_dir)
+        self.addCleanup(os.chdir, cwd)
+
+        client.fetch_top_stories = lambda: [STORY_A]
+        client.export_top_stories(date='2024-09-01', hour='10')
+        client.fetch_top_stories = lambda: [STORY_C, STORY_A]
+        file_path = client.export_top_stories(date='2024-09-01', hour='11')
+
+        with open(file_path) as file:
+            content = file.read()
+        self.assertIn("## New Stories\n1. [Story C](https://example.com/c)\n", content)
+        self.assertIn("## Still Trending\n2. [Story A](https://example.com/a) (rank 1 -> 2)\n", content)
+
+    def test_export_snapshot_keeps_article_content_for_returning_stories(self):
+        """
+        测试启用索引和文章提取时，仍在榜的新闻同样附带文章摘录。
+        """
+        client = HackerNewsClient(index=self.index)
+        client.extractor = MagicMock()
+        client.extractor.enrich.side_effect = lambda stories: [dict(story, content=f"About {story['title']}")
+                                                               for story in stories]
+        cwd = os.getcwd()
+        os.chdir(self.tmp_dir)
+        self.addCleanup(os.chdir, cwd)
+
+        client.fetch_top_stories = lambda: [STORY_A]
+        client.export_top_stories(date='2024-09-01', hour='10')
+        file_path = client.export_top_stories(date='2024-09-01', hour='11')
+
+        with open(file_path) as file:
+            content = file.read()
+        self.assertIn("1. [Story A](https://example.com/a) (rank 1 -> 1)\n   > About Story A\n", content)
+
+if __name__ == '__main__':
+    unittest.main()
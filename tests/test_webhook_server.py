@@ -0,0 +1,122 @@
+import sys
+import os
+import json
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+import requests
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from event_store import EventStore, utc_timestamp  # 导入本地事件存储
+from github_client import GitHubClient  # 导入 GitHub 客户端，从存储渲染进展
+from webhook_server import WebhookReceiver, WebhookServer, sign  # 导入要测试的 Webhook 接收服务
+
+SECRET = 'test_secret'
+REPOSITORY = {'full_name': 'DjangoPeng/openai-quickstart', 'default_branch': 'main'}
+
+
+class TestWebhookServer(unittest.TestCase):
+    def setUp(self):
+        """
+        在每个测试方法之前运行，在随机端口上启动接收服务。
+        """
+        self.tmp_dir = tempfile.mkdtemp()
+        self.store = EventStore(os.path.join(self.tmp_dir, 'events.db'))
+        self.server = WebhookServer(WebhookReceiver(self.store, SECRET), '127.0.0.1', 0).start()
+        self.url = 'http://127.0.0.1:%d/' % self.server.server_address[1]
+        self.repo = REPOSITORY['full_name']
+
+    def tearDown(self):
+        """
+        在每个测试方法之后运行，关闭服务并删除临时目录。
+        """
+        self.server.stop()
+        shutil.rmtree(self.tmp_dir)
+
+    def replay(self, event, payload, secret=SECRET):
+        # 按 GitHub 的格式在本地回放一次推送
+        body = json.dumps(payload).encode('utf-8')
+        headers = {'X-GitHub-Event': event, 'X-GitHub-Delivery': 'delivery-1',
+                   'X-Hub-Signature-256': sign(secret, body), 'Content-Type': 'application/json'}
+        return requests.post(self.url, data=body, headers=headers)
+
+    def test_issue_event_appended_to_store(self):
+        """
+        测试签名正确的 issues 事件被写入存储，并记录事件流健康。
+        """
+        issue = {'number': 7, 'title': 'Fix bug', 'state': 'closed', 'updated_at': '2024-08-24T01:00:00Z'}
+        response = self.replay('issues', {'action': 'closed', 'issue': issue, 'repository': REPOSITORY})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['number'] for item in self.store.query(self.repo, 'issues')], [7])
+        self.assertTrue(self.store.webhook_healthy(self.repo, 24))
+        self.assertIsNone(self.store.delta_since(self.repo, 'issues', None))  # 推送不推进轮询游标
+
+    def test_invalid_signature_rejected(self):
+        """
+        测试签名错误的推送被拒绝，且不写入任何数据。
+        """
+        issue = {'number': 7, 'title': 'Fix bug', 'updated_at': '2024-08-24T01:00:00Z'}
+        response = self.replay('issues', {'issue': issue, 'repository': REPOSITORY}, secret='wrong_secret')
+
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(self.store.query(self.repo, 'issues'), [])
+        self.assertFalse(self.store.webhook_healthy(self.repo, 24))
+
+    def test_push_event_only_default_branch(self):
+        """
+        测试 push 事件只记录默认分支的提交，与 REST 轮询的范围一致。
+        """
+        commit = {'id': 'abc123', 'message': 'Initial commit', 'timestamp': '2024-08-24T00:00:00Z',
+                  'author': {'name': 'django'}, 'url': 'https://github.com/commit/abc123'}
+        self.replay('push', {'ref': 'refs/heads/feature', 'commits': [commit], 'repository': REPOSITORY})
+        self.assertEqual(self.store.query(self.repo, 'commits'), [])
+
+        self.replay('push', {'ref': 'refs/heads/main', 'commits': [commit], 'repository': REPOSITORY})
+        commits = self.store.query(self.repo, 'commits')
+        self.assertEqual([(c['sha'], c['author'], c['date']) for c in commits],
+                         [('abc123', 'django', '2024-08-24T00:00:00Z')])
+
+    def test_push_event_timestamps_converted_to_utc(self):
+        """
+        测试 push 事件中带本地时区的提交时间转换为 UTC，按时间窗口查询时落在正确的日期。
+        """
+        commit = {'id': 'def456', 'message': 'Late fix', 'timestamp': '2024-08-23T22:30:00-04:00',
+                  'author': {'name': 'django'}, 'url': 'https://github.com/commit/def456'}
+        self.replay('push', {'ref': 'refs/heads/main', 'commits': [commit], 'repository': REPOSITORY})
+
+        commits = self.store.query(self.repo, 'commits', since='2024-08-24')
+        self.assertEqual([c['date'] for c in commits], ['2024-08-24T02:30:00Z'])
+
+    def test_unsupported_event_ignored(self):
+        """
+        测试不关心的事件（如 ping）返回 202，但仍说明推送链路正常。
+        """
+        response = self.replay('ping', {'zen': 'Keep it logically awesome.', 'repository': REPOSITORY})
+        self.assertEqual(response.status_code, 202)
+        self.assertTrue(self.store.webhook_healthy(self.repo, 24))
+
+    def test_open_issues_not_exported_as_closed(self):
+        """
+        测试 opened 事件不会出现在“已关闭 Issues”的导出中，重新打开的 Issue 从存储中删除。
+        """
+        now = utc_timestamp()
+        opened = {'number': 8, 'title': 'New bug', 'state': 'open', 'updated_at': now}
+        closed = {'number': 7, 'title': 'Fix bug', 'state': 'closed', 'updated_at': now}
+        self.assertEqual(self.replay('issues', {'action': 'opened', 'issue': opened,
+                                                'repository': REPOSITORY}).status_code, 200)
+        self.replay('issues', {'action': 'closed', 'issue': closed, 'repository': REPOSITORY})
+
+        client = GitHubClient('fake_token', store=self.store)
+        with patch.object(GitHubClient, '_write_progress_file',
+                          side_effect=lambda repo, since, today, days, issues: [i['number'] for i in issues]):
+            self.assertEqual(client.render_progress_by_date_range(self.repo, 1), [7])
+            self.replay('issues', {'action': 'reopened', 'issue': dict(closed, state='open'),
+                                   'repository': REPOSITORY})
+            self.assertEqual(client.render_progress_by_date_range(self.repo, 1), [])
+
+if __name__ == '__main__':
+    unittest.main()